@@ -5,10 +5,18 @@ import atexit
 import shutil
 import threading, time, webbrowser  # NEU
 from pathlib import Path
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
+from git import GitCommandError
 from models.config import ConfigStore
 from services.watch_service import WatchService, InMemoryLog
-from services.git_service import mirror_force_with_lease, ensure_repo
+from services.git_service import push_branches, PUSH_STATS
+from services.profile_service import PROFILER
+from services.repo_registry import REGISTRY
+from services.log_sink import LOG_SINK
+from services.history_service import (
+    WORKTREE, DIFF_PAGE_LINES, backup_index, commit_parent, diff_page, file_commits, iter_diff, restore,
+    safe_rel,
+)
 
 
 def _purge_pycache(root_path: str):
@@ -76,9 +84,28 @@ app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret")
 
 CONFIG_PATH = Path.home() / ".github_auto_sync" / "config.json"
 cfg_store = ConfigStore(CONFIG_PATH)
+# Log-Ablage auf der Platte (Queue + eigener Schreib-Thread) vor dem ersten Eintrag starten
+if cfg_store.data.get("log_file_enabled", True):
+    LOG_SINK.start(
+        max_bytes=int(float(cfg_store.data.get("log_max_mb", 5)) * 1024 * 1024),
+        keep=int(cfg_store.data.get("log_keep_files", 20)),
+    )
+# atexit läuft rückwärts: als Erstes registriert = als Letztes geschlossen (Stop-Meldungen kommen noch an)
+atexit.register(LOG_SINK.stop)
 log = InMemoryLog(maxlen=2000)
-watch = WatchService(cfg_store.data, log)
+watch = WatchService(cfg_store, log)  # bekommt Snapshots + Änderungs-Abo, nie das dict
+
+# ungültige/kaputte Config nicht still schlucken
+for _problem in cfg_store.problems:
+    log.add(f"Config: {_problem}")
+
+# Optionales Profiling ab Prozessstart (sonst per /api/profile/start)
+if cfg_store.data.get("profile_enabled"):
+    PROFILER.start()
 
+# Beim Prozessende die persistenten git-Prozesse aller geöffneten Repos beenden (auch die der Routen) –
+# vor dem Watcher-Stop registriert, läuft also danach: erst Timer/WIP-Push beenden, dann Handles schließen
+atexit.register(REGISTRY.close_all)
 # Beim Prozessende sicher stoppen (verhindert „hängende“ Watchdog-Threads)
 atexit.register(lambda: watch.stop() if watch and watch.running() else None)
 
@@ -119,19 +146,11 @@ def start_watch():
 
       # --- Remote vor Start auf lokalen Stand spiegeln (sicherer Force-Push) ---
       proj = cfg_store.data.get("project_path")
-      branch = (cfg_store.data.get("branch") or "main").strip()
       remote_url = (cfg_store.data.get("remote_url") or "").strip()
 
       if proj and remote_url:
         try:
-          repo = ensure_repo(Path(proj))
-          mirror_force_with_lease(
-            repo=repo,
-            branch=branch,
-            remote="origin",
-            snapshot_msg="mirror_on_start"
-          )
-          log.add(f"Remote gespiegelt: origin/{branch} (mirror_on_start)")
+          watch.mirror_remote()  # im WIP-Modus übersprungen (Snapshot würde den Squash blockieren)
         except Exception as e:
           # Wenn Spiegeln fehlschlägt, trotzdem weiter starten – aber Hinweis ins Log/UI
           log.add(f"Spiegeln fehlgeschlagen: {e!r}")
@@ -175,26 +194,53 @@ def manual_push():
             return redirect(url_for("index"))
 
         # Nur pushen, wenn Repo existiert
-        if not os.path.isdir(os.path.join(proj, ".git")):
+        handle = REGISTRY.find(proj) if os.path.isdir(os.path.join(proj, ".git")) else None
+        if handle is None:
             flash("Kein Git-Repository im Projektordner gefunden.", "danger")
             return redirect(url_for("index"))
 
-        # reinen Push ausführen
-        cmd = ["git", "-C", proj, "push", "--porcelain", "--", "origin", branch]
-        out = subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True)
-        log.add(f"Manueller Push: {branch} -> origin (ok)")
-        if out.strip():
-            log.add(out.strip())
-        flash("Manueller Push ausgeführt.", "success")
-    except subprocess.CalledProcessError as e:
-        log.add(f"Manueller Push fehlgeschlagen: {e.output!r}")
-        flash(f"Push fehlgeschlagen: {e.output}", "danger")
+        # reinen Push ausführen (serialisiert mit laufenden Batches; ohne neue Commits kein Netzwerk)
+        with handle.lock:
+            rec = push_branches(handle.repo, [branch])
+        if rec is None:
+            flash("Kein Remote 'origin' konfiguriert.", "warning")
+        elif rec["skipped"]:
+            log.add(f"Manueller Push: origin/{branch} bereits aktuell")
+            flash("Nichts zu pushen – Remote ist aktuell.", "info")
+        else:
+            log.add(f"Manueller Push: {branch} -> origin (ok, {rec['bytes']} B, {rec['duration_ms']:.0f} ms)")
+            flash("Manueller Push ausgeführt.", "success")
+    except GitCommandError as e:
+        detail = (e.stderr or e.stdout or "").strip()
+        log.add(f"Manueller Push fehlgeschlagen: {detail!r}")
+        flash(f"Push fehlgeschlagen: {detail}", "danger")
     except Exception as e:
         log.add(f"Manueller Push Fehler: {e!r}")
         flash(f"Fehler: {e}", "danger")
     return redirect(url_for("index"))
 
 
+@app.route("/wip/squash", methods=["POST"])
+def wip_squash():
+    """
+    WIP-Modus: alle WIP-Commits als *einen* Commit auf den Haupt-Branch übernehmen
+    (und, bei Auto-Push, beide Branches pushen).
+    """
+    if not cfg_store.data.get("project_path"):
+        flash("Kein Projektpfad konfiguriert.", "warning")
+        return redirect(url_for("index"))
+    try:
+        sha = watch.squash_wip()
+        if sha:
+            flash(f"WIP zusammengefasst: {sha[:7]} auf {cfg_store.data.get('branch', 'main')}.", "success")
+        else:
+            flash("Keine WIP-Änderungen zum Zusammenfassen.", "info")
+    except Exception as e:
+        log.add(f"Squash fehlgeschlagen: {e!r}")
+        flash(f"Squash fehlgeschlagen: {e}", "danger")
+    return redirect(url_for("index"))
+
+
 @app.route("/settings", methods=["GET", "POST"])
 def settings():
     if request.method == "POST":
@@ -240,8 +286,28 @@ def preview():
         return redirect(url_for("filters"))
 
 
+def _int_arg(name: str, default: int, lo: int, hi: int) -> int:
+    """Ganzzahliger Query-Parameter; fehlend/ungültig -> default, dann auf [lo, hi] begrenzt."""
+    return min(hi, max(lo, request.args.get(name, default=default, type=int)))
+
+
 @app.route("/api/logs")
 def api_logs():
+    """
+    Ohne Parameter: letzte Zeilen aus dem Speicher (Dashboard).
+    Mit before/since (ISO-Zeit) oder limit: strukturierte Einträge aus der Log-Ablage,
+    neueste zuerst; weiterblättern mit before=<next_before>&skip=<next_skip>.
+    """
+    if any(k in request.args for k in ("before", "since", "limit")):
+        if not LOG_SINK.running():
+            return jsonify(ok=False, error="log_file_enabled ist aus"), 404
+        LOG_SINK.flush()
+        limit = _int_arg("limit", 200, 1, 1000)
+        page = LOG_SINK.read(
+            before=request.args.get("before", ""), since=request.args.get("since", ""), limit=limit,
+            skip=_int_arg("skip", 0, 0, 10 ** 9),
+        )
+        return jsonify(ok=True, **page)
     try:
         lines = list(log.dump()[:500])
     except Exception:
@@ -284,15 +350,171 @@ def api_raw_links():
         return jsonify(ok=False, error=str(e), text="", lines=[])
 
 
+@app.route("/api/watch-stats")
+def api_watch_stats():
+    """Beobachtungsmodus (inotify/polling/native) und Anzahl belegter Watches."""
+    return jsonify(ok=True, running=watch.running(), **watch.watch_stats())
+
+
+@app.route("/api/push-stats")
+def api_push_stats():
+    """Gesendete Bytes und Dauer der letzten Pushes, übersprungene Leer-Pushes."""
+    return jsonify(ok=True, **PUSH_STATS.summary(limit=_int_arg("limit", 20, 1, 1000)))
+
+
+# --- Verlauf je Datei: Backups (.auto_versions) + Commits, Diffs, Wiederherstellen ---
+def _history_target(rel: str):
+    """(root, handle, bereinigter rel) oder ValueError mit Meldung."""
+    proj = cfg_store.data.get("project_path")
+    if not proj:
+        raise ValueError("Kein Projektpfad konfiguriert.")
+    root = Path(proj).expanduser()
+    handle = REGISTRY.find(root) if (root / ".git").exists() else None
+    if handle is None:
+        raise ValueError("Kein Git-Repository im Projektordner gefunden.")
+    return root, handle, safe_rel(root, rel)
+
+
+@app.get("/history")
+def history():
+    return render_template("history.html", path=request.args.get("path", ""), cfg=cfg_store.data)
+
+
+@app.get("/api/history/<path:rel>")
+def api_history(rel):
+    try:
+        root, handle, rel = _history_target(rel)
+    except ValueError as e:
+        return jsonify(ok=False, error=str(e)), 400
+    skip = _int_arg("skip", 0, 0, 10 ** 9)
+    limit = _int_arg("limit", 20, 1, 100)
+    # eine mehr holen: zeigt, ob es eine weitere Seite gibt
+    commits = file_commits(handle.repo, rel, skip, limit + 1, cfg_store.data.get("wip_branch") or "HEAD")
+    backups = [v._asdict() for v in backup_index(root).versions(rel)] if skip == 0 else []
+    return jsonify(
+        ok=True,
+        path=rel,
+        exists=(root / rel).is_file(),
+        backups=backups,
+        commits=commits[:limit],
+        next_skip=skip + limit if len(commits) > limit else None,
+    )
+
+
+@app.get("/api/history/<path:rel>/diff")
+def api_history_diff(rel):
+    """
+    Diff zwischen zwei Versionen: a/b = Commit-sha, backup:<name> oder worktree (Standard für b).
+    Ohne a: Änderung des Commits `commit` gegenüber seinem Vorgänger.
+    Seitenweise (offset/limit Zeilen) oder mit raw=1 als gestreamter Text.
+    """
+    try:
+        root, handle, rel = _history_target(rel)
+    except ValueError as e:
+        return jsonify(ok=False, error=str(e)), 400
+    commit = request.args.get("commit", "")
+    a, b = request.args.get("a", ""), request.args.get("b", "")
+    if not (a or commit):
+        return jsonify(ok=False, error="a oder commit fehlt"), 400
+    try:
+        if commit and not a:
+            a, b = commit_parent(handle.repo, commit), b or commit
+        b = b or WORKTREE
+        if request.args.get("raw"):
+            gen = iter_diff(handle.repo, root, rel, a, b)
+            first = next(gen, None)  # Fehler (Version unbekannt, zu groß) vor dem Streamen melden
+
+            def _stream():
+                if first is None:
+                    return
+                yield first + "\n"
+                for line in gen:
+                    yield line + "\n"
+
+            return Response(stream_with_context(_stream()), mimetype="text/plain")
+        page = diff_page(
+            handle.repo, root, rel, a, b,
+            offset=_int_arg("offset", 0, 0, 10 ** 9),
+            limit=_int_arg("limit", DIFF_PAGE_LINES, 1, 5000),
+        )
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify(ok=False, error=str(e)), 400
+    except GitCommandError as e:
+        return jsonify(ok=False, error=(e.stderr or str(e)).strip()), 400
+    return jsonify(ok=True, path=rel, a=a, b=b, **page)
+
+
+@app.post("/api/history/<path:rel>/restore")
+def api_history_restore(rel):
+    """Datei auf backup:<name> oder einen Commit zurücksetzen (aktueller Stand wird vorher gesichert)."""
+    try:
+        root, handle, rel = _history_target(rel)
+    except ValueError as e:
+        return jsonify(ok=False, error=str(e)), 400
+    data = request.get_json(silent=True) or request.form
+    version = (data.get("version") or "").strip()
+    if not version:
+        return jsonify(ok=False, error="version fehlt"), 400
+    try:
+        res = restore(handle.repo, root, rel, version, int(cfg_store.data.get("max_backups", 10)))
+    except (ValueError, FileNotFoundError) as e:
+        return jsonify(ok=False, error=str(e)), 400
+    except Exception as e:
+        log.add(f"Wiederherstellen fehlgeschlagen: {rel}: {e!r}")
+        return jsonify(ok=False, error=str(e)), 500
+    log.add(f"Wiederhergestellt: {rel} <- {version}")
+    return jsonify(ok=True, **res)
+
+
+# --- Profiling (opt-in, ohne Neustart) ---
+@app.post("/api/profile/start")
+def api_profile_start():
+    reset = request.args.get("reset", "1").lower() not in ("0", "false", "no")
+    PROFILER.start(reset=reset)
+    log.add("Profiling gestartet")
+    return jsonify(ok=True, **PROFILER.status())
+
+
+@app.post("/api/profile/stop")
+def api_profile_stop():
+    PROFILER.stop()
+    log.add("Profiling gestoppt")
+    return jsonify(ok=True, **PROFILER.status())
+
+
+@app.get("/api/profile")
+def api_profile_status():
+    """Status + Top-Funktionen als Text (sortierbar über ?sort=cumulative|tottime|calls)."""
+    sort = request.args.get("sort", "cumulative")
+    try:
+        text = PROFILER.summary(limit=_int_arg("limit", 40, 1, 1000), sort=sort)
+    except Exception as e:
+        return jsonify(ok=False, error=str(e)), 400
+    return jsonify(ok=True, summary=text, **PROFILER.status())
+
+
+@app.get("/api/profile/download")
+def api_profile_download():
+    """pstats-Datei, z. B. für `python -m pstats sync.prof` oder snakeviz."""
+    data = PROFILER.pstats_bytes()
+    if not data:
+        return jsonify(ok=False, error="no_data"), 404
+    return Response(
+        data,
+        mimetype="application/octet-stream",
+        headers={"Content-Disposition": "attachment; filename=github_sync.prof"},
+    )
+
+
 @app.route("/info")
 def info():
     version = None
     try:
-        from git import Repo
         proj = cfg_store.data.get("project_path")
         if proj and Path(proj, ".git").exists():
-            repo = Repo(proj)
-            version = repo.head.commit.hexsha[:7]
+            # gecacht; neu gelesen erst, wenn sich HEAD/Branch-Ref ändert (Commit)
+            sha = REGISTRY.head_sha(proj)
+            version = sha[:7] if sha else None
     except Exception as e:
         log.add(f"Info-Fehler: {e!r}")   # optional ins Log
 
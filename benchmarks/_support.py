@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Deterministische Git-Identität, damit Commits ohne globale Config funktionieren
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "bench",
+    "GIT_AUTHOR_EMAIL": "bench@localhost",
+    "GIT_COMMITTER_NAME": "bench",
+    "GIT_COMMITTER_EMAIL": "bench@localhost",
+}
+
+
+def setup_git_env() -> None:
+    for k, v in GIT_ENV.items():
+        os.environ.setdefault(k, v)
+
+
+def git(cwd: Path, *args: str) -> str:
+    return subprocess.check_output(["git", "-C", str(cwd), *args], text=True, stderr=subprocess.STDOUT).strip()
+
+
+# -----------------------------
+# Synthetische Repositories
+# -----------------------------
+def _rel_for(i: int, depth: int, fanout: int) -> Path:
+    """Verteilt Datei i deterministisch auf einen Baum mit `depth` Ebenen und `fanout` Ordnern je Ebene."""
+    parts = []
+    n = i
+    for level in range(depth):
+        parts.append(f"d{level}_{n % fanout}")
+        n //= fanout
+    return Path(*parts) / f"f{i}.py"
+
+
+def build_repo(base: Path, files: int, depth: int = 4, fanout: int = 8, binary_mb: int = 0) -> Dict[str, Any]:
+    """
+    Legt unter base/work ein Repo mit `files` kleinen Quelldateien an und
+    unter base/remote.git einen Bare-Remote (Stellvertreter für GitHub).
+    """
+    setup_git_env()
+    work = base / "work"
+    remote = base / "remote.git"
+    work.mkdir(parents=True, exist_ok=True)
+
+    rels = []
+    for i in range(files):
+        rel = _rel_for(i, depth, fanout)
+        p = work / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(f"# file {i}\nVALUE = {i}\n", encoding="utf-8")
+        rels.append(rel)
+
+    if binary_mb:
+        blob = work / "assets" / "blob.json"
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        with open(blob, "wb") as fh:
+            chunk = os.urandom(1024 * 1024)
+            for _ in range(binary_mb):
+                fh.write(chunk)
+
+    git(base, "init", "-q", "-b", "main", str(work))
+    git(base, "init", "-q", "--bare", str(remote))
+    git(work, "add", "-A")
+    git(work, "commit", "-q", "-m", "initial")
+    git(work, "remote", "add", "origin", str(remote))
+    git(work, "push", "-q", "origin", "main")
+    return {"work": work, "remote": remote, "rels": rels}
+
+
+def bench_cfg(work: Path, remote: Path, **overrides) -> Dict[str, Any]:
+    """DEFAULT_CONFIG mit kurzen Fenstern – damit Batches im Benchmark sofort laufen."""
+    from models.config import DEFAULT_CONFIG
+
+    cfg = DEFAULT_CONFIG.copy()
+    cfg.update({
+        "project_path": str(work),
+        "remote_url": str(remote),
+        "branch": "main",
+        "batch_window_sec": 0.2,
+        "debounce_ms": 0,
+        "max_backups": 3,
+    })
+    cfg.update(overrides)
+    return cfg
+
+
+# -----------------------------
+# Messhilfen
+# -----------------------------
+class GitProcessCounter:
+    """Zählt gestartete git-Prozesse (GitPython und direkte subprocess-Aufrufe)."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._orig = None
+
+    def __enter__(self) -> "GitProcessCounter":
+        self._orig = orig = subprocess.Popen.__init__
+        counter = self
+
+        def __init__(popen_self, args, *a, **kw):
+            argv0 = args if isinstance(args, str) else (args[0] if args else "")
+            if os.path.basename(str(argv0)).startswith("git"):
+                with counter._lock:
+                    counter.count += 1
+            orig(popen_self, args, *a, **kw)
+
+        subprocess.Popen.__init__ = __init__  # type: ignore[method-assign]
+        return self
+
+    def __exit__(self, *exc) -> None:
+        subprocess.Popen.__init__ = self._orig  # type: ignore[method-assign]
+
+
+def peak_rss_mb() -> float:
+    """Peak-RSS dieses Prozesses (Linux: KiB, macOS: Bytes)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def wait_until(pred, timeout: float, interval: float = 0.01) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if pred():
+            return True
+        time.sleep(interval)
+    return pred()
+
+
+def percentile(values, q: float) -> Optional[float]:
+    if not values:
+        return None
+    vals = sorted(values)
+    k = min(len(vals) - 1, max(0, int(round(q * (len(vals) - 1)))))
+    return vals[k]
+
+
+# -----------------------------
+# Ergebnisse (JSON Lines)
+# -----------------------------
+def _tool_rev() -> str:
+    try:
+        return git(REPO_ROOT, "rev-parse", "--short", "HEAD")
+    except Exception:
+        return "unknown"
+
+
+def result_record(bench: str, scenario: str, params: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "bench": bench,
+        "scenario": scenario,
+        "rev": _tool_rev(),
+        "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": f"{sys.platform}-{platform.machine()}",
+        "params": params,
+        "metrics": metrics,
+    }
+
+
+def emit(record: Dict[str, Any], out: Optional[str]) -> None:
+    line = json.dumps(record, sort_keys=True)
+    print(line, flush=True)
+    if out:
+        with open(out, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
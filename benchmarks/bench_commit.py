@@ -0,0 +1,135 @@
+"""
+Benchmark: Commit-Schritt eines Batches auf großen Repos.
+
+Vergleicht je Runde (abwechselnd, gleiches Repo):
+  - legacy:   has_changes() (git status --porcelain, scannt die Arbeitskopie)
+              + repo.index.commit() (GitPython liest die Index-Datei in Python)
+  - plumbing: has_staged_changes() (diff-index --cached --quiet)
+              + commit_index() (write-tree, commit-tree, update-ref)
+jeweils mit gestagten Änderungen ("commit") und ohne ("noop", nur die Prüfung).
+
+Aufruf (aus dem Repo-Root):
+    python -m benchmarks.bench_commit --files 100000 --rounds 20 --out bench.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from statistics import mean
+from typing import Callable, Dict, List
+
+from benchmarks._support import (
+    GitProcessCounter,
+    build_repo,
+    emit,
+    peak_rss_mb,
+    percentile,
+    result_record,
+)
+
+BENCH = "commit"
+
+
+def _legacy(repo, message: str) -> bool:
+    from services.git_service import has_changes
+
+    if has_changes(repo):
+        repo.index.commit(message)
+        return True
+    return False
+
+
+def _plumbing(repo, message: str) -> bool:
+    from services.git_service import commit_index, has_staged_changes
+
+    if has_staged_changes(repo):
+        commit_index(repo, message)
+        return True
+    return False
+
+
+METHODS: Dict[str, Callable] = {"legacy": _legacy, "plumbing": _plumbing}
+
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    return {
+        "mean_ms": round(mean(samples) * 1000, 2),
+        "p50_ms": round((percentile(samples, 0.5) or 0) * 1000, 2),
+        "p95_ms": round((percentile(samples, 0.95) or 0) * 1000, 2),
+    }
+
+
+def run(args) -> Dict[str, Dict]:
+    from git import Repo
+    from services.git_service import stage_paths
+
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="gas-bench-") as tmp:
+        t0 = time.perf_counter()
+        built = build_repo(Path(tmp), args.files, args.depth, args.fanout)
+        setup_sec = time.perf_counter() - t0
+        work, rels = built["work"], built["rels"]
+        repo = Repo(work)
+
+        samples = {(m, c): [] for m in METHODS for c in ("commit", "noop")}
+        procs = {(m, c): 0 for m in METHODS for c in ("commit", "noop")}
+        cursor = 0
+        for r in range(args.rounds):
+            for name, fn in METHODS.items():
+                # gleiche Ausgangslage: ein paar Dateien geändert und gestaged
+                batch = [work / rels[(cursor + i) % len(rels)] for i in range(args.changes)]
+                cursor += args.changes
+                for p in batch:
+                    p.write_text(f"# round {r} {name}\n", encoding="utf-8")
+                stage_paths(repo, work, batch, [])
+
+                with GitProcessCounter() as counter:
+                    c0 = time.perf_counter()
+                    committed = fn(repo, f"bench {name} {r}")
+                    samples[(name, "commit")].append(time.perf_counter() - c0)
+                procs[(name, "commit")] += counter.count
+                if not committed:
+                    raise RuntimeError(f"{name}: nichts committet")
+
+                # nichts gestaged: nur die Prüfung
+                with GitProcessCounter() as counter:
+                    c0 = time.perf_counter()
+                    fn(repo, "noop")
+                    samples[(name, "noop")].append(time.perf_counter() - c0)
+                procs[(name, "noop")] += counter.count
+
+        for (name, case), vals in samples.items():
+            results[f"{name}_{case}"] = {
+                "setup_sec": round(setup_sec, 2),
+                **_stats(vals),
+                "git_procs_per_call": round(procs[(name, case)] / max(1, len(vals)), 2),
+            }
+        repo.close()
+    for rec in results.values():
+        rec["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return results
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark für den Commit-Schritt (legacy vs. Plumbing)")
+    ap.add_argument("--files", type=int, default=100_000, help="Dateien im synthetischen Repo")
+    ap.add_argument("--depth", type=int, default=4, help="Ordnertiefe")
+    ap.add_argument("--fanout", type=int, default=8, help="Ordner pro Ebene")
+    ap.add_argument("--rounds", type=int, default=20, help="Runden je Verfahren")
+    ap.add_argument("--changes", type=int, default=5, help="geänderte Dateien je Batch")
+    ap.add_argument("--out", default=None, help="JSON-Lines-Datei zum Anhängen der Ergebnisse")
+    args = ap.parse_args(argv)
+
+    params = {k: getattr(args, k) for k in ("files", "depth", "fanout", "rounds", "changes")}
+    for scenario, metrics in run(args).items():
+        emit(result_record(BENCH, scenario, params, metrics), args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
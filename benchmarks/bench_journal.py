@@ -0,0 +1,126 @@
+"""
+Benchmark: Kosten des Event-Journals im Event-Pfad.
+
+Zwei WatchHandler auf demselben Repo, einer ohne und einer mit Journal; die Events
+werden abwechselnd an beide verteilt (gleicher Dateizustand, gleiche Digests).
+Das Batch-Fenster ist so lang, dass während der Messung kein Batch läuft.
+Gemessen werden:
+  - Dispatch-Latenz je Event (mean/p50/p99) – ohne vs. mit Journal
+  - fsyncs und Journal-Größe nach allen Events
+  - compact() auf den Netto-Zustand und replay() beim Start
+
+Aufruf (aus dem Repo-Root):
+    python -m benchmarks.bench_journal --files 10000 --events 20000 --out bench.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from statistics import mean
+from typing import Dict, List
+
+from watchdog.events import FileModifiedEvent
+
+from benchmarks._support import (
+    bench_cfg,
+    build_repo,
+    emit,
+    peak_rss_mb,
+    percentile,
+    result_record,
+)
+
+BENCH = "journal"
+
+
+def _stats_us(samples: List[float]) -> Dict[str, float]:
+    return {
+        "mean_us": round(mean(samples) * 1e6, 2),
+        "p50_us": round((percentile(samples, 0.5) or 0) * 1e6, 2),
+        "p99_us": round((percentile(samples, 0.99) or 0) * 1e6, 2),
+    }
+
+
+def run(args) -> Dict[str, Dict]:
+    from services.event_journal import EventJournal, JournaledCoalescer
+    from services.watch_service import InMemoryLog, WatchHandler
+
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="gas-bench-") as tmp:
+        t0 = time.perf_counter()
+        built = build_repo(Path(tmp), args.files, args.depth, args.fanout)
+        setup_sec = time.perf_counter() - t0
+        work, remote, rels = built["work"], built["remote"], built["rels"]
+
+        # kein Batch während der Messung; Abgleich/Push spielen hier keine Rolle
+        cfg = bench_cfg(work, remote, batch_window_sec=3600, auto_push=False, reconcile_enabled=False)
+        journal = EventJournal(Path(tmp) / "journal.jsonl", fsync_interval=args.fsync_ms / 1000.0)
+        journal.open()
+        handlers = {
+            "off": WatchHandler(root=work, cfg=cfg, log=InMemoryLog()),
+            "on": WatchHandler(root=work, cfg=cfg, log=InMemoryLog(), journal=journal),
+        }
+        samples: Dict[str, List[float]] = {k: [] for k in handlers}
+
+        for i in range(args.events):
+            p = work / rels[i % len(rels)]
+            p.write_text(f"# edit {i}\n", encoding="utf-8")
+            event = FileModifiedEvent(str(p))
+            order = ("off", "on") if i % 2 == 0 else ("on", "off")
+            for name in order:
+                c0 = time.perf_counter()
+                handlers[name].dispatch(event)
+                samples[name].append(time.perf_counter() - c0)
+        journal.flush()
+        journal_kb = journal.size() / 1024
+
+        h = handlers["on"]
+        pending = h._events.pending()
+        c0 = time.perf_counter()
+        h._compact_journal()
+        compact_ms = (time.perf_counter() - c0) * 1000
+        compact_kb = journal.size() / 1024
+
+        c0 = time.perf_counter()
+        records = journal.replay()
+        JournaledCoalescer(EventJournal(Path(tmp) / "replay.jsonl"), h.root).replay(records)
+        replay_ms = (time.perf_counter() - c0) * 1000
+        journal.close()
+
+        for name, vals in samples.items():
+            results[f"dispatch_{name}"] = {"setup_sec": round(setup_sec, 2), "events": len(vals), **_stats_us(vals)}
+        results["dispatch_on"].update({
+            "overhead_us": round(results["dispatch_on"]["mean_us"] - results["dispatch_off"]["mean_us"], 2),
+            "fsyncs": journal.fsyncs,
+            "journal_kb": round(journal_kb, 1),
+        })
+        results["compact"] = {"pending": pending, "compact_ms": round(compact_ms, 2), "journal_kb": round(compact_kb, 1)}
+        results["replay"] = {"records": len(records), "replay_ms": round(replay_ms, 2)}
+        for handler in handlers.values():
+            handler.repo.close()
+    for rec in results.values():
+        rec["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return results
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark für das Event-Journal (Latenz je Event, Compaction, Replay)")
+    ap.add_argument("--files", type=int, default=10_000, help="Dateien im synthetischen Repo")
+    ap.add_argument("--depth", type=int, default=4, help="Ordnertiefe")
+    ap.add_argument("--fanout", type=int, default=8, help="Ordner pro Ebene")
+    ap.add_argument("--events", type=int, default=20_000, help="Änderungs-Events je Variante")
+    ap.add_argument("--fsync-ms", type=int, default=200, help="fsync-Intervall des Journals")
+    ap.add_argument("--out", default=None, help="JSON-Lines-Datei zum Anhängen der Ergebnisse")
+    args = ap.parse_args(argv)
+
+    params = {k: getattr(args, k) for k in ("files", "depth", "fanout", "events", "fsync_ms")}
+    for scenario, metrics in run(args).items():
+        emit(result_record(BENCH, scenario, params, metrics), args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
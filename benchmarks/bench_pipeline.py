@@ -0,0 +1,265 @@
+"""
+Benchmark: Watcher -> Batch -> Commit -> Push.
+
+Baut pro Szenario ein synthetisches Repo (plus Bare-Remote) in einem Temp-Ordner,
+treibt WatchHandler mit simulierten watchdog-Events und misst:
+  - events/s beim Dispatch (Filter, Debounce, Digest, Logging)
+  - Latenz vom letzten Speichern bis zum abgeschlossenen Batch (inkl. Batch-Fenster)
+  - Peak-RSS (jedes Szenario läuft in einem eigenen Prozess)
+  - Anzahl gestarteter git-Prozesse
+
+Aufruf (aus dem Repo-Root):
+    python -m benchmarks.bench_pipeline --files 10000 --out bench.jsonl
+    python -m benchmarks.bench_pipeline --files 500000 --depth 6 --scenarios checkout
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from watchdog.events import (
+    DirCreatedEvent,
+    DirMovedEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+)
+
+from benchmarks._support import (
+    GitProcessCounter,
+    bench_cfg,
+    build_repo,
+    emit,
+    git,
+    peak_rss_mb,
+    percentile,
+    result_record,
+    wait_until,
+)
+
+BENCH = "pipeline"
+
+
+# -----------------------------
+# Szenarien: echte Dateioperationen + passende watchdog-Events
+# -----------------------------
+class _Driver:
+    def __init__(self, handler):
+        self.handler = handler
+        self.events = 0
+        self.dispatch_sec = 0.0
+        self.per_event: List[float] = []
+
+    def fire(self, event) -> None:
+        t0 = time.perf_counter()
+        self.handler.dispatch(event)
+        dt = time.perf_counter() - t0
+        self.dispatch_sec += dt
+        self.per_event.append(dt)
+        self.events += 1
+
+
+def scenario_atomic_save(d: _Driver, work: Path, rels: List[Path], args) -> None:
+    """Editor-Speichern über Temp-Datei + Rename (JetBrains-Muster: tmp, old, rename, delete)."""
+    for i, rel in enumerate(rels[: args.edits]):
+        target = work / rel
+        tmp = target.with_name(target.name + "___jb_tmp___")
+        old = target.with_name(target.name + "___jb_old___")
+        tmp.write_text(f"# file edited\nVALUE = {i}\n", encoding="utf-8")
+        d.fire(FileCreatedEvent(str(tmp)))
+        d.fire(FileModifiedEvent(str(tmp)))
+        os.replace(target, old)
+        d.fire(FileMovedEvent(str(target), str(old)))
+        os.replace(tmp, target)
+        d.fire(FileMovedEvent(str(tmp), str(target)))
+        old.unlink()
+        d.fire(FileDeletedEvent(str(old)))
+
+
+def scenario_checkout(d: _Driver, work: Path, rels: List[Path], args) -> None:
+    """Branch-Wechsel: viele Dateien geändert, einige gelöscht, einige neu."""
+    n = max(1, int(len(rels) * args.churn))
+    changed = rels[:n]
+    deleted = rels[n: n + n // 10]
+    for rel in changed:
+        p = work / rel
+        p.write_text(f"# checkout\nVALUE = '{rel.name}'\n", encoding="utf-8")
+        d.fire(FileModifiedEvent(str(p)))
+    for rel in deleted:
+        p = work / rel
+        p.unlink()
+        d.fire(FileDeletedEvent(str(p)))
+    for i in range(len(deleted)):
+        p = work / "checkout_new" / f"n{i}.py"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(f"NEW = {i}\n", encoding="utf-8")
+        d.fire(FileCreatedEvent(str(p)))
+
+
+def scenario_dir_rename(d: _Driver, work: Path, rels: List[Path], args) -> None:
+    """Refactoring: ein Top-Level-Ordner wird umbenannt (inotify liefert Ordner- + Einzel-Events)."""
+    src_dir = work / rels[0].parts[0]
+    dst_dir = work / f"{src_dir.name}_renamed"
+    children = [p for p in src_dir.rglob("*")]
+    os.rename(src_dir, dst_dir)
+    d.fire(DirMovedEvent(str(src_dir), str(dst_dir)))
+    for p in children:
+        rel = p.relative_to(src_dir)
+        cls = DirMovedEvent if (dst_dir / rel).is_dir() else FileMovedEvent
+        d.fire(cls(str(p), str(dst_dir / rel)))
+
+
+def scenario_npm_install(d: _Driver, work: Path, rels: List[Path], args) -> None:
+    """Event-Sturm in einen ausgeschlossenen Ordner (node_modules) – sollte billig verworfen werden."""
+    nm = work / "node_modules"
+    for i in range(args.storm):
+        pkg = nm / f"pkg{i // 20}"
+        if i % 20 == 0:
+            d.fire(DirCreatedEvent(str(pkg)))
+        d.fire(FileCreatedEvent(str(pkg / f"file{i}.js")))
+
+
+def scenario_big_binary(d: _Driver, work: Path, rels: List[Path], args) -> None:
+    """Versehentlich gespeicherter großer Export mit beobachteter Endung."""
+    p = work / "exports" / "dump.sql"
+    p.parent.mkdir(parents=True, exist_ok=True)
+    chunk = os.urandom(1024 * 1024)
+    with open(p, "wb") as fh:
+        for _ in range(args.binary_mb):
+            fh.write(chunk)
+    d.fire(FileCreatedEvent(str(p)))
+    d.fire(FileModifiedEvent(str(p)))
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "atomic_save": scenario_atomic_save,
+    "checkout": scenario_checkout,
+    "dir_rename": scenario_dir_rename,
+    "npm_install": scenario_npm_install,
+    "big_binary": scenario_big_binary,
+}
+
+
+# -----------------------------
+# Ausführung
+# -----------------------------
+def _batch_pending(handler) -> bool:
+    timer = handler._timer
+    return timer is not None and timer.is_alive()
+
+
+def _params(args) -> Dict:
+    return {
+        "files": args.files,
+        "depth": args.depth,
+        "fanout": args.fanout,
+        "edits": args.edits,
+        "churn": args.churn,
+        "storm": args.storm,
+        "binary_mb": args.binary_mb,
+        "push": not args.no_push,
+    }
+
+
+def run_one(name: str, args) -> Dict:
+    from services.watch_service import InMemoryLog, WatchHandler
+
+    with tempfile.TemporaryDirectory(prefix="gas-bench-") as tmp:
+        t0 = time.perf_counter()
+        built = build_repo(Path(tmp), args.files, args.depth, args.fanout)
+        setup_sec = time.perf_counter() - t0
+        work, remote, rels = built["work"], built["remote"], built["rels"]
+        base_rev = git(work, "rev-parse", "HEAD")
+
+        cfg = bench_cfg(work, remote, auto_push=not args.no_push)
+        log = InMemoryLog(maxlen=10_000_000)
+
+        with GitProcessCounter() as counter:
+            handler = WatchHandler(root=work, cfg=cfg, log=log)
+            batches: List[Tuple[float, float]] = []
+            orig_batch = handler._do_batch
+
+            def timed_batch():
+                b0 = time.perf_counter()
+                orig_batch()
+                batches.append((b0, time.perf_counter()))
+
+            handler._do_batch = timed_batch  # type: ignore[method-assign]
+            init_procs = counter.count
+
+            driver = _Driver(handler)
+            SCENARIOS[name](driver, work, rels, args)
+            last_save = time.perf_counter()
+
+            # fertig, sobald kein Batch mehr geplant ist oder läuft (Szenarien ohne Batch inklusive)
+            time.sleep(float(cfg["batch_window_sec"]) * 2)
+            finished = wait_until(lambda: not _batch_pending(handler), args.timeout)
+            batch_procs = counter.count - init_procs
+
+        commits = int(git(work, "rev-list", "--count", f"{base_rev}..HEAD") or 0)
+        staged_files = len(git(work, "diff", "--name-only", base_rev, "HEAD").splitlines()) if commits else 0
+
+        pipeline = [b1 - b0 for b0, b1 in batches]
+        return {
+            "setup_sec": round(setup_sec, 3),
+            "events": driver.events,
+            "dispatch_sec": round(driver.dispatch_sec, 4),
+            "events_per_s": round(driver.events / driver.dispatch_sec, 1) if driver.dispatch_sec else None,
+            "dispatch_p99_ms": round((percentile(driver.per_event, 0.99) or 0) * 1000, 3),
+            "batches": len(batches),
+            "idle": finished,
+            "save_to_commit_sec": round(batches[-1][1] - last_save, 4) if batches else None,
+            "batch_window_sec": float(cfg["batch_window_sec"]),
+            "pipeline_sec": round(sum(pipeline), 4),
+            "commits": commits,
+            "files_in_commits": staged_files,
+            "log_lines": len(log.dump()),
+            "git_procs_init": init_procs,
+            "git_procs_batches": batch_procs,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark für die Watcher->Commit-Pipeline")
+    ap.add_argument("--files", type=int, default=10_000, help="Dateien im synthetischen Repo (10k–500k)")
+    ap.add_argument("--depth", type=int, default=4, help="Ordnertiefe")
+    ap.add_argument("--fanout", type=int, default=8, help="Ordner pro Ebene")
+    ap.add_argument("--edits", type=int, default=200, help="atomic_save: Anzahl gespeicherter Dateien")
+    ap.add_argument("--churn", type=float, default=0.05, help="checkout: Anteil geänderter Dateien")
+    ap.add_argument("--storm", type=int, default=20_000, help="npm_install: Events in node_modules")
+    ap.add_argument("--binary-mb", type=int, default=256, help="big_binary: Größe in MB")
+    ap.add_argument("--no-push", action="store_true", help="nur committen, nicht zum Bare-Remote pushen")
+    ap.add_argument("--timeout", type=float, default=600.0)
+    ap.add_argument("--scenarios", default="all", help=f"Komma-Liste aus {','.join(SCENARIOS)} oder 'all'")
+    ap.add_argument("--out", default=None, help="JSON-Lines-Datei zum Anhängen der Ergebnisse")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        emit(result_record(BENCH, args.child, _params(args), run_one(args.child, args)), args.out)
+        return 0
+
+    names = list(SCENARIOS) if args.scenarios == "all" else [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        ap.error(f"unbekannte Szenarien: {', '.join(unknown)}")
+
+    # Jedes Szenario in eigenem Prozess -> sauberer Peak-RSS
+    rc = 0
+    base = [a for a in (argv if argv is not None else sys.argv[1:])]
+    for name in names:
+        cmd = [sys.executable, "-m", "benchmarks.bench_pipeline", *base, "--child", name]
+        rc |= subprocess.call(cmd)
+    return rc
+
+
+if __name__ == "__main__":
+    sys.exit(main())
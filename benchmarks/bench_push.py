@@ -0,0 +1,122 @@
+"""
+Benchmark: Push-Schritt gegen ein lokales Bare-Repo als Remote.
+
+Vergleicht je Runde (abwechselnd, gleiches Repo):
+  - legacy:   origin.push(branch) über GitPython – nach jedem Batch, auch ohne neuen Commit
+  - skipping: push_branches() – Leer-Push ohne Netzwerk, sonst ein Thin-Pack-Push
+Fälle: "noop" (nichts Neues committet) und "change" (ein Commit mit --changes Dateien).
+Für "skipping" werden zusätzlich die gesendeten Bytes aus der Fortschrittsausgabe erfasst.
+
+Aufruf (aus dem Repo-Root):
+    python -m benchmarks.bench_push --files 10000 --rounds 20 --out bench.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from statistics import mean
+from typing import Callable, Dict, List
+
+from benchmarks._support import (
+    GitProcessCounter,
+    build_repo,
+    emit,
+    peak_rss_mb,
+    percentile,
+    result_record,
+)
+
+BENCH = "push"
+
+
+def _legacy(repo, branch: str):
+    repo.remotes.origin.push(branch)
+    return None
+
+
+def _skipping(repo, branch: str):
+    from services.git_service import push_branches
+
+    return push_branches(repo, [branch])
+
+
+METHODS: Dict[str, Callable] = {"legacy": _legacy, "skipping": _skipping}
+
+
+def _commit_change(repo, work: Path, rels: List[Path], start: int, n: int, tag: str) -> None:
+    from services.git_service import commit_index, stage_paths
+
+    batch = [work / rels[(start + i) % len(rels)] for i in range(n)]
+    for p in batch:
+        p.write_text(f"# {tag}\n", encoding="utf-8")
+    stage_paths(repo, work, batch, [])
+    commit_index(repo, f"bench {tag}")
+
+
+def run(args) -> Dict[str, Dict]:
+    from git import Repo
+
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="gas-bench-") as tmp:
+        t0 = time.perf_counter()
+        built = build_repo(Path(tmp), args.files, args.depth, args.fanout)
+        setup_sec = time.perf_counter() - t0
+        work, rels = built["work"], built["rels"]
+        repo = Repo(work)
+
+        cases = [(m, c) for m in METHODS for c in ("noop", "change")]
+        samples: Dict[tuple, List[float]] = {k: [] for k in cases}
+        procs = {k: 0 for k in cases}
+        sent: Dict[tuple, List[int]] = {k: [] for k in cases}
+        cursor = 0
+        for r in range(args.rounds):
+            for name, fn in METHODS.items():
+                _commit_change(repo, work, rels, cursor, args.changes, f"{name}-{r}")
+                cursor += args.changes
+                for case in ("change", "noop"):
+                    with GitProcessCounter() as counter:
+                        c0 = time.perf_counter()
+                        rec = fn(repo, "main")
+                        samples[(name, case)].append(time.perf_counter() - c0)
+                    procs[(name, case)] += counter.count
+                    if rec is not None:
+                        sent[(name, case)].append(rec["bytes"])
+
+        for (name, case), vals in samples.items():
+            metrics = {
+                "setup_sec": round(setup_sec, 2),
+                "mean_ms": round(mean(vals) * 1000, 2),
+                "p50_ms": round((percentile(vals, 0.5) or 0) * 1000, 2),
+                "p95_ms": round((percentile(vals, 0.95) or 0) * 1000, 2),
+                "git_procs_per_push": round(procs[(name, case)] / max(1, len(vals)), 2),
+            }
+            if sent[(name, case)]:
+                metrics["bytes_mean"] = round(mean(sent[(name, case)]), 1)
+            results[f"{name}_{case}"] = metrics
+        repo.close()
+    for rec in results.values():
+        rec["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return results
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark für den Push-Schritt (legacy vs. Leer-Push überspringen)")
+    ap.add_argument("--files", type=int, default=10_000, help="Dateien im synthetischen Repo")
+    ap.add_argument("--depth", type=int, default=4, help="Ordnertiefe")
+    ap.add_argument("--fanout", type=int, default=8, help="Ordner pro Ebene")
+    ap.add_argument("--rounds", type=int, default=20, help="Runden je Verfahren")
+    ap.add_argument("--changes", type=int, default=5, help="geänderte Dateien je Commit")
+    ap.add_argument("--out", default=None, help="JSON-Lines-Datei zum Anhängen der Ergebnisse")
+    args = ap.parse_args(argv)
+
+    params = {k: getattr(args, k) for k in ("files", "depth", "fanout", "rounds", "changes")}
+    for scenario, metrics in run(args).items():
+        emit(result_record(BENCH, scenario, params, metrics), args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Benchmark: Startzeit und Speicher – Flask-Oberfläche vs. Headless-Daemon.
+
+Beide Varianten laufen als eigener Prozess mit eigenem HOME (Config, Zustand, Logs
+im Temp-Ordner) auf demselben synthetischen Repo:
+  - flask:  `import app`, Watcher starten, WSGI-Server auf einem freien Port, erste Seite abrufen
+  - daemon: `python -m services.daemon --socket …`, bis "status" running=true meldet
+Gemessen werden je Lauf:
+  - ready_ms    Prozessstart bis Watcher läuft (und der Server antwortet)
+  - rss_mb      VmRSS danach, hwm_mb = VmHWM (Spitze), threads (Linux /proc)
+
+Aufruf (aus dem Repo-Root):
+    python -m benchmarks.bench_startup --files 5000 --runs 5 --out bench.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from statistics import mean
+from typing import Dict, List
+
+from benchmarks._support import (
+    REPO_ROOT,
+    bench_cfg,
+    build_repo,
+    emit,
+    percentile,
+    result_record,
+    wait_until,
+)
+
+BENCH = "startup"
+MODES = ("flask", "daemon")
+
+# Kind-Prozess für die Flask-Variante: wie `python app.py`, nur mit freiem Port und ohne Browser
+FLASK_CHILD = """
+import sys, threading, urllib.request
+from werkzeug.serving import make_server
+import app
+app.watch.start()
+srv = make_server("127.0.0.1", 0, app.app, threaded=True)
+threading.Thread(target=srv.serve_forever, daemon=True).start()
+urllib.request.urlopen(f"http://127.0.0.1:{srv.server_port}/", timeout=30).read()
+print("ready", flush=True)
+sys.stdin.read()
+app.watch.stop()
+srv.shutdown()
+"""
+
+
+def _proc_status(pid: int) -> Dict[str, float]:
+    """VmRSS/VmHWM (MB) und Threads eines Kind-Prozesses; leer außerhalb von Linux."""
+    out: Dict[str, float] = {}
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as fh:
+            for line in fh:
+                key, _, val = line.partition(":")
+                if key == "VmRSS":
+                    out["rss_mb"] = round(int(val.split()[0]) / 1024, 1)
+                elif key == "VmHWM":
+                    out["hwm_mb"] = round(int(val.split()[0]) / 1024, 1)
+                elif key == "Threads":
+                    out["threads"] = int(val)
+    except OSError:
+        pass
+    return out
+
+
+def _run_flask(env: Dict[str, str], timeout: float) -> Dict[str, float]:
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", FLASK_CHILD], cwd=REPO_ROOT, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    try:
+        line = proc.stdout.readline()
+        ready = time.perf_counter() - t0
+        if line.strip() != "ready":
+            raise RuntimeError(f"Flask-Kind nicht bereit (rc={proc.poll()})")
+        time.sleep(0.5)  # Hintergrund-Threads (Abgleich, Log-Sink) anlaufen lassen
+        metrics = {"ready_ms": ready * 1000, **_proc_status(proc.pid)}
+        proc.stdin.close()
+        proc.wait(timeout)
+        return metrics
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+
+def _run_daemon(env: Dict[str, str], sock: Path, timeout: float) -> Dict[str, float]:
+    from services.daemon import send_command
+
+    def running() -> bool:
+        try:
+            return bool(send_command(sock, "status", timeout=5).get("running"))
+        except OSError:
+            return False
+
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "services.daemon", "--quiet", "--socket", str(sock)],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_until(running, timeout, interval=0.005):
+            raise RuntimeError(f"Daemon nicht bereit (rc={proc.poll()})")
+        ready = time.perf_counter() - t0
+        time.sleep(0.5)
+        metrics = {"ready_ms": ready * 1000, **_proc_status(proc.pid)}
+        send_command(sock, "stop")
+        proc.wait(timeout)
+        return metrics
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+
+def _summary(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    ready = [s["ready_ms"] for s in samples]
+    out = {
+        "ready_ms_mean": round(mean(ready), 1),
+        "ready_ms_p50": round(percentile(ready, 0.5) or 0, 1),
+        "ready_ms_max": round(max(ready), 1),
+    }
+    for key in ("rss_mb", "hwm_mb", "threads"):
+        vals = [s[key] for s in samples if key in s]
+        if vals:
+            out[f"{key}_mean"] = round(mean(vals), 1)
+    return out
+
+
+def run(args) -> Dict[str, Dict]:
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory(prefix="gas-bench-") as tmp:
+        built = build_repo(Path(tmp), args.files, args.depth, args.fanout)
+        home = Path(tmp) / "home"
+        cfg_dir = home / ".github_auto_sync"
+        cfg_dir.mkdir(parents=True)
+        cfg = bench_cfg(built["work"], built["remote"], auto_push=False)
+        (cfg_dir / "config.json").write_text(json.dumps(cfg), encoding="utf-8")
+        env = {**os.environ, "HOME": str(home), "PYTHONDONTWRITEBYTECODE": "1"}
+
+        for mode in args.modes:
+            samples = []
+            for _ in range(args.runs):
+                if mode == "flask":
+                    samples.append(_run_flask(env, args.timeout))
+                else:
+                    samples.append(_run_daemon(env, Path(tmp) / "ctl.sock", args.timeout))
+            results[mode] = {"runs": args.runs, **_summary(samples)}
+    return results
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark für Startzeit und RSS (Flask-Oberfläche vs. Headless-Daemon)")
+    ap.add_argument("--files", type=int, default=5000, help="Dateien im synthetischen Repo")
+    ap.add_argument("--depth", type=int, default=4, help="Ordnertiefe")
+    ap.add_argument("--fanout", type=int, default=8, help="Ordner pro Ebene")
+    ap.add_argument("--runs", type=int, default=5, help="Starts je Variante")
+    ap.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="zu messende Varianten")
+    ap.add_argument("--timeout", type=float, default=60.0, help="max. Sekunden bis bereit / bis beendet")
+    ap.add_argument("--out", default=None, help="JSON-Lines-Datei zum Anhängen der Ergebnisse")
+    args = ap.parse_args(argv)
+
+    params = {"files": args.files, "depth": args.depth, "fanout": args.fanout, "runs": args.runs}
+    for mode, metrics in run(args).items():
+        emit(result_record(BENCH, mode, params, metrics), args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
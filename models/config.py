@@ -1,7 +1,12 @@
 from __future__ import annotations
 import json
+import re
+import threading
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple, get_type_hints
+
+from utils.fs import atomic_write_text
 
 DEFAULT_CONFIG: Dict[str, Any] = {
     "project_name": "Mein Projekt",
@@ -15,28 +20,254 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "max_backups": 10,
     "include_exts": ["Dockerfile", ".py", ".json", ".md", ".yml", ".yaml", ".ini", ".toml", ".sql", ".js", ".ts", ".html", ".css"],
     "exclude_dirs": ["style_check", ".git", ".idea", ".vscode", "__pycache__", ".venv", "venv", "node_modules", "dist", "build", ".auto_versions"],
-    "wip_branch": "",
+    "wip_branch": "",  # gesetzt = WIP-Modus: Batches committen dorthin, "Squash" übernimmt nach `branch`
+    "wip_push_interval_sec": 300,  # WIP-Branch höchstens so oft pushen (0 = nach jedem Batch)
     "mirror_on_start": False,  # Beim Start lokalen Stand als Snapshot committen & pushen
     "flash_duration_sec": 10,  # Dauer für Flash-Messages in Sekunden
+    "watch_budget": 0,  # max. inotify-Watches (0 = 90 % von max_user_watches), darüber Polling
+    "poll_interval_sec": 2.0,  # Intervall im Polling-Fallback
+    "force_polling": False,  # immer Polling statt inotify/FSEvents (z. B. Netzlaufwerke)
+    "reconcile_enabled": True,  # Hintergrund-Abgleich gegen den Stat-/Digest-Index (verpasste Events)
+    "reconcile_batch_size": 2000,  # Einträge je Tick
+    "reconcile_interval_sec": 2.0,  # Mindestpause zwischen Ticks
+    "reconcile_max_duty": 0.1,  # max. Anteil Rechenzeit (CPU-Budget)
+    "reconcile_max_mb_per_tick": 64,  # max. gehashte MB je Tick (I/O-Budget)
+    "reconcile_pass_pause_sec": 300,  # Pause nach einem vollständigen Durchlauf
+    "large_file_threshold_mb": 50,  # darüber: Stichproben-Hash, kein Backup, Policy unten (0 = aus)
+    "large_file_policy": "skip",  # "skip" = nur Warnung, "store" = Pointer im Repo + lokaler Objektspeicher
+    "profile_enabled": False,  # cProfile für Batch/Events/Mirror ab Start (sonst /api/profile/start)
+    "exclude_file_patterns": [],  # Regex auf Dateinamen: Treffer werden ignoriert
+    "include_file_patterns": [],  # Regex auf Dateinamen: wenn gesetzt, muss einer passen
+    "journal_enabled": True,  # offene Events im Zustandsordner protokollieren, beim Start nachholen
+    "journal_fsync_ms": 200,  # Journal-Puffer höchstens so lange ungesichert (fsync-Intervall)
+    "journal_max_kb": 4096,  # darüber wird das Journal auf den Netto-Zustand kompaktiert
+    "log_file_enabled": True,  # Log zusätzlich als JSON Lines nach ~/.github_auto_sync/logs
+    "log_max_mb": 5,  # Größe je Log-Datei, danach rotiert und gzip-komprimiert
+    "log_keep_files": 20,  # so viele komprimierte Log-Dateien aufheben
 }
 
+# -----------------------------
+# Typisierter, unveränderlicher Snapshot
+# -----------------------------
+class ConfigSnapshot(NamedTuple):
+    """
+    Geprüfte, typisierte Sicht auf die Config – der Watcher bekommt nur Snapshots,
+    nie das veränderliche dict. Listen sind Tupel, Zahlen schon konvertiert.
+    """
+    project_name: str
+    project_path: str
+    branch: str
+    remote_url: str
+    auto_commit: bool
+    auto_push: bool
+    batch_window_sec: float
+    debounce_ms: int
+    max_backups: int
+    include_exts: Tuple[str, ...]
+    exclude_dirs: Tuple[str, ...]
+    wip_branch: str
+    wip_push_interval_sec: float
+    mirror_on_start: bool
+    flash_duration_sec: int
+    watch_budget: int
+    poll_interval_sec: float
+    force_polling: bool
+    reconcile_enabled: bool
+    reconcile_batch_size: int
+    reconcile_interval_sec: float
+    reconcile_max_duty: float
+    reconcile_max_mb_per_tick: float
+    reconcile_pass_pause_sec: float
+    large_file_threshold_mb: float
+    large_file_policy: str
+    profile_enabled: bool
+    exclude_file_patterns: Tuple[str, ...]
+    include_file_patterns: Tuple[str, ...]
+    journal_enabled: bool
+    journal_fsync_ms: int
+    journal_max_kb: int
+    log_file_enabled: bool
+    log_max_mb: float
+    log_keep_files: int
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict-kompatibler Zugriff (für Helfer, die dict oder Snapshot bekommen)."""
+        return getattr(self, key, default)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Tuple["ConfigSnapshot", List[str]]:
+        """Prüft und konvertiert; ungültige Werte fallen auf den Default zurück (-> problems)."""
+        problems: List[str] = []
+        values: Dict[str, Any] = {}
+        for key, typ in _field_types().items():
+            default = DEFAULT_CONFIG[key]
+            raw = data.get(key, default)
+            try:
+                val = _coerce(typ, raw)
+                _check(key, val)
+            except (TypeError, ValueError, re.error) as e:
+                problems.append(f"{key}={raw!r}: {e} – Default {default!r} verwendet")
+                val = _coerce(typ, default)
+            values[key] = val
+        return cls(**values), problems
+
+    @classmethod
+    def coerce(cls, cfg: Any) -> "ConfigSnapshot":
+        """Snapshot unverändert, dict (z. B. aus Benchmarks) wird geprüft umgewandelt."""
+        if isinstance(cfg, cls):
+            return cfg
+        merged = dict(DEFAULT_CONFIG)
+        merged.update(cfg or {})
+        return cls.from_dict(merged)[0]
+
+
+def _field_types() -> Dict[str, Any]:
+    global _FIELD_TYPES
+    if _FIELD_TYPES is None:
+        _FIELD_TYPES = get_type_hints(ConfigSnapshot)
+    return _FIELD_TYPES
+
+
+_FIELD_TYPES = None
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off", ""}
+
+
+def _coerce(typ: Any, raw: Any) -> Any:
+    if typ is bool:
+        if isinstance(raw, str):
+            if raw.strip().lower() in _TRUE:
+                return True
+            if raw.strip().lower() in _FALSE:
+                return False
+            raise ValueError("kein Wahrheitswert")
+        return bool(raw)
+    if typ is int:
+        if isinstance(raw, bool):
+            raise TypeError("Zahl erwartet")
+        return int(float(raw))
+    if typ is float:
+        if isinstance(raw, bool):
+            raise TypeError("Zahl erwartet")
+        return float(raw)
+    if typ is str:
+        return "" if raw is None else str(raw).strip()
+    # Tuple[str, ...]
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    if not isinstance(raw, (list, tuple)):
+        raise TypeError("Liste erwartet")
+    return tuple(str(x).strip() for x in raw if str(x).strip())
+
+
+def _check(key: str, val: Any) -> None:
+    if isinstance(val, (int, float)) and not isinstance(val, bool) and val < 0:
+        raise ValueError("darf nicht negativ sein")
+    if key == "large_file_policy" and val not in ("skip", "store"):
+        raise ValueError("erlaubt: skip, store")
+    if key == "reconcile_max_duty" and not 0 < val <= 1:
+        raise ValueError("erlaubt: > 0 und <= 1")
+    if key.endswith("_file_patterns"):
+        for pat in val:
+            re.compile(pat)
+
+
+# -----------------------------
+# Store
+# -----------------------------
 class ConfigStore:
+    """
+    JSON-Config mit atomarem Speichern (Temp-Datei + rename) und Änderungs-Abos.
+    `data` ist das veränderliche dict für die Routen; nach save() bekommen Abonnenten
+    den neuen, geprüften Snapshot (einmal je tatsächlicher Änderung).
+    """
+
     def __init__(self, path: Path):
         self.path = path
         self._cfg = DEFAULT_CONFIG.copy()
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable[[ConfigSnapshot], None]] = []
+        self.problems: List[str] = []
         self.load()
+        self._snapshot, problems = ConfigSnapshot.from_dict(self._cfg)
+        self.problems.extend(problems)
 
     @property
     def data(self) -> Dict[str, Any]:
         return self._cfg
 
+    def snapshot(self) -> ConfigSnapshot:
+        return self._snapshot
+
+    def _read(self) -> Dict[str, Any]:
+        raw = json.loads(self.path.read_text(encoding="utf-8"))
+        if not isinstance(raw, dict):
+            raise ValueError("kein JSON-Objekt")
+        return raw
+
     def load(self) -> None:
-        if self.path.exists():
+        if not self.path.exists():
+            return
+        try:
+            raw = self._read()
+        except Exception as e:
+            # kaputte Datei nicht stillschweigend überschreiben, sondern beiseitelegen
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            aside = self.path.with_name(f"{self.path.name}.corrupt-{stamp}")
             try:
-                self._cfg.update(json.loads(self.path.read_text(encoding="utf-8")))
-            except Exception:
-                pass
+                self.path.replace(aside)
+                self.problems.append(f"Config unlesbar ({e}) – nach {aside.name} verschoben, Defaults aktiv")
+            except OSError:
+                self.problems.append(f"Config unlesbar ({e}) – Defaults aktiv")
+            return
+        self._cfg.update(raw)
 
     def save(self) -> None:
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.path.write_text(json.dumps(self._cfg, indent=2, ensure_ascii=False), encoding="utf-8")
\ No newline at end of file
+        with self._lock:
+            snap, problems = ConfigSnapshot.from_dict(self._cfg)
+            self.problems = problems
+            atomic_write_text(self.path, json.dumps(self._cfg, indent=2, ensure_ascii=False))
+            subscribers = self._swap_locked(snap)
+        for cb in subscribers:
+            cb(snap)
+
+    def reload(self) -> bool:
+        """
+        Datei neu einlesen (extern bearbeitet, z. B. im Daemon per SIGHUP) und Abonnenten benachrichtigen.
+        Anders als load(): eine unlesbare (evtl. halb geschriebene) Datei bleibt liegen und der
+        bisherige Stand aktiv (False, Grund in problems). Aus der Datei entfernte Keys fallen
+        auf den Default zurück.
+        """
+        with self._lock:
+            try:
+                raw = self._read()
+            except Exception as e:
+                self.problems = [f"Config unlesbar ({e}) – bisheriger Stand bleibt aktiv"]
+                return False
+            cfg = DEFAULT_CONFIG.copy()
+            cfg.update(raw)
+            snap, problems = ConfigSnapshot.from_dict(cfg)
+            self._cfg.clear()
+            self._cfg.update(cfg)
+            self.problems = problems
+            subscribers = self._swap_locked(snap)
+        for cb in subscribers:
+            cb(snap)
+        return True
+
+    def _swap_locked(self, snap: ConfigSnapshot) -> List[Callable[[ConfigSnapshot], None]]:
+        changed = snap != self._snapshot
+        self._snapshot = snap
+        return list(self._subscribers) if changed else []
+
+    def subscribe(self, callback: Callable[[ConfigSnapshot], None]) -> Callable[[], None]:
+        """callback(snapshot) nach jeder Änderung; Rückgabe: Funktion zum Abbestellen."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
@@ -0,0 +1,225 @@
+"""
+Headless-Betrieb ohne Flask: Watcher direkt aus der ConfigStore-Datei.
+
+    python -m services.daemon                      # ~/.github_auto_sync/config.json
+    python -m services.daemon --config cfg.json --socket /tmp/gas.sock
+    python -m services.daemon --socket /tmp/gas.sock --ctl status   # status | flush | stop
+
+Signale: SIGTERM/SIGINT = offene Events committen, WIP-Push nachholen, sauber beenden;
+SIGHUP = Config neu einlesen (Filter/Zeiten greifen live, wie beim Speichern in der UI).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from models.config import ConfigStore
+from .log_sink import LOG_SINK
+from .repo_registry import REGISTRY
+from .watch_service import InMemoryLog, WatchService
+
+CONFIG_PATH = Path.home() / ".github_auto_sync" / "config.json"
+COMMANDS = ("status", "flush", "stop")
+
+
+def _rss_mb() -> Optional[float]:
+    """Aktueller RSS (Linux /proc), sonst None."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+# -----------------------------
+# Daemon
+# -----------------------------
+class Daemon:
+    def __init__(self, store: ConfigStore, socket_path: Optional[Path] = None, log_lines: int = 200):
+        self.store = store
+        self.socket_path = socket_path
+        # kleiner Ringpuffer – ohne Dashboard braucht es nur die letzten Zeilen für "status"
+        self.log = InMemoryLog(maxlen=log_lines)
+        self.watch = WatchService(store, self.log)
+        self._stop = threading.Event()
+        self._server: Optional[socket.socket] = None
+        self._started = time.time()
+
+    # ---------- Lebenszyklus ----------
+    def start(self) -> None:
+        for problem in self.store.problems:
+            self.log.add(f"Config: {problem}")
+        cfg = self.store.snapshot()
+        if not cfg.project_path:
+            raise SystemExit("project_path ist nicht gesetzt (Config: %s)" % self.store.path)
+        if cfg.mirror_on_start and cfg.remote_url:
+            self._mirror()
+        self.watch.start()
+        if self.socket_path:
+            self._serve()
+
+    def _mirror(self) -> None:
+        try:
+            self.watch.mirror_remote()  # im WIP-Modus übersprungen
+        except Exception as e:
+            self.log.add(f"Spiegeln fehlgeschlagen: {e!r}")
+
+    def request_stop(self, *_args) -> None:
+        self._stop.set()
+
+    def reload(self, *_args) -> None:
+        ok = self.store.reload()
+        for problem in self.store.problems:
+            self.log.add(f"Config: {problem}")
+        if ok:
+            self.log.add("Config neu eingelesen (SIGHUP)")
+
+    def run(self) -> int:
+        """Blockiert bis SIGTERM/SIGINT oder "stop" über den Socket; dann flush + Stop."""
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.reload)
+        self.start()
+        while not self._stop.wait(1.0):
+            pass
+        self.shutdown()
+        return 0
+
+    def shutdown(self) -> None:
+        self.log.add("Daemon: beende (offene Änderungen werden committet)")
+        try:
+            self.watch.flush()
+        except Exception as e:
+            self.log.add(f"Fehler beim Flush: {e!r}")
+        self.watch.stop()
+        REGISTRY.close_all()
+        self._close_socket()
+
+    # ---------- Steuer-Socket ----------
+    def status(self) -> Dict[str, Any]:
+        return {
+            **self.watch.status(),
+            "pid": os.getpid(),
+            "uptime_sec": round(time.time() - self._started, 1),
+            "rss_mb": _rss_mb(),
+            "log": self.log.dump()[:10],
+        }
+
+    def handle_command(self, cmd: str) -> Dict[str, Any]:
+        if cmd == "status":
+            return {"ok": True, **self.status()}
+        if cmd == "flush":
+            self.watch.flush()
+            return {"ok": True, **self.status()}
+        if cmd == "stop":
+            self.request_stop()
+            return {"ok": True}
+        return {"ok": False, "error": f"unbekannt: {cmd!r} (erlaubt: {', '.join(COMMANDS)})"}
+
+    def _serve(self) -> None:
+        path = self.socket_path
+        if not hasattr(socket, "AF_UNIX"):
+            self.log.add("Steuer-Socket nicht verfügbar (kein AF_UNIX auf dieser Plattform)")
+            return
+        try:
+            path.unlink()  # Rest einer abgestürzten Instanz
+        except FileNotFoundError:
+            pass
+        srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # nur der eigene Benutzer darf steuern
+        try:
+            srv.bind(str(path))
+        finally:
+            os.umask(old_umask)
+        srv.listen(4)
+        self._server = srv
+        threading.Thread(target=self._accept_loop, name="daemon-ctl", daemon=True).start()
+        self.log.add(f"Steuer-Socket: {path}")
+
+    def _accept_loop(self) -> None:
+        srv = self._server
+        while srv and not self._stop.is_set():
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return  # Socket geschlossen
+            with conn:
+                try:
+                    conn.settimeout(5)
+                    cmd = conn.makefile("r", encoding="utf-8").readline().strip()
+                    reply = self.handle_command(cmd)
+                except Exception as e:
+                    reply = {"ok": False, "error": repr(e)}
+                try:
+                    conn.sendall((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+                except OSError:
+                    pass
+
+    def _close_socket(self) -> None:
+        srv, self._server = self._server, None
+        if srv:
+            srv.close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+
+def send_command(socket_path: Path, cmd: str, timeout: float = 30.0) -> Dict[str, Any]:
+    """Client-Seite: ein Kommando an einen laufenden Daemon schicken."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(str(socket_path))
+        s.sendall((cmd + "\n").encode("utf-8"))
+        return json.loads(s.makefile("r", encoding="utf-8").readline() or "{}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="GitHub Auto Sync ohne Web-Oberfläche")
+    ap.add_argument("--config", default=str(CONFIG_PATH), help="Pfad zur config.json")
+    ap.add_argument("--socket", default="", help="Unix-Socket für status/flush/stop (leer = aus)")
+    ap.add_argument("--ctl", choices=COMMANDS, help="Kommando an einen laufenden Daemon senden und beenden")
+    ap.add_argument("--quiet", action="store_true", help="Log nicht zusätzlich auf stderr ausgeben")
+    args = ap.parse_args(argv)
+
+    if args.ctl:
+        if not args.socket:
+            ap.error("--ctl braucht --socket")
+        try:
+            reply = send_command(Path(args.socket).expanduser(), args.ctl)
+        except OSError as e:
+            ap.exit(1, f"Daemon nicht erreichbar ({args.socket}): {e}\n")
+        print(json.dumps(reply, ensure_ascii=False, indent=2))
+        return 0 if reply.get("ok") else 1
+
+    store = ConfigStore(Path(args.config).expanduser())
+    cfg = store.snapshot()
+    if cfg.log_file_enabled:
+        LOG_SINK.start(max_bytes=int(cfg.log_max_mb * 1024 * 1024), keep=cfg.log_keep_files)
+    if not args.quiet:
+        h = logging.StreamHandler(sys.stderr)
+        h.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        logger = logging.getLogger("github_auto_sync")
+        logger.addHandler(h)
+        logger.setLevel(logging.INFO)
+    try:
+        return Daemon(store, Path(args.socket).expanduser() if args.socket else None).run()
+    finally:
+        LOG_SINK.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Set
+
+# Netto-Zustände je Pfad innerhalb eines Batch-Fensters
+CREATED = "created"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+
+class CoalescedBatch(NamedTuple):
+    changed: Set[Path]             # neu oder geändert -> git add
+    deleted: Set[Path]             # entfernt -> git rm --cached
+    renames: Dict[Path, Path]      # Datei-Umbenennungen (ziel -> quelle), Teilmenge von changed/deleted
+    dir_moves: Dict[Path, Path]    # Ordner-Umbenennungen (quelle -> ziel), als eine Operation
+    dir_deletes: Set[Path]         # gelöschte Ordner (git rm -r --cached)
+
+    def empty(self) -> bool:
+        return not (self.changed or self.deleted or self.dir_moves or self.dir_deletes)
+
+
+def _under(p: Path, d: Path) -> bool:
+    return p == d or p.is_relative_to(d)
+
+
+class EventCoalescer:
+    """
+    Verdichtet Event-Folgen zu einem Netto-Zustand je Pfad:
+      created+modified -> created, deleted+created -> modified, neu+deleted -> nichts,
+      a->b verschoben -> a gelöscht, b neu (Rename für git), Ordner-Moves als eine Operation.
+    Einzel-Events, die eine bereits erfasste Ordner-Operation nur wiederholen
+    (z. B. die Kind-Moves nach einem Ordner-Rename), werden verschluckt.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._state: Dict[Path, str] = {}
+        self._fresh: Set[Path] = set()          # existierte vor dem Batch nicht (erstes Event: created)
+        self._origin: Dict[Path, Path] = {}     # ziel -> quelle (Datei-Renames)
+        self._dir_moves: Dict[Path, Path] = {}  # quelle -> ziel
+        self._dir_deletes: Set[Path] = set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._state) + len(self._dir_moves) + len(self._dir_deletes)
+
+    def tracks(self, p: Path) -> bool:
+        """Pfad hat im laufenden Batch schon einen Zustand (z. B. vorher angelegt/geändert)."""
+        with self._lock:
+            return p in self._state
+
+    # ---------- Datei-Events (True = Pfad ist neu im Batch) ----------
+    def created(self, p: Path) -> bool:
+        with self._lock:
+            s = self._state.get(p)
+            if s is None:
+                self._state[p] = CREATED
+                self._fresh.add(p)
+                return True
+            if s == DELETED:
+                # Editor-Replace: gelöscht + neu angelegt = geändert
+                self._state[p] = MODIFIED
+                return True
+            return False
+
+    def modified(self, p: Path) -> bool:
+        with self._lock:
+            s = self._state.get(p)
+            if s is None or s == DELETED:
+                self._state[p] = MODIFIED
+                return True
+            return False
+
+    def deleted(self, p: Path) -> bool:
+        with self._lock:
+            return self._delete_locked(p)
+
+    def _delete_locked(self, p: Path) -> bool:
+        s = self._state.get(p)
+        if s is None and any(_under(p, d) for d in self._dir_deletes):
+            return False  # schon durch Ordner-Löschung abgedeckt
+        if p in self._fresh:
+            # im selben Batch angelegt und wieder gelöscht -> für git nie existiert
+            self._fresh.discard(p)
+            self._state.pop(p, None)
+            self._origin.pop(p, None)
+            return False
+        self._origin.pop(p, None)
+        self._state[p] = DELETED
+        return s != DELETED
+
+    def moved(self, src: Path, dst: Path) -> Optional[bool]:
+        """Datei-Move. None = durch einen Ordner-Move bereits abgedeckt, sonst wie created()."""
+        with self._lock:
+            for s_dir, d_dir in self._dir_moves.items():
+                if src.is_relative_to(s_dir) and dst == d_dir / src.relative_to(s_dir):
+                    return None
+            was_fresh = src in self._fresh
+            origin = self._origin.pop(src, src)
+            self._delete_locked(src)
+            new = dst not in self._state or self._state[dst] == DELETED
+            self._state[dst] = CREATED if was_fresh or dst not in self._state else MODIFIED
+            if was_fresh:
+                self._fresh.add(dst)
+            elif origin != dst:
+                self._origin[dst] = origin
+            else:
+                self._origin.pop(dst, None)
+            return new
+
+    # ---------- Ordner-Events ----------
+    def dir_moved(self, src: Path, dst: Path) -> Optional[bool]:
+        """Ordner-Rename als eine Operation. None = Kind eines bereits erfassten Ordner-Moves."""
+        with self._lock:
+            for s_dir, d_dir in self._dir_moves.items():
+                if src.is_relative_to(s_dir) and src != s_dir and dst == d_dir / src.relative_to(s_dir):
+                    return None
+
+            # Verkettung: a->b, dann b->c  =>  a->c; a->b, dann b/x->y  =>  a/x->y
+            # (der git-Index kennt bis zum Commit nur die Pfade unter a)
+            origin = src
+            for s_dir, d_dir in list(self._dir_moves.items()):
+                if d_dir == src:
+                    origin = s_dir
+                    del self._dir_moves[s_dir]
+                    break
+                if src.is_relative_to(d_dir):
+                    origin = s_dir / src.relative_to(d_dir)
+                    break
+            # Kind-Moves, die vor dem Ordner-Event kamen (Polling meldet Kinder zuerst), sind jetzt abgedeckt
+            for s_dir, d_dir in list(self._dir_moves.items()):
+                if s_dir.is_relative_to(origin) and d_dir == dst / s_dir.relative_to(origin):
+                    del self._dir_moves[s_dir]
+            for q, o in list(self._origin.items()):
+                if q.is_relative_to(dst) and o.is_relative_to(src) and o.relative_to(src) == q.relative_to(dst):
+                    del self._origin[q]
+                    if self._state.get(o) == DELETED:
+                        del self._state[o]
+            if origin != dst:
+                self._dir_moves[origin] = dst
+
+            # offene Zustände unterhalb des Ordners mitziehen
+            for p in [p for p in self._state if _under(p, src)]:
+                q = dst / p.relative_to(src)
+                self._state[q] = self._state.pop(p)
+                if p in self._fresh:
+                    self._fresh.discard(p)
+                    self._fresh.add(q)
+                if p in self._origin:
+                    self._origin[q] = self._origin.pop(p)
+            return True
+
+    def dir_deleted(self, d: Path) -> bool:
+        with self._lock:
+            if any(_under(d, x) for x in self._dir_deletes):
+                return False
+            # einzeln erfasste Änderungen darunter sind durch "rm -r" abgedeckt
+            for p in [p for p in self._state if _under(p, d)]:
+                self._state.pop(p, None)
+                self._fresh.discard(p)
+                self._origin.pop(p, None)
+            self._dir_deletes = {x for x in self._dir_deletes if not _under(x, d)}
+            self._dir_deletes.add(d)
+            return True
+
+    # ---------- Batch ----------
+    def drain(self) -> CoalescedBatch:
+        with self._lock:
+            changed = {p for p, s in self._state.items() if s != DELETED}
+            deleted = {p for p, s in self._state.items() if s == DELETED}
+            renames = {dst: src for dst, src in self._origin.items() if dst in changed and src in deleted}
+            batch = CoalescedBatch(changed, deleted, renames, dict(self._dir_moves), set(self._dir_deletes))
+            self._reset()
+            return batch
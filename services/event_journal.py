@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .event_coalescer import DELETED, EventCoalescer
+from utils.fs import atomic_write_text
+
+# Operationen (kurz, das Journal wird bei jedem Event beschrieben)
+OP_CREATED = "c"
+OP_MODIFIED = "m"
+OP_DELETED = "d"
+OP_MOVED = "mv"
+OP_DIR_MOVED = "dmv"
+OP_DIR_DELETED = "dd"
+
+Record = Dict[str, str]  # {"op": ..., "p": rel, ["q": rel-ziel]}
+
+
+class EventJournal:
+    """
+    Append-only JSON-Lines-Journal der noch nicht committeten Events (im Zustandsordner).
+      - append() legt nur in einen Puffer (kein I/O im Event-Pfad)
+      - ein Flusher-Thread schreibt den Puffer alle `fsync_interval` Sekunden + fsync
+      - compact(ops_fn) ersetzt den Inhalt atomar durch den aktuellen Netto-Zustand,
+        nach jedem erfolgreichen Batch und wenn die Datei `max_bytes` überschreitet
+      - replay() liest beim Start, was die letzte Sitzung nicht mehr committen konnte
+    """
+
+    def __init__(self, path: Path, fsync_interval: float = 0.2, max_bytes: int = 4 * 1024 * 1024):
+        self.path = Path(path)
+        self.fsync_interval = max(0.01, float(fsync_interval))
+        self.max_bytes = max(64 * 1024, int(max_bytes))
+        self.on_full: Optional[Callable[[], None]] = None  # meist: Handler kompaktiert
+
+        self._buf: List[str] = []
+        self._lock = threading.RLock()
+        self._fh = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._open = False
+        self.fsyncs = 0
+        self.compactions = 0
+
+    # ---------- Lebenszyklus ----------
+    def open(self) -> None:
+        with self._lock:
+            self._open = True
+            if self._fh is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fh = open(self.path, "a", encoding="utf-8")
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="event-journal", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        t = self._thread
+        if t:
+            t.join(timeout=3)
+        self._thread = None
+        with self._lock:
+            self._open = False
+            self._flush_locked()
+            if self._fh:
+                self._fh.close()
+                self._fh = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.fsync_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except OSError:
+                pass  # z. B. Platte voll – Events bleiben im Speicher-Batch erhalten
+            cb = self.on_full
+            if cb and self.size() > self.max_bytes:
+                try:
+                    cb()
+                except Exception:
+                    pass
+
+    # ---------- Schreiben ----------
+    def append(self, op: str, rel: str, dst: Optional[str] = None) -> None:
+        rec = {"op": op, "p": rel}
+        if dst is not None:
+            rec["q"] = dst
+        line = json.dumps(rec, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._buf.append(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buf or self._fh is None:
+            return
+        self._fh.write("\n".join(self._buf) + "\n")
+        self._buf.clear()
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.fsyncs += 1
+
+    def size(self) -> int:
+        try:
+            return self.path.stat().st_size
+        except OSError:
+            return 0
+
+    def compact(self, ops_fn: Callable[[], List[Record]]) -> None:
+        """
+        Journal atomar durch den aktuellen Netto-Zustand ersetzen. ops_fn läuft unter dem
+        Journal-Lock: parallele append()s landen entweder darin oder danach (doppelt ist harmlos).
+        """
+        with self._lock:
+            ops = ops_fn()
+            self._buf.clear()
+            if self._fh:
+                self._fh.close()
+                self._fh = None
+            text = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in ops)
+            atomic_write_text(self.path, text)
+            if self._open:
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self.compactions += 1
+
+    # ---------- Lesen ----------
+    def replay(self) -> List[Record]:
+        """Einträge der letzten Sitzung; eine beim Absturz halb geschriebene Zeile wird übersprungen."""
+        records: List[Record] = []
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(rec, dict) and rec.get("op") and rec.get("p"):
+                        records.append(rec)
+        except FileNotFoundError:
+            pass
+        return records
+
+
+class JournaledCoalescer(EventCoalescer):
+    """EventCoalescer, der jedes Event zusätzlich (relativ zu `root`) ins Journal schreibt."""
+
+    def __init__(self, journal: EventJournal, root: Path):
+        super().__init__()
+        self.journal = journal
+        self.root = Path(root)
+        self._prefix = os.path.join(str(self.root), "")
+
+    def _relstr(self, p: Path) -> Optional[str]:
+        # Präfix-Vergleich statt Path.relative_to – läuft bei jedem Event
+        s = str(p)
+        if not s.startswith(self._prefix):
+            return None
+        rel = s[len(self._prefix):]
+        return rel.replace(os.sep, "/") if os.sep != "/" else rel
+
+    def _rec(self, op: str, p: Path, dst: Optional[Path] = None) -> None:
+        rel = self._relstr(p)
+        rel_dst = self._relstr(dst) if dst is not None else None
+        if rel is None or (dst is not None and rel_dst is None):
+            return
+        self.journal.append(op, rel, rel_dst)
+
+    def created(self, p: Path) -> bool:
+        new = super().created(p)
+        self._rec(OP_CREATED, p)
+        return new
+
+    def modified(self, p: Path) -> bool:
+        new = super().modified(p)
+        if new:
+            self._rec(OP_MODIFIED, p)
+        return new
+
+    def deleted(self, p: Path) -> bool:
+        new = super().deleted(p)
+        self._rec(OP_DELETED, p)  # auch "neu + gelöscht": beim Replay muss das created verschwinden
+        return new
+
+    def moved(self, src: Path, dst: Path) -> Optional[bool]:
+        new = super().moved(src, dst)
+        if new is not None:
+            self._rec(OP_MOVED, src, dst)
+        return new
+
+    def dir_moved(self, src: Path, dst: Path) -> Optional[bool]:
+        new = super().dir_moved(src, dst)
+        if new is not None:
+            self._rec(OP_DIR_MOVED, src, dst)
+        return new
+
+    def dir_deleted(self, d: Path) -> bool:
+        new = super().dir_deleted(d)
+        if new:
+            self._rec(OP_DIR_DELETED, d)
+        return new
+
+    def records(self) -> List[Record]:
+        """Netto-Zustand als minimale Journal-Einträge (für compact): Ordner-Ops zuerst, dann Dateien."""
+        def rel(p: Path) -> str:
+            return p.relative_to(self.root).as_posix()
+
+        out: List[Record] = []
+        with self._lock:
+            for src, dst in self._dir_moves.items():
+                out.append({"op": OP_DIR_MOVED, "p": rel(src), "q": rel(dst)})
+            for d in self._dir_deletes:
+                out.append({"op": OP_DIR_DELETED, "p": rel(d)})
+            renamed = {src for dst, src in self._origin.items()
+                       if dst in self._state and self._state.get(src) == DELETED}
+            for dst, src in self._origin.items():
+                if src in renamed:
+                    out.append({"op": OP_MOVED, "p": rel(src), "q": rel(dst)})
+            for p, s in self._state.items():
+                if p in renamed or (p in self._origin and self._origin[p] in renamed):
+                    continue
+                if p in self._fresh:
+                    op = OP_CREATED
+                elif s == DELETED:
+                    op = OP_DELETED
+                else:
+                    op = OP_MODIFIED
+                out.append({"op": op, "p": rel(p)})
+        return out
+
+    def replay(self, records: List[Record]) -> int:
+        """Einträge einer früheren Sitzung wieder einspielen; was danach nicht mehr existiert, gilt als gelöscht."""
+        n = 0
+        for r in records:
+            op, p = r.get("op"), self.root / r["p"]
+            q = self.root / r["q"] if r.get("q") else None
+            if op == OP_CREATED:
+                self.created(p)
+            elif op == OP_MODIFIED:
+                self.modified(p)
+            elif op == OP_DELETED:
+                self.deleted(p)
+            elif op == OP_MOVED and q is not None:
+                self.moved(p, q)
+            elif op == OP_DIR_MOVED and q is not None:
+                self.dir_moved(p, q)
+            elif op == OP_DIR_DELETED:
+                self.dir_deleted(p)
+            else:
+                continue
+            n += 1
+        # erst am Ende gegen die Platte prüfen – Zwischenstände (vor einem Move) fehlen dort natürlich
+        with self._lock:
+            present = [p for p, s in self._state.items() if s != DELETED]
+        for p in present:
+            if not p.exists():
+                self.deleted(p)
+        return n
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.fs import atomic_write_text
+
+STATE_ROOT = Path.home() / ".github_auto_sync" / "state"
+
+# rel (posix) -> (size, mtime_ns, digest); digest "" = noch nicht berechnet
+Entry = Tuple[int, int, str]
+
+
+def state_dir_for(root: Path) -> Path:
+    """Eigener Zustandsordner je Projekt (außerhalb des Projekts, damit nichts mitcommittet wird)."""
+    root = Path(root).resolve()
+    key = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:10]
+    return STATE_ROOT / f"{root.name}-{key}"
+
+
+class FileIndex:
+    """
+    Persistenter Stat-/Digest-Index der beobachteten Dateien (relativ zum Projekt-Root).
+    Wird vom Watcher bei jedem Digest aktualisiert und vom Reconciler zum Abgleich genutzt.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._entries: Dict[str, Entry] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    # ---------- Persistenz ----------
+    def load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+            entries = {k: (int(v[0]), int(v[1]), str(v[2])) for k, v in raw.get("entries", {}).items()}
+        except Exception:
+            return  # kaputter Index = leerer Index; der Reconciler baut ihn neu auf
+        with self._lock:
+            self._entries = entries
+
+    def save(self, force: bool = False) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            if not (self._dirty or force):
+                return
+            data = json.dumps({"version": 1, "entries": self._entries}, separators=(",", ":"))
+            self._dirty = False
+        atomic_write_text(self.path, data)
+
+    # ---------- Zugriff ----------
+    def get(self, rel: str) -> Optional[Entry]:
+        with self._lock:
+            return self._entries.get(rel)
+
+    def put(self, rel: str, size: int, mtime_ns: int, digest: str) -> None:
+        with self._lock:
+            self._entries[rel] = (size, mtime_ns, digest)
+            self._dirty = True
+
+    def remove(self, rel: str) -> None:
+        with self._lock:
+            if self._entries.pop(rel, None) is not None:
+                self._dirty = True
+
+    def remove_prefix(self, rel_dir: str) -> None:
+        prefix = rel_dir.rstrip("/") + "/"
+        with self._lock:
+            for k in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[k]
+                self._dirty = True
+
+    def move(self, src: str, dst: str) -> None:
+        with self._lock:
+            e = self._entries.pop(src, None)
+            if e is not None:
+                self._entries[dst] = e
+                self._dirty = True
+
+    def move_prefix(self, src_dir: str, dst_dir: str) -> None:
+        src_p = src_dir.rstrip("/") + "/"
+        dst_p = dst_dir.rstrip("/") + "/"
+        with self._lock:
+            for k in [k for k in self._entries if k.startswith(src_p)]:
+                self._entries[dst_p + k[len(src_p):]] = self._entries.pop(k)
+                self._dirty = True
+
+    def rels(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
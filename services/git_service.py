@@ -1,8 +1,21 @@
 from __future__ import annotations
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
-from typing import Iterable, Optional
-from git import Repo, GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from git import Actor, Repo, GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+from git.refs import SymbolicReference
+from gitdb import IStream
+
+from .profile_service import profiled
+
+logger = logging.getLogger("github_auto_sync.git")
 
 
 # -----------------------------
@@ -17,6 +30,21 @@ def _active_branch_name(repo: Repo, fallback: str = "main") -> str:
         return fallback or "main"
 
 
+def _rev(repo: Repo, ref: str) -> Optional[str]:
+    try:
+        return repo.git.rev_parse("--verify", "-q", ref) or None
+    except GitCommandError:
+        return None
+
+
+def _ref_sha(repo: Repo, ref: str) -> Optional[str]:
+    """sha einer Ref direkt aus .git (loose/packed-refs) – ohne git-Prozess."""
+    try:
+        return SymbolicReference.dereference_recursive(repo, ref)
+    except (ValueError, OSError):
+        return None
+
+
 # -----------------------------
 # Repo/Remote/Branch
 # -----------------------------
@@ -62,89 +90,446 @@ def has_changes(repo: Repo) -> bool:
     return bool(repo.git.status("--porcelain").strip())
 
 
-def stage_paths(repo: Repo, root: Path, add_paths: Iterable[Path], del_paths: Iterable[Path]) -> None:
-    add_list = []
-    for p in add_paths:
-        if p.exists():
-            add_list.append(str(Path(p).relative_to(root)))
+def _empty_tree(repo: Repo) -> str:
+    # unabhängig vom Hash-Format (sha1/sha256) des Repos
+    return repo.git.hash_object("-t", "tree", os.devnull)
+
+
+def has_staged_changes(repo: Repo, env: Optional[Dict[str, str]] = None) -> bool:
+    """
+    True, wenn sich der Index von HEAD unterscheidet – vergleicht nur Index und Tree
+    (diff-index --cached), ohne die Arbeitskopie zu scannen. Ungeborenes HEAD: leerer Tree.
+    """
+    base = _rev(repo, "HEAD") or _empty_tree(repo)
+    try:
+        repo.git.diff_index("--cached", "--quiet", base, "--", env=env)
+    except GitCommandError as e:
+        if e.status == 1:
+            return True
+        raise
+    return False
+
+
+def _chunks(items: List[str], size: int = 500):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
-    if add_list:
-        repo.git.add("--", *add_list)
+
+def stage_paths(
+    repo: Repo,
+    root: Path,
+    add_paths: Iterable[Path],
+    del_paths: Iterable[Path],
+    dir_moves: Optional[Dict[Path, Path]] = None,
+    dir_deletes: Iterable[Path] = (),
+    max_add_size: int = 0,
+    env: Optional[Dict[str, str]] = None,
+) -> List[Path]:
+    """
+    Übernimmt einen verdichteten Batch in den Index – mit möglichst wenigen git-Aufrufen.
+    Ordner-Moves: getrackte Dateien unter der Quelle werden auf das Ziel abgebildet,
+    damit git sie als Renames erkennt (rm alt + add neu im selben Commit).
+    Dateien über `max_add_size` Bytes (0 = keine Grenze) werden nicht hinzugefügt,
+    sondern zurückgegeben – der Aufrufer entscheidet (überspringen / Pointer).
+    `env` z. B. mit GIT_INDEX_FILE, um in einen anderen Index (WIP) zu stagen.
+    """
+    add_set = {Path(p) for p in add_paths}
+    rm_dirs = [str(Path(d).relative_to(root)) for d in dir_deletes]
+
+    for src, dst in (dir_moves or {}).items():
+        src_rel = Path(src).relative_to(root)
+        tracked = repo.git.ls_files("-z", "--", str(src_rel), env=env).split("\0")
+        for t in tracked:
+            if t:
+                add_set.add(Path(dst) / Path(t).relative_to(src_rel))
+        rm_dirs.append(str(src_rel))
+
+    # Ordner zuerst entfernen, danach Einzeldateien (spätere Adds gewinnen)
+    for chunk in _chunks(rm_dirs):
+        repo.git.rm("-r", "--cached", "--force", "--ignore-unmatch", "-q", "--", *chunk, env=env)
 
     # Deletions sauber in den Index übernehmen
-    for p in del_paths:
-        rel = str(Path(p).relative_to(root))
+    # ('--cached' meldet die Datei als gelöscht, auch wenn sie bereits fehlt)
+    del_list = [str(Path(p).relative_to(root)) for p in del_paths]
+    for chunk in _chunks(del_list):
+        repo.git.rm("--cached", "--force", "--ignore-unmatch", "-q", "--", *chunk, env=env)
+
+    add_list: List[str] = []
+    too_large: List[Path] = []
+    for p in add_set:
+        try:
+            size = p.stat().st_size
+        except OSError:
+            continue
+        if max_add_size and size > max_add_size:
+            too_large.append(p)
+        else:
+            add_list.append(str(p.relative_to(root)))
+    for chunk in _chunks(add_list):
+        repo.git.add("--", *chunk, env=env)
+    return too_large
+
+
+def large_untracked_or_modified(repo: Repo, root: Path, max_size: int) -> List[Path]:
+    """
+    Neue oder geänderte Dateien (ohne ignorierte) über `max_size` Bytes – nur per Stat,
+    ohne sie zu hashen. Pointer-Pfade (skip-worktree) meldet ls-files nicht als geändert.
+    """
+    out: List[Path] = []
+    for rel in repo.git.ls_files("-z", "--others", "--modified", "--exclude-standard").split("\0"):
+        if not rel:
+            continue
+        p = root / rel
         try:
-            # '--cached' meldet die Datei als gelöscht, auch wenn sie bereits fehlt
-            repo.git.rm("--cached", "--force", "--", rel)
-        except Exception:
-            # falls schon als deletion erfasst – ignorieren
-            pass
+            if p.stat().st_size > max_size:
+                out.append(p)
+        except OSError:
+            continue  # gelöscht – erledigt add -A
+    return out
+
+
+def stage_pointers(repo: Repo, root: Path, pointers: Dict[Path, str], env: Optional[Dict[str, str]] = None) -> None:
+    """
+    Legt für große Dateien nur den Pointer-Text als Blob in den Index
+    (update-index --cacheinfo) und markiert den Pfad als skip-worktree, damit
+    status/add -A die echte Datei in der Arbeitskopie nicht wieder hineinholen.
+    """
+    rels: List[str] = []
+    for p, text in pointers.items():
+        data = text.encode("utf-8")
+        blob = repo.odb.store(IStream("blob", len(data), BytesIO(data)))
+        rel = Path(p).relative_to(root).as_posix()
+        repo.git.update_index("--add", "--cacheinfo", f"100644,{blob.hexsha.decode()},{rel}", env=env)
+        rels.append(rel)
+    for chunk in _chunks(rels):
+        repo.git.update_index("--skip-worktree", "--", *chunk, env=env)
+
+
+def _set_skip_worktree(repo: Repo, rels: List[str], flag: str, env: Optional[Dict[str, str]] = None) -> None:
+    for chunk in _chunks(rels):
+        try:
+            repo.git.update_index(flag, "--", *chunk, env=env)
+        except GitCommandError:
+            # einzelne Pfade nicht (mehr) im Index – die übrigen trotzdem setzen
+            for rel in chunk:
+                try:
+                    repo.git.update_index(flag, "--", rel, env=env)
+                except GitCommandError:
+                    pass
+
+
+def unskip_paths(repo: Repo, rels: List[str], env: Optional[Dict[str, str]] = None) -> None:
+    """skip-worktree aufheben – sonst verweigern git add/rm diese Pfade."""
+    _set_skip_worktree(repo, rels, "--no-skip-worktree", env)
+
+
+def skipped_paths(repo: Repo, env: Optional[Dict[str, str]] = None) -> List[str]:
+    """Pfade mit skip-worktree-Bit (Pointer großer Dateien)."""
+    return [e[2:] for e in repo.git.ls_files("-v", "-z", env=env).split("\0") if e.startswith("S ")]
 
 
 # -----------------------------
 # Commit/Push
 # -----------------------------
+def _identity_env(repo: Repo) -> Dict[str, str]:
+    """
+    Autor/Committer explizit für commit-tree. Wie bei GitPythons index.commit: env, dann
+    user.name/user.email, sonst ein Default-Actor (Benutzer@Host) – ohne git-Identität
+    bricht commit-tree sonst mit "Please tell me who you are" ab.
+    """
+    reader = repo.config_reader()
+    env: Dict[str, str] = {}
+    for role, actor in (("AUTHOR", Actor.author(reader)), ("COMMITTER", Actor.committer(reader))):
+        env[f"GIT_{role}_NAME"] = actor.name or "github_auto_sync"
+        env[f"GIT_{role}_EMAIL"] = actor.email or "github_auto_sync@localhost"
+    return env
+
+
+def _commit_tree(repo: Repo, tree: str, parent: Optional[str], message: str) -> str:
+    args = [tree, "-m", message]
+    if parent:
+        args += ["-p", parent]
+    return repo.git.commit_tree(*args, env=_identity_env(repo))
+
+
+def commit_index(repo: Repo, message: str, ref: str = "HEAD", env: Optional[Dict[str, str]] = None) -> str:
+    """
+    Commit direkt aus dem Index per Plumbing (write-tree, commit-tree, update-ref) –
+    statt GitPythons repo.index, das die komplette Index-Datei in Python einliest.
+    update-ref prüft den alten Stand, damit ein paralleler Commit nicht überschrieben wird.
+    """
+    tree = repo.git.write_tree(env=env)
+    parent = _rev(repo, ref)
+    sha = _commit_tree(repo, tree, parent, message)
+    repo.git.update_ref("-m", f"commit: {message.splitlines()[0]}", ref, sha, parent or "")
+    return sha
+
+
 def commit_and_push(repo: Repo, branch: str, message: str, do_commit: bool, do_push: bool) -> None:
     """
     Commit (optional) und Push (optional) mit defensiven Guards.
     Pusht *nur*, wenn do_push=True und 'origin' vorhanden ist.
     """
     # Commit nur wenn gefordert und es Änderungen gibt
-    if do_commit and has_changes(repo):
-        repo.index.commit(message)
+    if do_commit and has_staged_changes(repo):
+        commit_index(repo, message)
 
     # Push strikt nur bei Erlaubnis
     if not do_push:
         return
 
-    # Ohne 'origin' gibt es nichts zu pushen
-    try:
-        origin = repo.remotes.origin  # type: ignore[attr-defined]
-    except Exception:
-        print("[git] push skipped: no 'origin' remote configured")
-        return
-
     try:
         ref = branch or _active_branch_name(repo)
-        origin.push(ref)
-        print("[git] push ok")
+        rec = push_branches(repo, [ref])
+        if rec and not rec["skipped"]:
+            logger.info("push ok", extra={"refs": rec["refs"], "bytes": rec["bytes"], "duration_ms": rec["duration_ms"]})
     except Exception as e:
-        print(f"[git] push failed: {e}")
+        logger.error("push failed: %s", e, extra={"refs": [ref]})
         raise
 
 
+# -----------------------------
+# Push (ohne Leerlauf, Statistik)
+# -----------------------------
+_WRITING_RE = re.compile(r"Writing objects:[^\r\n]*?,\s*([\d.]+)\s*(bytes|KiB|MiB|GiB)")
+_UNITS = {"bytes": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3}
+
+
+def _pushed_bytes(progress: str) -> int:
+    """Gesendete Pack-Größe aus der Fortschrittsausgabe (letzte 'Writing objects'-Zeile)."""
+    found = _WRITING_RE.findall(progress or "")
+    if not found:
+        return 0
+    num, unit = found[-1]
+    return int(float(num) * _UNITS[unit])
+
+
+class PushStats:
+    """Letzte Pushes (Bytes, Dauer, übersprungen) plus Summen – für /api/push-stats."""
+
+    def __init__(self, maxlen: int = 200):
+        self._recent: deque = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.pushes = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def record(self, remote: str, refs: List[str], nbytes: int, seconds: float, skipped: bool) -> Dict[str, Any]:
+        rec = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "remote": remote,
+            "refs": refs,
+            "bytes": nbytes,
+            "duration_ms": round(seconds * 1000, 1),
+            "skipped": skipped,
+        }
+        with self._lock:
+            self._recent.appendleft(rec)
+            if skipped:
+                self.skipped += 1
+            else:
+                self.pushes += 1
+                self.bytes += nbytes
+                self.seconds += seconds
+        return rec
+
+    def summary(self, limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pushes": self.pushes,
+                "skipped": self.skipped,
+                "bytes_total": self.bytes,
+                "avg_duration_ms": round(self.seconds / self.pushes * 1000, 1) if self.pushes else None,
+                "recent": list(self._recent)[:limit],
+            }
+
+
+PUSH_STATS = PushStats()
+
+
+def push_branches(
+    repo: Repo,
+    branches: List[str],
+    remote: str = "origin",
+    force: Iterable[str] = (),
+    lease: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Pusht die Branches in *einem* `git push` (Thin-Pack, Fortschritt für die Byte-Zahl).
+    Branches, deren lokale Ref schon der Remote-Tracking-Ref entspricht, werden ohne
+    Netzwerkzugriff übersprungen. `force` = Branches, die per "+" überschrieben werden.
+    `lease` = Force-with-lease je Branch mit explizit erwartetem Stand (die gecachte
+    Tracking-Ref, ohne vorheriges fetch): hat jemand anderes seitdem gepusht, lehnt git ab.
+    Gibt den Statistik-Eintrag zurück (None = kein Remote).
+    """
+    try:
+        repo.remote(remote)
+    except ValueError:
+        logger.info("push skipped: no '%s' remote configured", remote)
+        return None
+
+    force = set(force)
+    specs: List[str] = []
+    names: List[str] = []
+    args = ["--thin", "--progress", "--porcelain"]
+    for b in branches:
+        local = _ref_sha(repo, f"refs/heads/{b}")
+        tracking = _ref_sha(repo, f"refs/remotes/{remote}/{b}")
+        if not local or local == tracking:
+            continue
+        spec = f"refs/heads/{b}:refs/heads/{b}"
+        specs.append(f"+{spec}" if b in force else spec)
+        names.append(b)
+        if lease:
+            # leerer erwarteter Wert = Branch darf auf dem Remote noch nicht existieren
+            args.append(f"--force-with-lease=refs/heads/{b}:{tracking or ''}")
+    if not specs:
+        return PUSH_STATS.record(remote, list(branches), 0, 0.0, skipped=True)
+    t0 = time.perf_counter()
+    _, _, progress = repo.git.push(*args, remote, *specs, with_extended_output=True)
+    return PUSH_STATS.record(remote, names, _pushed_bytes(progress), time.perf_counter() - t0, skipped=False)
+
+
+# -----------------------------
+# WIP-Modus (eigener Index, nur Plumbing)
+# -----------------------------
+WIP_INDEX_NAME = "auto_sync_wip.index"
+
+
+def wip_env(repo: Repo) -> Dict[str, str]:
+    return {"GIT_INDEX_FILE": str(Path(repo.git_dir) / WIP_INDEX_NAME)}
+
+
+def wip_prepare(repo: Repo, branch: str, wip_branch: str) -> Dict[str, str]:
+    """
+    Liefert das env für den WIP-Index (.git/auto_sync_wip.index). Fehlt er, wird er aus
+    dem WIP-Branch bzw. – beim ersten Mal – aus `branch` befüllt. Der Index des
+    Haupt-Branches (und damit `git status` im Editor) bleibt unberührt.
+    """
+    env = wip_env(repo)
+    if not Path(env["GIT_INDEX_FILE"]).exists():
+        base = _rev(repo, f"refs/heads/{wip_branch}") or _rev(repo, f"refs/heads/{branch}")
+        if base:
+            repo.git.read_tree(base, env=env)
+    return env
+
+
+def wip_commit(repo: Repo, branch: str, wip_branch: str, message: str, env: Dict[str, str]) -> Optional[str]:
+    """write-tree + commit-tree + update-ref auf den WIP-Branch. None = nichts geändert."""
+    tree = repo.git.write_tree(env=env)
+    current = _rev(repo, f"refs/heads/{wip_branch}")
+    parent = current or _rev(repo, f"refs/heads/{branch}")
+    if parent and repo.git.rev_parse(f"{parent}^{{tree}}") == tree:
+        return None
+    sha = _commit_tree(repo, tree, parent, message)
+    repo.git.update_ref(f"refs/heads/{wip_branch}", sha, current or "")
+    return sha
+
+
+def _reset_squashed(repo: Repo, base: Optional[str], sha: str, keep_skipped: List[str]) -> None:
+    """
+    Haupt-Index nach dem Squash nachziehen – nur für die Pfade, die sich zwischen `base` und
+    `sha` unterscheiden. Was der Benutzer an anderen Pfaden gestaget hat, bleibt; reset setzt
+    die Einträge neu und verliert dabei skip-worktree, daher werden die Bits danach wieder gesetzt.
+    """
+    if base:
+        paths = [p for p in repo.git.diff("--name-only", "-z", "--no-renames", base, sha).split("\0") if p]
+        for chunk in _chunks(paths):
+            repo.git.reset("-q", "--", *chunk)
+    else:
+        repo.git.reset("-q")  # ungeborener Branch: es gab noch keinen Index-Stand zu erhalten
+    _set_skip_worktree(repo, keep_skipped, "--skip-worktree")
+
+
+def squash_wip(repo: Repo, branch: str, wip_branch: str, message: str) -> Optional[str]:
+    """
+    Übernimmt den Stand des WIP-Branches als *einen* Commit auf `branch`, setzt den
+    Haupt-Index nach und startet den WIP-Branch neu ab dort. Zurückgesetzt werden nur die
+    vom Squash geänderten Pfade (Arbeitskopie bleibt); anderes Gestagetes und die
+    skip-worktree-Bits der Pointer (aus Haupt- und WIP-Index) bleiben erhalten.
+    None = nichts zu übernehmen.
+    """
+    wip = _rev(repo, f"refs/heads/{wip_branch}")
+    if not wip:
+        return None
+    base = _rev(repo, f"refs/heads/{branch}")
+    if base:
+        try:
+            repo.git.merge_base("--is-ancestor", base, wip)
+        except GitCommandError:
+            raise RuntimeError(f"'{branch}' wurde seit Beginn des WIP-Branches verändert – bitte manuell zusammenführen")
+    tree = repo.git.rev_parse(f"{wip}^{{tree}}")
+    env = wip_env(repo)
+    wip_skipped = skipped_paths(repo, env) if Path(env["GIT_INDEX_FILE"]).exists() else []
+    if base and repo.git.rev_parse(f"{base}^{{tree}}") == tree:
+        sha = base
+    else:
+        sha = _commit_tree(repo, tree, base, message)
+        repo.git.update_ref(f"refs/heads/{branch}", sha, base or "")
+        if _active_branch_name(repo, "") == branch:
+            _reset_squashed(repo, base, sha, sorted(set(skipped_paths(repo)) | set(wip_skipped)))
+    repo.git.update_ref(f"refs/heads/{wip_branch}", sha, wip)
+    repo.git.read_tree(sha, env=env)
+    _set_skip_worktree(repo, wip_skipped, "--skip-worktree", env)
+    return None if sha == base else sha
+
+
+def push_wip(repo: Repo, wip_branch: str, branch: Optional[str] = None, remote: str = "origin") -> Optional[Dict[str, Any]]:
+    """WIP-Branch (per Force, wird beim Squash neu gestartet) und optional `branch` in einem Push."""
+    return push_branches(repo, ([branch] if branch else []) + [wip_branch], remote=remote, force=[wip_branch])
+
+
 # -----------------------------
 # Spiegelung (Force with lease)
 # -----------------------------
+@profiled("git.mirror_force_with_lease")
 def mirror_force_with_lease(
     repo: Repo,
     branch: str,
     remote: str = "origin",
     snapshot_msg: str = "mirror_on_start",
+    max_add_size: int = 0,
+    stage_large: Optional[Callable[[List[Path]], int]] = None,
 ) -> None:
     """
     Spiegelt den *lokalen* Stand auf den Remote-Branch (sicherer Force-Push):
-      1) git add -A (tracked + untracked)
+      1) git add -A (tracked + untracked) – ohne Dateien über `max_add_size` Bytes
+         (0 = keine Grenze); die gehen an `stage_large` (Pointer / überspringen wie im Batch)
       2) Snapshot-Commit, falls nötig
-      3) git push --force-with-lease <remote> <branch>:<branch>
+      3) git push --force-with-lease=<branch>:<erwartet> <remote> <branch>:<branch>
+    Ohne fetch: erwartet wird der Stand der gecachten Tracking-Ref. Ist lokal nichts neu,
+    entfällt der Push ganz; hat jemand anderes inzwischen gepusht, greift die Lease.
     """
-    # alles hinzufügen (tracked + untracked)
-    repo.git.add(A=True)
-
-    # nur committen, wenn wirklich Änderungen da sind
-    if repo.is_dirty(untracked_files=True):
-        repo.index.commit(f"auto: {snapshot_msg} @ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    root = Path(repo.working_tree_dir)
+    large = large_untracked_or_modified(repo, root, max_add_size) if max_add_size else []
+    # alles hinzufügen (tracked + untracked), große Dateien per Pathspec ausgenommen
+    excludes = [f":(exclude,literal){p.relative_to(root).as_posix()}" for p in large]
+    repo.git.add("-A", "--", ".", *excludes)
+    if large and stage_large:
+        stage_large(large)
 
-    # origin ggf. updaten (nicht kritisch, aber hilfreich)
-    try:
-        repo.git.fetch(remote)
-    except Exception:
-        pass
+    # nur committen, wenn der Index wirklich von HEAD abweicht
+    if has_staged_changes(repo):
+        commit_index(repo, f"auto: {snapshot_msg} @ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
     # Ziel-Branch robust bestimmen
     ref = branch or _active_branch_name(repo)
 
+    # nur ohne Tracking-Ref (z. B. Remote neu gesetzt) einmal diese eine Ref holen – sonst
+    # hätte die Lease keinen Bezugspunkt und ein schon vorhandener Remote-Branch würde abgelehnt
+    if _ref_sha(repo, f"refs/remotes/{remote}/{ref}") is None:
+        try:
+            repo.git.fetch("--no-tags", remote, f"+refs/heads/{ref}:refs/remotes/{remote}/{ref}")
+        except GitCommandError:
+            pass  # Branch existiert auf dem Remote (noch) nicht
+
     # sicherer Force-Push (bewahrt Schutz gegen fremde Zwischen-Pushes)
-    repo.git.push(remote, f"{ref}:{ref}", "--force-with-lease")
-    print(f"[git] mirror_force_with_lease -> {remote}/{ref}")
\ No newline at end of file
+    rec = push_branches(repo, [ref], remote=remote, lease=True)
+    if rec and rec["skipped"]:
+        logger.info("mirror_force_with_lease: %s/%s bereits aktuell", remote, ref)
+    elif rec:
+        logger.info(
+            "mirror_force_with_lease -> %s/%s", remote, ref,
+            extra={"bytes": rec["bytes"], "duration_ms": rec["duration_ms"]},
+        )
\ No newline at end of file
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from git import GitCommandError, Repo
+
+from .large_files import LargeFileStore, parse_pointer
+
+BACKUP_DIRNAME = ".auto_versions"
+HISTORY_SUFFIX = ".history"     # .auto_versions/<rel>.history/<zeitstempel><endung>
+TS_FORMAT = "%Y%m%d-%H%M%S"
+WORKTREE = "worktree"           # Versionsangabe: aktuelle Datei im Projekt
+BACKUP_PREFIX = "backup:"       # Versionsangabe: backup:<name>, sonst Commit-sha/Ref
+DIFF_PAGE_LINES = 500
+MAX_DIFF_BYTES = 8 * 1024 * 1024  # größere Seiten werden nicht gedifft (Binär/Pointer)
+
+
+class BackupVersion(NamedTuple):
+    name: str   # Dateiname im .history-Ordner
+    ts: str     # ISO-Zeitpunkt aus dem Namen
+    size: int
+
+
+def _ts_iso(name: str) -> str:
+    try:
+        return datetime.strptime(name[:15], TS_FORMAT).isoformat()
+    except ValueError:
+        return ""
+
+
+def safe_rel(root: Path, rel: str) -> str:
+    """Relativen Pfad prüfen: muss im Projekt liegen, nicht in .git oder den Backups."""
+    p = (root / rel).resolve()
+    try:
+        clean = p.relative_to(root.resolve())
+    except ValueError:
+        raise ValueError(f"Pfad außerhalb des Projekts: {rel}")
+    if not clean.parts or ".git" in clean.parts or BACKUP_DIRNAME in clean.parts:
+        raise ValueError(f"Pfad nicht erlaubt: {rel}")
+    return clean.as_posix()
+
+
+# -----------------------------
+# Backup-Index (.auto_versions)
+# -----------------------------
+class BackupIndex:
+    """
+    In-Memory-Verzeichnis der Schatten-Backups je Datei: einmal beim ersten Zugriff
+    eingelesen, danach nur noch über add() gepflegt – kein glob je Backup oder Abfrage.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.base = self.root / BACKUP_DIRNAME
+        self._lock = threading.Lock()
+        self._versions: Optional[Dict[str, List[Tuple[str, int]]]] = None  # rel -> [(name, size)] aufsteigend
+        self._excluded = False
+
+    def _dir_for(self, rel: str) -> Path:
+        return self.base / (rel + HISTORY_SUFFIX)
+
+    def _load_locked(self) -> Dict[str, List[Tuple[str, int]]]:
+        if self._versions is not None:
+            return self._versions
+        versions: Dict[str, List[Tuple[str, int]]] = {}
+        for dirpath, dirnames, filenames in os.walk(self.base):
+            if not dirpath.endswith(HISTORY_SUFFIX):
+                continue
+            dirnames[:] = []
+            rel = Path(dirpath).relative_to(self.base).as_posix()[: -len(HISTORY_SUFFIX)]
+            entries = []
+            for name in filenames:
+                try:
+                    entries.append((name, os.stat(os.path.join(dirpath, name)).st_size))
+                except OSError:
+                    continue
+            if entries:
+                versions[rel] = sorted(entries)
+        self._versions = versions
+        return versions
+
+    def versions(self, rel: str) -> List[BackupVersion]:
+        """Backups einer Datei, neueste zuerst."""
+        with self._lock:
+            entries = list(self._load_locked().get(rel, ()))
+        return [BackupVersion(name, _ts_iso(name), size) for name, size in reversed(entries)]
+
+    def path(self, rel: str, name: str) -> Path:
+        """Pfad zu einem Backup – nur für Namen, die der Index kennt."""
+        with self._lock:
+            known = any(n == name for n, _ in self._load_locked().get(rel, ()))
+        if not known:
+            raise FileNotFoundError(f"Backup nicht gefunden: {rel} @ {name}")
+        return self._dir_for(rel) / name
+
+    def add(self, rel: str, src: Path, max_n: int) -> Optional[str]:
+        """Kopie von `src` ablegen und auf `max_n` Versionen rotieren; gibt den Namen zurück."""
+        if max_n <= 0:
+            return None
+        vdir = self._dir_for(rel)
+        vdir.mkdir(parents=True, exist_ok=True)
+        name = f"{datetime.now().strftime(TS_FORMAT)}{Path(rel).suffix}"
+        shutil.copy2(src, vdir / name)
+        size = (vdir / name).stat().st_size
+        with self._lock:
+            self._exclude_from_git()
+            entries = self._load_locked().setdefault(rel, [])
+            entries[:] = [e for e in entries if e[0] != name]  # gleiche Sekunde: überschrieben
+            entries.append((name, size))
+            entries.sort()
+            excess, entries[:] = entries[:-max_n], entries[-max_n:]
+        for old, _ in excess:
+            try:
+                (vdir / old).unlink()
+            except OSError:
+                pass
+        return name
+
+    def _exclude_from_git(self) -> None:
+        """Backups nie mitcommitten (z. B. beim Mirror mit add -A): Eintrag in .git/info/exclude."""
+        if self._excluded:
+            return
+        self._excluded = True
+        excl = self.root / ".git" / "info" / "exclude"
+        if not excl.parent.parent.is_dir():
+            return
+        line = f"/{BACKUP_DIRNAME}/"
+        try:
+            text = excl.read_text(encoding="utf-8") if excl.exists() else ""
+            if line not in text.splitlines():
+                excl.parent.mkdir(exist_ok=True)
+                with open(excl, "a", encoding="utf-8") as fh:
+                    fh.write(("" if not text or text.endswith("\n") else "\n") + line + "\n")
+        except OSError:
+            pass
+
+
+_INDEXES: Dict[str, BackupIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def backup_index(root: Path) -> BackupIndex:
+    """Geteilter Backup-Index je Projekt (Watcher schreibt, Routen lesen)."""
+    key = str(Path(root).expanduser().resolve())
+    with _INDEXES_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is None:
+            idx = _INDEXES[key] = BackupIndex(Path(key))
+        return idx
+
+
+# -----------------------------
+# Commits & Diffs
+# -----------------------------
+def file_commits(repo: Repo, rel: str, skip: int = 0, limit: int = 20, ref: str = "HEAD") -> List[Dict[str, str]]:
+    """Commits, die `rel` berühren – seitenweise über --skip/--max-count statt des ganzen Logs."""
+    try:
+        out = repo.git.log(
+            ref, f"--skip={max(0, skip)}", f"--max-count={max(1, limit)}",
+            "--format=%H%x1f%an%x1f%aI%x1f%s", "--", rel,
+        )
+    except GitCommandError:
+        if ref != "HEAD":
+            return file_commits(repo, rel, skip, limit)  # WIP-Branch gibt es noch nicht
+        return []  # ungeborener Branch
+    commits = []
+    for line in out.splitlines():
+        sha, author, ts, subject = (line.split("\x1f") + ["", "", ""])[:4]
+        commits.append({"sha": sha, "author": author, "ts": ts, "subject": subject})
+    return commits
+
+
+def _is_rev(spec: str) -> bool:
+    if spec.startswith("-"):
+        raise ValueError(f"ungültige Version: {spec}")  # nie als git-Option durchreichen
+    return spec != WORKTREE and not spec.startswith(BACKUP_PREFIX)
+
+
+def _verify_rev(repo: Repo, spec: str) -> None:
+    try:
+        repo.git.rev_parse("--verify", "-q", f"{spec}^{{object}}")
+    except GitCommandError:
+        raise FileNotFoundError(f"Version unbekannt: {spec}")
+
+
+def commit_parent(repo: Repo, sha: str) -> str:
+    """Vorgänger eines Commits; beim ersten Commit der leere Baum (Diff = ganze Datei neu)."""
+    _is_rev(sha)
+    try:
+        return repo.git.rev_parse("--verify", "-q", f"{sha}^")
+    except GitCommandError:
+        return repo.git.hash_object("-t", "tree", os.devnull)
+
+
+def _side_path(root: Path, idx: BackupIndex, rel: str, spec: str) -> Path:
+    if spec == WORKTREE:
+        return root / rel
+    return idx.path(rel, spec[len(BACKUP_PREFIX):])
+
+
+def _check_size(*paths: Path) -> None:
+    for p in paths:
+        try:
+            if p.stat().st_size > MAX_DIFF_BYTES:
+                raise ValueError(f"Datei zu groß für Diff: {p.name}")
+        except FileNotFoundError:
+            pass
+
+
+def iter_diff(repo: Repo, root: Path, rel: str, a: str, b: str = WORKTREE) -> Iterator[str]:
+    """
+    Unified Diff zwischen zwei Versionen (Commit/Ref, backup:<name>, worktree), zeilenweise
+    aus dem laufenden git-Prozess gelesen – wer nur eine Seite braucht, bricht früh ab.
+    """
+    idx = backup_index(root)
+    tmp_files: List[str] = []
+    for spec in (a, b):
+        if _is_rev(spec):
+            _verify_rev(repo, spec)
+
+    def as_path(spec: str) -> Path:
+        if not _is_rev(spec):
+            return _side_path(root, idx, rel, spec)
+        # Commit-Seite gegen eine Datei außerhalb von git: Blob in eine Temp-Datei
+        data = _rev_bytes(repo, rel, spec)
+        fd, name = tempfile.mkstemp(prefix="gas-diff-", suffix=Path(rel).suffix)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        tmp_files.append(name)
+        return Path(name)
+
+    if _is_rev(a) and _is_rev(b):
+        args = [a, b, "--", rel]
+    elif _is_rev(a) and b == WORKTREE:
+        _check_size(root / rel)
+        args = [a, "--", rel]
+    elif a == WORKTREE and _is_rev(b):
+        _check_size(root / rel)
+        args = ["-R", b, "--", rel]
+    else:
+        pa, pb = as_path(a), as_path(b)
+        _check_size(pa, pb)
+        args = ["--no-index", "--", str(pa), str(pb)]
+
+    proc = repo.git.diff("--no-color", *args, as_process=True)
+    try:
+        for raw in proc.proc.stdout:
+            yield raw.decode("utf-8", errors="replace").rstrip("\n")
+    finally:
+        # früher Abbruch (Seite voll): git nicht zu Ende rechnen lassen
+        try:
+            proc.proc.stdout.close()
+            proc.proc.kill()
+            proc.proc.wait()
+        except Exception:
+            pass
+        for name in tmp_files:
+            try:
+                os.unlink(name)
+            except OSError:
+                pass
+
+
+def diff_page(repo: Repo, root: Path, rel: str, a: str, b: str = WORKTREE,
+              offset: int = 0, limit: int = DIFF_PAGE_LINES) -> Dict:
+    """Eine Seite des Diffs; next_offset = None, wenn nichts mehr folgt."""
+    offset, limit = max(0, offset), max(1, limit)
+    lines: List[str] = []
+    more = False
+    gen = iter_diff(repo, root, rel, a, b)
+    try:
+        for i, line in enumerate(gen):
+            if i < offset:
+                continue
+            if len(lines) == limit:
+                more = True
+                break
+            lines.append(line)
+    finally:
+        gen.close()
+    return {"lines": lines, "offset": offset, "next_offset": offset + len(lines) if more else None}
+
+
+# -----------------------------
+# Wiederherstellen
+# -----------------------------
+def _rev_bytes(repo: Repo, rel: str, rev: str) -> bytes:
+    _is_rev(rev)
+    try:
+        return repo.git.show(f"{rev}:{rel}", stdout_as_string=False, strip_newline_in_stdout=False)
+    except GitCommandError:
+        raise FileNotFoundError(f"{rel} gibt es in {rev} nicht")
+
+
+def restore(repo: Repo, root: Path, rel: str, version: str, max_backups: int,
+            large_store: Optional[LargeFileStore] = None) -> Dict[str, str]:
+    """
+    Datei auf eine Version (backup:<name> oder Commit) zurücksetzen. Der aktuelle Stand wird
+    vorher selbst als Backup abgelegt – das Zurücksetzen lässt sich also wieder zurücknehmen.
+    Der Watcher übernimmt die Änderung danach wie jede andere.
+    """
+    root = Path(root)
+    idx = backup_index(root)
+    dest = root / rel
+    if version == WORKTREE:
+        raise ValueError("worktree ist bereits der aktuelle Stand")
+    if _is_rev(version):
+        data = _rev_bytes(repo, rel, version)
+        # große Datei als Pointer im Commit: Inhalt aus dem lokalen Objektspeicher
+        if len(data) < 1024 and parse_pointer(data.decode("utf-8", errors="replace")):
+            store = large_store or LargeFileStore()
+            if dest.exists():
+                idx.add(rel, dest, max(1, max_backups))
+            if not store.restore(data.decode("utf-8"), dest):
+                raise FileNotFoundError(f"Objekt für {rel} fehlt im lokalen Speicher")
+            return {"path": rel, "version": version}
+    else:
+        data = idx.path(rel, version[len(BACKUP_PREFIX):]).read_bytes()
+
+    saved = idx.add(rel, dest, max(1, max_backups)) if dest.exists() else None
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.restore")
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    if dest.exists():
+        shutil.copymode(dest, tmp)
+    os.replace(tmp, dest)
+    out = {"path": rel, "version": version}
+    if saved:
+        out["previous"] = BACKUP_PREFIX + saved
+    return out
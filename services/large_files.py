@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from models.config import ConfigSnapshot
+from utils.fs import atomic_write_text
+
+LFS_ROOT = Path.home() / ".github_auto_sync" / "lfs"
+POINTER_SPEC = "https://git-lfs.github.com/spec/v1"
+
+SAMPLE_BYTES = 1024 * 1024  # je Stichprobe (Anfang, Mitte, Ende)
+COPY_CHUNK = 4 * 1024 * 1024
+
+
+def threshold_bytes(cfg: ConfigSnapshot) -> int:
+    """Schwelle aus der Config (MB); 0 = keine Sonderbehandlung."""
+    mb = cfg.large_file_threshold_mb
+    return int(mb * 1024 * 1024) if mb > 0 else 0
+
+
+def sampled_digest(path: Path, size: Optional[int] = None, sample: int = SAMPLE_BYTES) -> str:
+    """
+    Schneller Änderungs-Digest für große Dateien: Größe + je `sample` Bytes von Anfang,
+    Mitte und Ende. Liest höchstens 3 MB statt der ganzen Datei. Präfix "s:", damit er
+    nie mit einem vollen sha256 verwechselt wird.
+    """
+    try:
+        if size is None:
+            size = path.stat().st_size
+        h = hashlib.sha256(str(size).encode("ascii"))
+        with open(path, "rb") as fh:
+            for off in (0, max(0, size // 2 - sample // 2), max(0, size - sample)):
+                fh.seek(off)
+                h.update(fh.read(sample))
+        return "s:" + h.hexdigest()
+    except Exception:
+        return ""
+
+
+def pointer_text(oid: str, size: int) -> str:
+    return f"version {POINTER_SPEC}\noid sha256:{oid}\nsize {size}\n"
+
+
+def parse_pointer(text: str) -> Optional[Tuple[str, int]]:
+    """(oid, size) aus einem Pointer, sonst None."""
+    fields: Dict[str, str] = {}
+    for line in text.splitlines():
+        k, _, v = line.partition(" ")
+        fields[k] = v
+    oid = fields.get("oid", "")
+    if fields.get("version") != POINTER_SPEC or not oid.startswith("sha256:"):
+        return None
+    try:
+        return oid[len("sha256:"):], int(fields.get("size", ""))
+    except ValueError:
+        return None
+
+
+class StoredObject(NamedTuple):
+    oid: str
+    size: int
+    pointer: str
+
+
+class LargeFileStore:
+    """
+    Lokaler, inhaltsadressierter Speicher für große Dateien (LFS-artig):
+      objects/<oid[:2]>/<oid[2:4]>/<oid>   – Inhalt, projektübergreifend dedupliziert
+      Manifest je Projekt (rel -> oid)     – welche Pfade im Index nur als Pointer stehen
+    Im Repo landet nur der Pointer-Text; die Arbeitskopie behält die echte Datei.
+    """
+
+    def __init__(self, manifest_path: Optional[Path] = None, root: Path = LFS_ROOT):
+        self.objects = Path(root) / "objects"
+        self.manifest_path = manifest_path
+        self._tracked: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    # ---------- Objekte ----------
+    def object_path(self, oid: str) -> Path:
+        return self.objects / oid[:2] / oid[2:4] / oid
+
+    def put(self, path: Path) -> StoredObject:
+        """Datei in einem Durchgang hashen und kopieren (feste Blockgröße, konstanter Speicher)."""
+        self.objects.mkdir(parents=True, exist_ok=True)
+        tmp = self.objects / f".incoming.{os.getpid()}.{threading.get_ident()}"
+        h = hashlib.sha256()
+        size = 0
+        try:
+            with open(path, "rb") as src, open(tmp, "wb") as dst:
+                while True:
+                    chunk = src.read(COPY_CHUNK)
+                    if not chunk:
+                        break
+                    h.update(chunk)
+                    dst.write(chunk)
+                    size += len(chunk)
+            oid = h.hexdigest()
+            target = self.object_path(oid)
+            if target.exists():
+                tmp.unlink()
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, target)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return StoredObject(oid, size, pointer_text(oid, size))
+
+    def restore(self, pointer: str, dest: Path) -> bool:
+        """Inhalt zu einem Pointer wiederherstellen; False = Objekt fehlt."""
+        parsed = parse_pointer(pointer)
+        if not parsed:
+            return False
+        src = self.object_path(parsed[0])
+        if not src.exists():
+            return False
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.restore")
+        with open(src, "rb") as fh, open(tmp, "wb") as out:
+            while True:
+                chunk = fh.read(COPY_CHUNK)
+                if not chunk:
+                    break
+                out.write(chunk)
+        os.replace(tmp, dest)
+        return True
+
+    # ---------- Manifest ----------
+    def _load(self) -> None:
+        if not self.manifest_path or not self.manifest_path.exists():
+            return
+        try:
+            self._tracked = {str(k): str(v) for k, v in json.loads(self.manifest_path.read_text(encoding="utf-8")).items()}
+        except Exception:
+            self._tracked = {}
+
+    def _save(self) -> None:
+        if self.manifest_path:
+            atomic_write_text(self.manifest_path, json.dumps(self._tracked, indent=1, sort_keys=True))
+
+    def tracked(self, rel: str) -> Optional[str]:
+        with self._lock:
+            return self._tracked.get(rel)
+
+    def tracked_under(self, rel_dir: str) -> List[str]:
+        prefix = rel_dir.rstrip("/") + "/"
+        with self._lock:
+            return [k for k in self._tracked if k.startswith(prefix)]
+
+    def track(self, entries: Dict[str, str]) -> None:
+        if not entries:
+            return
+        with self._lock:
+            self._tracked.update(entries)
+            self._save()
+
+    def untrack(self, rels: List[str]) -> None:
+        with self._lock:
+            removed = [r for r in rels if self._tracked.pop(r, None) is not None]
+            if removed:
+                self._save()
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.fs import atomic_write_text
+
+LOG_ROOT = Path.home() / ".github_auto_sync" / "logs"
+LOGGER_NAME = "github_auto_sync"
+CURRENT_NAME = "sync.jsonl"
+INDEX_NAME = "index.json"
+TS_LEN = 26  # 2026-01-31T12:00:00.123456
+TS_PREFIX = '{"ts":"'
+
+# Standard-Attribute eines LogRecords – alles andere kam über extra={...} und wird mitgeschrieben
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+def _ts(created: float) -> str:
+    return datetime.fromtimestamp(created).strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Eine Zeile JSON je Eintrag; "ts" steht immer vorn (Zeitvergleich ohne json.loads)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": _ts(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for k, v in record.__dict__.items():
+            if k not in _RECORD_ATTRS and not k.startswith("_"):
+                entry[k] = v
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+def _line_ts(line: str) -> str:
+    return line[len(TS_PREFIX):len(TS_PREFIX) + TS_LEN] if line.startswith(TS_PREFIX) else ""
+
+
+class _GzipRotatingHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotiert nach Größe in zeitgestempelte .gz-Dateien (statt .1/.2 umzubenennen) und
+    führt dazu einen Index mit Zeitspanne und Zeilenzahl je Datei.
+    Läuft nur im Listener-Thread – der Zustand braucht kein Lock.
+    """
+
+    def __init__(self, sink: "LogSink", max_bytes: int, keep: int):
+        super().__init__(sink.directory / CURRENT_NAME, maxBytes=max_bytes, backupCount=keep, encoding="utf-8")
+        self.sink = sink
+        self._first = sink._first_ts_of_current()
+        self._last = ""
+        self._lines = 0
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        done = getattr(record, "_flush", None)
+        if done is not None:
+            # Marker von LogSink.flush(): alles davor ist geschrieben
+            self.flush()
+            done.set()
+            return True
+        return super().handle(record)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        super().emit(record)  # rotiert ggf. vorher – der Eintrag zählt dann schon zur neuen Datei
+        ts = _ts(record.created)
+        self._first = self._first or ts
+        self._last = ts
+        self._lines += 1
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        src = Path(self.baseFilename)
+        if src.exists() and src.stat().st_size:
+            stamp = "".join(c for c in (self._first or _ts(os.path.getmtime(src))) if c.isalnum())
+            dst = src.with_name(f"sync-{stamp}.jsonl.gz")
+            n = 1
+            while dst.exists():  # gleicher Start-Zeitstempel wie die vorige Datei (Log-Sturm)
+                dst = src.with_name(f"sync-{stamp}-{n}.jsonl.gz")
+                n += 1
+            with open(src, "rb") as fh, gzip.open(dst, "wb", compresslevel=6) as out:
+                shutil.copyfileobj(fh, out)
+            src.unlink()
+            self.sink._add_to_index(dst.name, self._first, self._last, self._lines, self.backupCount)
+        self._first, self._last, self._lines = "", "", 0
+        self.stream = self._open()
+
+
+class LogSink:
+    """
+    Strukturierte Log-Ablage auf der Platte: Aufrufer legen Einträge nur in eine Queue
+    (QueueHandler), ein Listener-Thread schreibt JSON Lines, rotiert nach Größe und
+    komprimiert alte Dateien. read() blättert rückwärts, ohne ganze Dateien zu laden.
+    """
+
+    def __init__(self, directory: Path = LOG_ROOT, max_bytes: int = 5 * 1024 * 1024, keep: int = 20):
+        self.directory = Path(directory)
+        self.max_bytes = max(64 * 1024, int(max_bytes))
+        self.keep = max(1, int(keep))
+        self._queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._queue_handler: Optional[logging.handlers.QueueHandler] = None
+        self._index_lock = threading.Lock()
+
+    # ---------- Lebenszyklus ----------
+    def start(self, max_bytes: Optional[int] = None, keep: Optional[int] = None) -> None:
+        if self._listener:
+            return
+        if max_bytes:
+            self.max_bytes = max(64 * 1024, int(max_bytes))
+        if keep:
+            self.keep = max(1, int(keep))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        handler = _GzipRotatingHandler(self, self.max_bytes, self.keep)
+        handler.setFormatter(JsonLineFormatter())
+        self._listener = logging.handlers.QueueListener(self._queue, handler, respect_handler_level=False)
+        self._listener.start()
+        self._queue_handler = logging.handlers.QueueHandler(self._queue)
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.addHandler(self._queue_handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False  # nicht zusätzlich auf stdout
+
+    def stop(self) -> None:
+        """Queue leeren, Datei schließen (Einträge bis hierher sind danach auf der Platte)."""
+        if not self._listener:
+            return
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.removeHandler(self._queue_handler)
+        logger.propagate = True
+        self._listener.stop()
+        for h in self._listener.handlers:
+            h.close()
+        self._listener = None
+        self._queue_handler = None
+
+    def running(self) -> bool:
+        return self._listener is not None
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wartet, bis alles bisher Geloggte geschrieben ist (Marker durch die Queue)."""
+        if not self._listener:
+            return True
+        done = threading.Event()
+        self._queue.put(logging.makeLogRecord({"_flush": done}))
+        return done.wait(timeout)
+
+    # ---------- Index ----------
+    def _index_path(self) -> Path:
+        return self.directory / INDEX_NAME
+
+    def _load_index(self) -> List[Dict[str, Any]]:
+        try:
+            data = json.loads(self._index_path().read_text(encoding="utf-8"))
+            return data if isinstance(data, list) else []
+        except (OSError, ValueError):
+            return []
+
+    def _add_to_index(self, name: str, start: str, end: str, lines: int, keep: int) -> None:
+        with self._index_lock:
+            entries = [e for e in self._load_index() if (self.directory / e.get("file", "")).exists()]
+            entries.append({"file": name, "start": start, "end": end, "lines": lines})
+            entries.sort(key=lambda e: e["start"])
+            excess, entries = entries[:-keep], entries[-keep:]
+            for e in excess:
+                try:
+                    (self.directory / e["file"]).unlink()
+                except OSError:
+                    pass
+            atomic_write_text(self._index_path(), json.dumps(entries, indent=0))
+
+    def _first_ts_of_current(self) -> str:
+        try:
+            with open(self.directory / CURRENT_NAME, encoding="utf-8") as fh:
+                return _line_ts(fh.readline())
+        except OSError:
+            return ""
+
+    def files(self) -> List[Dict[str, Any]]:
+        """Alle Log-Dateien mit Zeitspanne, älteste zuerst (die aktuelle ohne Ende/Zeilenzahl)."""
+        with self._index_lock:
+            entries = [e for e in self._load_index() if (self.directory / e.get("file", "")).exists()]
+        cur = self.directory / CURRENT_NAME
+        if cur.exists():
+            entries.append({"file": CURRENT_NAME, "start": self._first_ts_of_current(), "end": "", "lines": None})
+        return entries
+
+    # ---------- Lesen ----------
+    def _iter_lines(self, name: str) -> Iterator[str]:
+        path = self.directory / name
+        opener = gzip.open if name.endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8", errors="replace") as fh:
+                for line in fh:
+                    yield line
+        except (OSError, EOFError):
+            return  # gerade rotiert / abgeschnitten
+
+    def read(self, before: str = "", since: str = "", limit: int = 200, skip: int = 0) -> Dict[str, Any]:
+        """
+        Einträge mit since <= ts <= before, neueste zuerst, höchstens `limit`; von den Einträgen
+        mit ts == before werden die neuesten `skip` übersprungen (schon auf der Vorseite).
+        Weiterblättern mit before=next_before, skip=next_skip – so geht bei gleichen
+        Zeitstempeln an der Seitengrenze nichts verloren.
+        Dateien außerhalb der Zeitspanne werden über den Index übersprungen; je Datei
+        wird vorwärts gestreamt und nur ein Fenster von `limit` (+ skip) Zeilen gehalten.
+        """
+        limit = max(1, int(limit))
+        to_skip = max(0, int(skip)) if before else 0
+        out: List[Dict[str, Any]] = []
+        for f in reversed(self.files()):
+            if before and f["start"] and f["start"] > before:
+                continue
+            if since and f["end"] and f["end"] < since:
+                break  # ältere Dateien liegen erst recht davor
+            window: deque = deque(maxlen=limit - len(out) + to_skip)
+            for line in self._iter_lines(f["file"]):
+                ts = _line_ts(line)
+                if not ts:
+                    continue
+                if before and ts > before:
+                    break  # Zeilen sind chronologisch
+                if since and ts < since:
+                    continue
+                window.append(line)
+            for line in reversed(window):
+                if to_skip and _line_ts(line) == before:
+                    to_skip -= 1
+                    continue
+                if len(out) >= limit:
+                    break
+                try:
+                    out.append(json.loads(line))
+                except ValueError:
+                    continue
+            if len(out) >= limit:
+                break
+        if len(out) < limit:
+            return {"entries": out, "next_before": None, "next_skip": 0}
+        last = out[-1]["ts"]
+        same = sum(1 for e in out if e["ts"] == last)
+        return {"entries": out, "next_before": last, "next_skip": same + (skip if last == before else 0)}
+
+LOG_SINK = LogSink()
@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import errno
+import os
+import sys
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Set
+
+from watchdog.events import FileCreatedEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
+from watchdog.observers.polling import PollingObserverVFS
+
+try:  # nur unter Linux vorhanden
+    from watchdog.observers.inotify import InotifyEmitter
+    from watchdog.observers.inotify_c import inotify_rm_watch
+except Exception:  # pragma: no cover - macOS/Windows
+    InotifyEmitter = None  # type: ignore[assignment,misc]
+    inotify_rm_watch = None  # type: ignore[assignment]
+
+MAX_USER_WATCHES_PATH = "/proc/sys/fs/inotify/max_user_watches"
+# private Attribute von watchdogs Inotify (getestet mit watchdog 4–6, siehe requirements.txt)
+INOTIFY_INTERNALS = ("fd", "add_watch", "_lock", "_wd_for_path", "_path_for_wd")
+SWITCH_GRACE_SEC = 1.5  # alter Observer läuft beim Wechsel auf Polling noch so lange mit
+
+
+def max_user_watches() -> Optional[int]:
+    try:
+        return int(Path(MAX_USER_WATCHES_PATH).read_text().strip())
+    except Exception:
+        return None
+
+
+def iter_scoped_dirs(root: str, excluded: Callable[[str], bool]) -> Iterator[str]:
+    """Alle Ordner unterhalb von root (inkl. root), ausgeschlossene Teilbäume werden gar nicht betreten."""
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        yield d
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False) and not excluded(e.name):
+                        stack.append(e.path)
+        except OSError:
+            continue
+
+
+class WatchdogInternalsMissing(RuntimeError):
+    """Diese watchdog-Version hat die genutzten Interna nicht – ScopedObserver nimmt den Standard-Observer."""
+
+
+def _inotify_of(emitter) -> object:
+    """Inotify-Objekt hinter dem Emitter (Emitter._inotify = InotifyBuffer, dessen _inotify = Inotify)."""
+    ino = getattr(getattr(emitter, "_inotify", None), "_inotify", None)
+    missing = [a for a in INOTIFY_INTERNALS if not hasattr(ino, a)] if ino is not None else ["_inotify"]
+    if missing:
+        raise WatchdogInternalsMissing(f"watchdog-Interna fehlen: {', '.join(missing)}")
+    return ino
+
+
+# -----------------------------
+# inotify nur für nicht ausgeschlossene Ordner
+# -----------------------------
+if InotifyEmitter is not None:
+
+    class _ScopedInotifyEmitter(InotifyEmitter):
+        """
+        InotifyEmitter mit nicht-rekursiver Root-Watch; Unterordner fügt ScopedObserver
+        selbst hinzu (statt watchdogs os.walk über node_modules, .venv, ...).
+        """
+
+        def __init__(self, *args, scope: "ScopedObserver", **kwargs):
+            super().__init__(*args, **kwargs)
+            self._scope = scope
+
+        def on_thread_start(self) -> None:
+            super().on_thread_start()
+            self._scope._attach(_inotify_of(self))
+
+
+class _ScopeDispatcher(FileSystemEventHandler):
+    """Hält die Watch-Menge aktuell (neue/gelöschte/verschobene Ordner) und reicht Events weiter."""
+
+    def __init__(self, scope: "ScopedObserver", handler: FileSystemEventHandler):
+        self.scope = scope
+        self.handler = handler
+
+    def dispatch(self, event):
+        if event.is_directory and self.scope.mode == "inotify":
+            if event.event_type == "created":
+                self.scope._on_dir_created(event.src_path, self.handler)
+            elif event.event_type == "deleted":
+                self.scope._drop_subtree(event.src_path)
+            elif event.event_type == "moved":
+                self.scope._move_subtree(event.src_path, event.dest_path)
+        self.handler.dispatch(event)
+
+
+class ScopedObserver:
+    """
+    Beobachtet einen Projektordner mit möglichst wenigen Kernel-Ressourcen:
+      - Linux: eine inotify-Instanz, Watches nur für nicht ausgeschlossene Ordner,
+        begrenzt durch `budget` (0 = automatisch aus max_user_watches)
+      - Budget/Kernel-Limit erreicht: automatischer Wechsel auf Polling (scandir-Snapshots,
+        ausgeschlossene Ordner werden nicht gelistet)
+      - macOS/Windows: watchdogs nativer rekursiver Observer (eine Watch je Root)
+      - watchdog-Version ohne die genutzten Interna: ebenfalls der native Observer
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        exclude_names: Set[str],
+        log,
+        budget: int = 0,
+        poll_interval: float = 2.0,
+        force_polling: bool = False,
+    ):
+        self.root = str(Path(root))
+        self.exclude_names = set(exclude_names)
+        self.log = log
+        self.poll_interval = float(poll_interval)
+        self.force_polling = force_polling
+        self.limit = max_user_watches()
+        if budget > 0:
+            self.budget = budget
+        elif self.limit:
+            # anderen Programmen (IDE, Dropbox, ...) Luft lassen
+            self.budget = max(1, int(self.limit * 0.9))
+        else:
+            self.budget = 0
+
+        self.mode = ""
+        self._observer: Optional[BaseObserver] = None
+        self._handler: Optional[FileSystemEventHandler] = None
+        self._inotify = None
+        self._watched: Set[str] = set()
+        self._lock = threading.RLock()
+
+    # ---------- Steuerung ----------
+    def schedule(self, handler: FileSystemEventHandler) -> None:
+        self._handler = handler
+
+    def start(self) -> None:
+        if self.force_polling:
+            self._start_polling("erzwungen")
+        elif InotifyEmitter is not None and sys.platform.startswith("linux"):
+            needed = sum(1 for _ in iter_scoped_dirs(self.root, self._excluded))
+            if self.budget and needed > self.budget:
+                self._start_polling(f"{needed} Ordner > Watch-Budget {self.budget}")
+            else:
+                try:
+                    self._start_inotify()
+                except WatchdogInternalsMissing as e:
+                    self.log.add(f"Watcher: {e} – Standard-Observer (rekursiv, ohne Ausschlüsse)")
+                    self._start_native()
+                except OSError as e:
+                    self._start_polling(f"inotify: {e}")
+        else:
+            self._start_native()
+
+    def stop(self) -> None:
+        with self._lock:
+            obs = self._observer
+            self._observer = None
+            self._inotify = None
+            self._watched.clear()
+        if obs:
+            obs.stop()
+            obs.join(timeout=3)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            watches = len(self._watched) if self.mode == "inotify" else (1 if self.mode == "native" else 0)
+            return {
+                "mode": self.mode,
+                "watches": watches,
+                "budget": self.budget,
+                "max_user_watches": self.limit,
+                "poll_interval_sec": self.poll_interval if self.mode == "polling" else None,
+            }
+
+    def set_exclude_names(self, names: Set[str]) -> None:
+        """Ausschlüsse live ändern: Watches neu ausgeschlossener Ordner freigeben, wieder
+        eingeschlossene Ordner nachträglich beobachten (Polling liest die Menge je Snapshot)."""
+        with self._lock:
+            self.exclude_names = set(names)
+            if self.mode != "inotify":
+                return
+            root_len = len(self.root) + 1
+            dropped = [
+                d for d in self._watched
+                if d != self.root and any(self._excluded(part) for part in d[root_len:].split(os.sep))
+            ]
+        for d in sorted(dropped, key=len):
+            self._drop_subtree(d)
+        self._add_subtree(self.root)
+
+    # ---------- Modi ----------
+    def _excluded(self, name: str) -> bool:
+        return name in self.exclude_names
+
+    def _start_native(self) -> None:
+        obs = Observer()
+        obs.schedule(self._handler, self.root, recursive=True)
+        obs.start()
+        self._observer = obs
+        self.mode = "native"
+
+    def _start_inotify(self) -> None:
+        obs = BaseObserver(partial(_ScopedInotifyEmitter, scope=self))  # type: ignore[arg-type]
+        obs.schedule(_ScopeDispatcher(self, self._handler), self.root, recursive=False)
+        self.mode = "inotify"
+        try:
+            obs.start()  # ruft _attach() -> Watches für alle Unterordner
+        except (OSError, WatchdogInternalsMissing):
+            obs.stop()
+            self.mode = ""
+            raise
+        self._observer = obs
+
+    def _start_polling(self, reason: str) -> None:
+        def listdir(path):
+            # ausgeschlossene Ordner gar nicht erst in den Snapshot aufnehmen
+            return (
+                e for e in os.scandir(path)
+                if not (e.is_dir(follow_symlinks=False) and self._excluded(e.name))
+            )
+
+        obs = PollingObserverVFS(os.stat, listdir, polling_interval=self.poll_interval)  # type: ignore[arg-type]
+        obs.schedule(self._handler, self.root, recursive=True)
+        obs.start()  # Snapshot wird hier erstellt
+        with self._lock:
+            old = self._observer
+            self._observer = obs
+            self._inotify = None
+            self._watched.clear()
+            self.mode = "polling"
+        self.log.add(f"Watcher: Polling-Modus ({reason}), Intervall {self.poll_interval:g}s")
+        if old is not None:
+            # Alten Observer kurz weiterlaufen lassen, damit bereits gepufferte Events (inotify
+            # paart Moves mit 0,5 s Verzögerung) noch ankommen; Doppelte verdichtet der Handler.
+            # Nicht aus dessen eigenem Dispatch-Thread joinen.
+            def _retire():
+                time.sleep(SWITCH_GRACE_SEC)
+                old.stop()
+                old.join(timeout=3)
+
+            threading.Thread(target=_retire, daemon=True).start()
+
+    # ---------- inotify-Watches ----------
+    def _attach(self, inotify) -> None:
+        with self._lock:
+            self._inotify = inotify
+            self._watched = {self.root}
+        for d in iter_scoped_dirs(self.root, self._excluded):
+            if d != self.root:
+                self._add_watch(d)
+
+    def _add_watch(self, d: str) -> None:
+        with self._lock:
+            if self._inotify is None or d in self._watched:
+                return
+            if self.budget and len(self._watched) >= self.budget:
+                raise OSError(errno.ENOSPC, f"Watch-Budget {self.budget} erreicht")
+            self._inotify.add_watch(os.fsencode(d))
+            self._watched.add(d)
+
+    def _add_subtree(self, top: str) -> bool:
+        """Watches für top und alle nicht ausgeschlossenen Unterordner; False = Fallback ausgelöst."""
+        try:
+            rel = Path(top).relative_to(self.root)
+        except ValueError:
+            return True
+        if any(self._excluded(part) for part in rel.parts):
+            return True
+        try:
+            for d in iter_scoped_dirs(top, self._excluded):
+                self._add_watch(d)
+        except OSError as e:
+            if e.errno in (errno.ENOSPC, errno.EMFILE):
+                self._start_polling(f"Watch-Limit erreicht ({e.strerror or e})")
+                return False
+            # Ordner schon wieder weg o. ä. – ignorieren
+        return True
+
+    # Hinweis: watchdogs Inotify.remove_watch() räumt die Buchhaltung vor dem IN_IGNORED-Event
+    # ab, worauf dessen Lese-Thread mit KeyError abbricht. Deshalb werden Watches hier direkt
+    # per inotify_rm_watch entfernt (Buchhaltung räumt read_events beim IN_IGNORED selbst auf)
+    # und bei Ordner-Moves die Pfade der Unterordner umgeschrieben (wie watchdog rekursiv).
+    def _drop_subtree(self, top: str) -> None:
+        prefix = top + os.sep
+        with self._lock:
+            gone = [d for d in self._watched if d == top or d.startswith(prefix)]
+            self._watched.difference_update(gone)
+            ino = self._inotify
+            if ino is None:
+                return
+            wd_for_path = getattr(ino, "_wd_for_path", {})
+            for d in gone:
+                wd = wd_for_path.get(os.fsencode(d))
+                if wd is not None:
+                    inotify_rm_watch(ino.fd, wd)  # -1 bei bereits gelöschtem Ordner: egal
+
+    def _move_subtree(self, src: str, dest: str) -> None:
+        try:
+            rel = Path(dest).relative_to(self.root)
+            in_scope = not any(self._excluded(part) for part in rel.parts)
+        except ValueError:
+            in_scope = False
+        if not in_scope:
+            self._drop_subtree(src)
+            return
+
+        src_b, dest_b = os.fsencode(src), os.fsencode(dest)
+        prefix_b, prefix = src_b + os.sep.encode(), src + os.sep
+        with self._lock:
+            ino = self._inotify
+            if ino is not None and hasattr(ino, "_path_for_wd"):
+                with ino._lock:
+                    for path in [p for p in ino._wd_for_path if p.startswith(prefix_b)]:
+                        wd = ino._wd_for_path.pop(path)
+                        new = dest_b + path[len(src_b):]
+                        ino._wd_for_path[new] = wd
+                        ino._path_for_wd[wd] = new
+            moved = [d for d in self._watched if d == src or d.startswith(prefix)]
+            self._watched.difference_update(moved)
+            self._watched.update(dest + d[len(src):] for d in moved)
+        # falls src selbst nicht beobachtet war (z. B. aus ausgeschlossenem Ordner)
+        self._add_subtree(dest)
+
+    def _on_dir_created(self, top: str, handler: FileSystemEventHandler) -> None:
+        if not self._add_subtree(top) and self.mode != "polling":
+            return
+        # Dateien, die vor der Watch (bzw. vor dem Polling-Snapshot) entstanden sind, nachreichen
+        for d in iter_scoped_dirs(top, self._excluded):
+            try:
+                with os.scandir(d) as it:
+                    files = [e.path for e in it if e.is_file(follow_symlinks=False)]
+            except OSError:
+                continue
+            for f in files:
+                handler.dispatch(FileCreatedEvent(f))
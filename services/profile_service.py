@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import io
+import marshal
+import pstats
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+# -----------------------------
+# Opt-in Profiler (cProfile)
+# -----------------------------
+class Profiler:
+    """
+    Sammelt cProfile-Daten nur für ausgewählte Einstiegspunkte (Batch, Events, Mirror).
+    Ist der Profiler aus, kostet ein Aufruf nur eine Attribut-Abfrage.
+    Jeder profilierte Aufruf bekommt ein eigenes cProfile.Profile, die Ergebnisse werden
+    anschließend zu einem pstats.Stats zusammengeführt. Es misst immer nur ein Thread zur
+    selben Zeit: ab Python 3.12 hängt cProfile an sys.monitoring, das nur einen aktiven
+    Profiler je Prozess zulässt – parallele Aufrufe laufen ungemessen (Zähler "skipped").
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()  # genau ein aktives cProfile.Profile im Prozess
+        self._local = threading.local()
+        self._stats: Optional[pstats.Stats] = None
+        self._calls: Dict[str, int] = {}
+        self._skipped = 0
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+
+    # ---------- Steuerung ----------
+    def start(self, reset: bool = True) -> None:
+        with self._lock:
+            if reset:
+                self._stats = None
+                self._calls = {}
+                self._skipped = 0
+            self._started_at = time.time()
+            self._stopped_at = None
+            self.enabled = True
+
+    def stop(self) -> None:
+        with self._lock:
+            self.enabled = False
+            self._stopped_at = time.time()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "started_at": self._started_at,
+                "stopped_at": self._stopped_at,
+                "calls": dict(self._calls),
+                "skipped": self._skipped,
+                "has_data": self._stats is not None,
+            }
+
+    # ---------- Messung ----------
+    def wrap(self, name: str) -> Callable[[Callable], Callable]:
+        """Decorator: profiliert die Funktion nur, wenn der Profiler aktiv ist."""
+
+        def deco(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                # Schneller Pfad: deaktiviert oder bereits innerhalb eines Profils (verschachtelt)
+                if not self.enabled or getattr(self._local, "active", False):
+                    return fn(*args, **kwargs)
+                if not self._run_lock.acquire(blocking=False):
+                    self._skip()  # anderer Thread misst gerade
+                    return fn(*args, **kwargs)
+                try:
+                    prof = cProfile.Profile()
+                    try:
+                        prof.enable()
+                    except ValueError:
+                        # fremdes Profiling-Werkzeug aktiv (Debugger, Coverage …) – ungemessen weiter
+                        self._skip()
+                        return fn(*args, **kwargs)
+                    self._local.active = True
+                    try:
+                        return fn(*args, **kwargs)
+                    finally:
+                        prof.disable()
+                        self._local.active = False
+                        self._collect(name, prof)
+                finally:
+                    self._run_lock.release()
+
+            return wrapper
+
+        return deco
+
+    def _skip(self) -> None:
+        with self._lock:
+            self._skipped += 1
+
+    def _collect(self, name: str, prof: cProfile.Profile) -> None:
+        stats = pstats.Stats(prof, stream=io.StringIO())
+        with self._lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+            if self._stats is None:
+                self._stats = stats
+            else:
+                self._stats.add(stats)
+
+    # ---------- Export ----------
+    def pstats_bytes(self) -> bytes:
+        """Binärformat wie pstats.Stats.dump_stats (lesbar mit `python -m pstats` oder snakeviz)."""
+        with self._lock:
+            if self._stats is None:
+                return b""
+            return marshal.dumps(self._stats.stats)  # type: ignore[attr-defined]
+
+    def summary(self, limit: int = 40, sort: str = "cumulative") -> str:
+        with self._lock:
+            if self._stats is None:
+                return ""
+            buf = io.StringIO()
+            self._stats.stream = buf  # type: ignore[attr-defined]
+            self._stats.sort_stats(sort).print_stats(limit)
+            return buf.getvalue()
+
+
+PROFILER = Profiler()
+
+
+def profiled(name: str) -> Callable[[Callable], Callable]:
+    """Kurzform für PROFILER.wrap(name)."""
+    return PROFILER.wrap(name)
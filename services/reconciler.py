@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Set
+
+from .file_index import FileIndex
+
+
+def _lower_thread_priority() -> None:
+    """Linux: nice gilt pro Thread (tid) – der Abgleich soll Editor & Batch nie ausbremsen."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except Exception:
+        pass
+
+
+class Reconciler:
+    """
+    Hintergrund-Abgleich Baum <-> FileIndex, in kleinen Portionen:
+      - je Tick höchstens `batch_size` Einträge und `max_mb_per_tick` MB Hashing (I/O-Budget)
+      - Pause nach jedem Tick so, dass höchstens `max_duty` der Zeit gearbeitet wird (CPU-Budget)
+      - Nach einem vollständigen Durchlauf: nicht mehr gesehene Einträge = gelöscht
+    Gefundene Unterschiede gehen über `on_changes(changed, deleted)` in die normale Batch-Pipeline.
+    Der erste Durchlauf mit leerem Index baut nur die Basis auf (meldet nichts).
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        index: FileIndex,
+        is_watched_file: Callable[[Path], bool],
+        exclude_names: Set[str],
+        digest_fn: Callable[[Path], str],
+        on_changes: Callable[[List[Path], List[Path]], None],
+        log,
+        batch_size: int = 2000,
+        interval: float = 2.0,
+        max_duty: float = 0.1,
+        max_mb_per_tick: float = 64.0,
+        pass_pause: float = 300.0,
+    ):
+        self.root = Path(root)
+        self.index = index
+        self.is_watched_file = is_watched_file
+        self.exclude_names = set(exclude_names)
+        self.digest_fn = digest_fn
+        self.on_changes = on_changes
+        self.log = log
+        self.configure(batch_size, interval, max_duty, max_mb_per_tick, pass_pause)
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._walker: Optional[Iterator[os.DirEntry]] = None
+        self._seen: Set[str] = set()
+        self._bootstrap = False
+        self.passes = 0
+
+    # ---------- Steuerung ----------
+    def configure(
+        self,
+        batch_size: int = 2000,
+        interval: float = 2.0,
+        max_duty: float = 0.1,
+        max_mb_per_tick: float = 64.0,
+        pass_pause: float = 300.0,
+    ) -> None:
+        """Budgets setzen – auch im laufenden Betrieb (Config-Änderung), gilt ab dem nächsten Tick."""
+        self.batch_size = max(1, int(batch_size))
+        self.interval = max(0.0, float(interval))
+        self.max_duty = min(1.0, max(0.01, float(max_duty)))
+        self.max_bytes_per_tick = int(float(max_mb_per_tick) * 1024 * 1024)
+        self.pass_pause = max(0.0, float(pass_pause))
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        t = self._thread
+        if t:
+            t.join(timeout=5)
+        self._thread = None
+
+    def _run(self) -> None:
+        _lower_thread_priority()
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            try:
+                finished = self.tick()
+            except Exception as e:
+                self.log.add(f"Abgleich-Fehler: {e!r}")
+                finished = True
+            busy = time.monotonic() - t0
+            pause = max(self.interval, busy * (1 - self.max_duty) / self.max_duty)
+            if finished:
+                pause = max(pause, self.pass_pause)
+            self._stop.wait(pause)
+
+    # ---------- Abgleich ----------
+    def _walk(self) -> Iterator[os.DirEntry]:
+        stack = [str(self.root)]
+        while stack:
+            d = stack.pop()
+            try:
+                with os.scandir(d) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for e in entries:
+                if e.is_dir(follow_symlinks=False):
+                    if e.name not in self.exclude_names:
+                        stack.append(e.path)
+                elif e.is_file(follow_symlinks=False):
+                    yield e
+
+    def tick(self) -> bool:
+        """Eine Portion abgleichen. True = Durchlauf abgeschlossen."""
+        if self._walker is None:
+            self._walker = self._walk()
+            self._seen = set()
+            self._bootstrap = len(self.index) == 0
+
+        changed: List[Path] = []
+        hashed = 0
+        done = False
+        for _ in range(self.batch_size):
+            if self._stop.is_set():
+                return False
+            try:
+                entry = next(self._walker)
+            except StopIteration:
+                done = True
+                break
+            p = Path(entry.path)
+            if not self.is_watched_file(p):
+                continue
+            rel = p.relative_to(self.root).as_posix()
+            self._seen.add(rel)
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            known = self.index.get(rel)
+            if known and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+                continue
+            if self._bootstrap:
+                # Basis ohne Hashing; ein späterer Stat-Unterschied meldet die Datei einfach als geändert
+                self.index.put(rel, st.st_size, st.st_mtime_ns, "")
+                continue
+            d = self.digest_fn(p)
+            hashed += st.st_size
+            self.index.put(rel, st.st_size, st.st_mtime_ns, d)
+            if not known or not known[2] or known[2] != d:
+                changed.append(p)
+            if hashed >= self.max_bytes_per_tick:
+                break
+
+        deleted: List[Path] = []
+        if done:
+            if not self._bootstrap:
+                for rel in self.index.rels():
+                    # exists(): erst nach dem Vorbeilaufen angelegte Dateien nicht als gelöscht melden
+                    if rel not in self._seen and not (self.root / rel).exists():
+                        self.index.remove(rel)
+                        deleted.append(self.root / rel)
+            self._walker = None
+            self._seen = set()
+            self.passes += 1
+            self.index.save()
+
+        if changed or deleted:
+            self.on_changes(changed, deleted)
+        return done
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from git import Repo, InvalidGitRepositoryError, NoSuchPathError
+
+from .git_service import ensure_repo
+
+
+class RepoHandle:
+    """
+    Ein geteiltes Repo-Objekt je Projektpfad.
+    `lock` serialisiert Index-/Ref-Änderungen (Batch, Mirror, Push, Squash) über Threads
+    hinweg; die HEAD-sha wird gecacht, bis sich HEAD oder die Branch-Ref ändert.
+    """
+
+    def __init__(self, repo: Repo):
+        self.repo = repo
+        self.lock = threading.RLock()
+        self._head: Optional[Tuple[Tuple, Optional[str]]] = None
+
+    def _head_key(self) -> Tuple:
+        """Stat von HEAD, der Branch-Ref und packed-refs – ändert sich bei jedem Commit (auch extern)."""
+        git_dir = Path(self.repo.git_dir)
+        common = Path(self.repo.common_dir)
+        paths = [git_dir / "HEAD", common / "packed-refs"]
+        try:
+            target = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        except OSError:
+            target = ""
+        if target.startswith("ref: "):
+            paths.append(common / target[5:])
+        key = []
+        for p in paths:
+            try:
+                st = p.stat()
+                key.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except OSError:
+                key.append(None)
+        return tuple(key)
+
+    def head_sha(self) -> Optional[str]:
+        key = self._head_key()
+        cached = self._head
+        if cached and cached[0] == key:
+            return cached[1]
+        try:
+            sha: Optional[str] = self.repo.git.rev_parse("--verify", "-q", "HEAD") or None
+        except Exception:
+            sha = None  # ungeborener Branch
+        self._head = (key, sha)
+        return sha
+
+    def invalidate(self) -> None:
+        self._head = None
+
+    def close(self) -> None:
+        # beendet die persistenten cat-file-Prozesse von GitPython
+        with self.lock:
+            self.repo.close()
+
+
+class RepoRegistry:
+    """Repo-Handles nach (aufgelöstem) Pfad – geteilt von Watcher und Flask-Routen."""
+
+    def __init__(self):
+        self._handles: Dict[str, RepoHandle] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path) -> str:
+        return str(Path(path).expanduser().resolve())
+
+    def get(self, path, create: bool = True) -> RepoHandle:
+        """Handle zum Pfad; create=True legt das Repo notfalls an (wie ensure_repo)."""
+        key = self._key(path)
+        with self._lock:
+            h = self._handles.get(key)
+            if h is None:
+                h = RepoHandle(ensure_repo(Path(key)) if create else Repo(key))
+                self._handles[key] = h
+            return h
+
+    def find(self, path) -> Optional[RepoHandle]:
+        """Wie get(), aber ohne Anlegen; None, wenn dort kein Repo liegt."""
+        try:
+            return self.get(path, create=False)
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            return None
+
+    def head_sha(self, path) -> Optional[str]:
+        h = self.find(path)
+        return h.head_sha() if h else None
+
+    def close(self, path) -> None:
+        with self._lock:
+            h = self._handles.pop(self._key(path), None)
+        if h:
+            h.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+        for h in handles:
+            try:
+                h.close()
+            except Exception:
+                pass
+
+
+REGISTRY = RepoRegistry()
@@ -1,35 +1,56 @@
 from __future__ import annotations
 
 import hashlib
-import shutil
+import logging
 import threading
 import time
 import re
 from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import List, Set, Optional, Dict
+from typing import Callable, FrozenSet, List, NamedTuple, Optional, Dict, Tuple, Union
 
-from watchdog.observers import Observer
+from git import Repo
 from watchdog.events import FileSystemEventHandler
 
-from .git_service import ensure_repo, ensure_branch, ensure_remote, stage_paths, commit_and_push
-
-BACKUP_DIRNAME = ".auto_versions"
+from .git_service import (
+    ensure_branch, ensure_remote, stage_paths, stage_pointers, unskip_paths, commit_and_push,
+    push_branches, wip_prepare, wip_commit, squash_wip, push_wip, mirror_force_with_lease,
+)
+from .profile_service import profiled
+from .event_coalescer import CoalescedBatch, EventCoalescer
+from .event_journal import EventJournal, JournaledCoalescer, Record
+from .observer_service import ScopedObserver
+from .file_index import FileIndex, state_dir_for
+from .reconciler import Reconciler
+from .repo_registry import REGISTRY, RepoHandle
+from .large_files import LargeFileStore, sampled_digest, threshold_bytes
+from .history_service import BACKUP_DIRNAME, backup_index
+from models.config import ConfigSnapshot, ConfigStore
+
+# Endungen, die auch ohne Punkt in include_exts als Endung gelten (sonst: exakter Dateiname)
+BARE_EXTS = {"md", "py", "txt", "yml", "yaml", "ini", "toml", "sql", "js", "ts", "html", "css"}
+MAX_BATCH_LOG_LINES = 50  # Netto-Löschungen je Batch, danach nur noch Summe
+MAX_BATCH_BACKUPS = 500  # mehr Änderungen (Checkout, Formatter): keine Einzel-Backups, die Commits reichen
+MAX_RETRY_SEC = 300  # Obergrenze des Backoffs nach fehlgeschlagenen Batches
 
 
 # -----------------------------
 # kleines In-Memory-Log
 # -----------------------------
 class InMemoryLog:
-    def __init__(self, maxlen: int = 2000):
+    """Ringpuffer fürs Dashboard; jede Zeile geht zusätzlich an den Logger (log_sink schreibt sie auf die Platte)."""
+
+    def __init__(self, maxlen: int = 2000, logger: Optional[logging.Logger] = None):
         self._buf = deque(maxlen=maxlen)
         self._lock = threading.Lock()
+        self._logger = logger or logging.getLogger("github_auto_sync.app")
 
     def add(self, msg: str):
         with self._lock:
             ts = datetime.now().strftime("%H:%M:%S")
             self._buf.appendleft(f"[{ts}] {msg}")
+        self._logger.info(msg)
 
     def dump(self) -> List[str]:
         with self._lock:
@@ -49,6 +70,13 @@ def _display_path(project_root: Path, p: Path) -> str:
     return f"{proj}/{rel.as_posix()}"
 
 
+def _rel_posix(root: Path, p: Path) -> Optional[str]:
+    try:
+        return p.relative_to(root).as_posix()
+    except ValueError:
+        return None
+
+
 def digest(path: Path) -> str:
     try:
         h = hashlib.sha256()
@@ -60,152 +88,536 @@ def digest(path: Path) -> str:
         return ""
 
 
+def _fmt_mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.0f} MB"
+
+
 def is_watched_file(root: Path, p: Path, include_exts: List[str], exclude_dirs: List[str]) -> bool:
-  """Für die Vorschau: erlaubt Endungen (.py, .txt) **und** exakte Dateinamen (z. B. Dockerfile)."""
-  if p.is_dir():
-    return False
-  try:
-    rel = p.relative_to(root)
-  except Exception:
-    return False
-
-  # harte Ausschlüsse
-  if ".git" in rel.parts or BACKUP_DIRNAME in rel.parts:
-    return False
-  for part in rel.parts:
-    if part in exclude_dirs:
-      return False
-
-  # --- NEU: beide Arten zulassen (Endungen + exakte Namen) ---
-  inc_list = [s.strip() for s in (include_exts or []) if s.strip()]
-  if inc_list:
-    name = p.name
-    suffix = p.suffix.lower()  # inklusive Punkt, z. B. ".py"
-    # normalisierte Endungen (immer mit Punkt, lowercased)
-    norm_exts = {(e if e.startswith(".") else f".{e}").lower() for e in inc_list if
-                 "." in e or e.lower() in {"md", "py", "txt", "yml", "yaml", "ini", "toml", "sql", "js", "ts", "html",
-                                           "css"}}
-    # exakte Dateinamen (ohne Punkt), z. B. "Dockerfile", "Makefile"
-    exact_names = {e for e in inc_list if "." not in e}
-
-    if name in exact_names:
-      return True
-    if suffix in norm_exts or suffix.lstrip(".") in {e.lstrip(".") for e in norm_exts}:
-      return True
-    return False
-
-  return True
+    """Für die Vorschau: erlaubt Endungen (.py, .txt) **und** exakte Dateinamen (z. B. Dockerfile)."""
+    return _preview_match(root, p, _Filters.from_lists(include_exts, exclude_dirs))
+
+
+def _preview_match(root: Path, p: Path, f: "_Filters") -> bool:
+    if p.is_dir():
+        return False
+    try:
+        rel = p.relative_to(root)
+    except Exception:
+        return False
+    # harte Ausschlüsse
+    if ".git" in rel.parts or BACKUP_DIRNAME in rel.parts:
+        return False
+    return f.exclude_dirs.isdisjoint(rel.parts) and f.allows_name(p)
 
 
 def iter_watch_files(root: Path, include_exts: List[str], exclude_dirs: List[str]):
+    f = _Filters.from_lists(include_exts, exclude_dirs)
     for p in Path(root).rglob("*"):
-        if p.is_file() and is_watched_file(root, p, include_exts, exclude_dirs):
+        if p.is_file() and _preview_match(root, p, f):
             yield p
 
 
+def stage_large_files(
+    repo: Repo,
+    root: Path,
+    large: List[Path],
+    limit: int,
+    policy: str,
+    store: LargeFileStore,
+    log: InMemoryLog,
+    warned: Dict[str, Tuple[int, int]],
+    env: Optional[Dict[str, str]] = None,
+) -> int:
+    """
+    Dateien über der Schwelle nach large_file_policy: "store" = Pointer stagen, sonst nur
+    warnen (je Datei-Version einmal, gemerkt in `warned`). Gibt die Zahl gestageter zurück.
+    Gemeinsam für Batch und Spiegeln beim Start.
+    """
+    if policy != "store":
+        for p in large:
+            rel = _rel_posix(root, p) or str(p)
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            key = (st.st_size, st.st_mtime_ns)
+            if warned.get(rel) == key:
+                continue  # diese Version schon gemeldet
+            warned[rel] = key
+            log.add(
+                f"WARNUNG: zu groß, nicht synchronisiert: {_display_path(root, p)} "
+                f"({_fmt_mb(st.st_size)} > {_fmt_mb(limit)}; large_file_policy=store lagert aus)"
+            )
+        return 0
+
+    pointers: Dict[Path, str] = {}
+    tracked: Dict[str, str] = {}
+    for p in large:
+        rel = _rel_posix(root, p)
+        if not rel:
+            continue
+        try:
+            obj = store.put(p)
+        except OSError as e:
+            log.add(f"Fehler Large-File-Store: {_display_path(root, p)}: {e}")
+            continue
+        pointers[p] = obj.pointer
+        tracked[rel] = obj.oid
+        warned.pop(rel, None)
+        log.add(f"Große Datei als Pointer: {_display_path(root, p)} ({_fmt_mb(obj.size)}, {obj.oid[:12]})")
+    if pointers:
+        stage_pointers(repo, root, pointers, env)
+        store.track(tracked)
+    return len(pointers)
+
+
+class _Filters(NamedTuple):
+    """Aus der Config vorberechnete Filter – einmal je Config-Änderung statt je Event."""
+    exclude_dirs: FrozenSet[str]
+    exact_names: FrozenSet[str]
+    exts: FrozenSet[str]            # mit Punkt, lowercase
+    restrict: bool                  # include_exts gesetzt -> nur Endungen/Namen daraus
+    exclude_res: Tuple[re.Pattern, ...]
+    include_res: Tuple[re.Pattern, ...]
+
+    @classmethod
+    def build(cls, cfg: ConfigSnapshot) -> "_Filters":
+        return cls.from_lists(cfg.include_exts, cfg.exclude_dirs, cfg.exclude_file_patterns, cfg.include_file_patterns)
+
+    @classmethod
+    def from_lists(cls, include_exts, exclude_dirs, exclude_patterns=(), include_patterns=()) -> "_Filters":
+        inc = [e.strip() for e in include_exts or () if e.strip()]
+        return cls(
+            exclude_dirs=frozenset(exclude_dirs or ()),
+            exact_names=frozenset(e for e in inc if "." not in e),
+            exts=frozenset(
+                (e if e.startswith(".") else f".{e}").lower()
+                for e in inc
+                if "." in e or e.lower() in BARE_EXTS
+            ),
+            restrict=bool(inc),
+            exclude_res=tuple(re.compile(p) for p in exclude_patterns),
+            include_res=tuple(re.compile(p) for p in include_patterns),
+        )
+
+    def allows_name(self, p: Path) -> bool:
+        """Endungen (".py") / exakte Namen ("Dockerfile") aus include_exts; leer = alles."""
+        return not self.restrict or p.name in self.exact_names or p.suffix.lower() in self.exts
+
+
 # -----------------------------
 # Watcher
 # -----------------------------
 class WatchHandler(FileSystemEventHandler):
-    def __init__(self, root: Path, cfg: dict, log: InMemoryLog):
+    def __init__(
+        self,
+        root: Path,
+        cfg: Union[ConfigSnapshot, dict],
+        log: InMemoryLog,
+        index: Optional[FileIndex] = None,
+        large_store: Optional[LargeFileStore] = None,
+        handle: Optional[RepoHandle] = None,
+        journal: Optional[EventJournal] = None,
+    ):
         self.root = Path(root).resolve()
-        self.cfg = cfg
         self.log = log
-
-        self.repo = ensure_repo(self.root)
-        ensure_branch(self.repo, cfg.get("branch", "main"))
-        ensure_remote(self.repo, cfg.get("remote_url"))
-
-        self._changed: Set[Path] = set()
-        self._deleted: Set[Path] = set()
+        self.apply_config(ConfigSnapshot.coerce(cfg))
+        # Stat-/Digest-Index (persistent, geteilt mit dem Reconciler)
+        self.index = index if index is not None else FileIndex()
+        # Pointer-Speicher für Dateien über large_file_threshold_mb (Policy "store")
+        self.large_store = large_store if large_store is not None else LargeFileStore()
+        self._large_warned: Dict[str, Tuple[int, int]] = {}
+
+        # geteiltes Repo-Handle (Registry) – dieselben Objekte/Prozesse wie die Flask-Routen
+        self.handle = handle if handle is not None else REGISTRY.get(self.root)
+        self.repo = self.handle.repo
+        ensure_branch(self.repo, self.cfg.branch or "main")
+        ensure_remote(self.repo, self.cfg.remote_url)
+
+        # offene Events zusätzlich ins Journal (überleben Absturz/Stop im Batch-Fenster)
+        self.journal = journal
+        self._events = JournaledCoalescer(journal, self.root) if journal else EventCoalescer()
+        if journal:
+            journal.on_full = self._on_journal_full
         self._last_event: Dict[Path, float] = {}
-        self._last_digest: Dict[Path, str] = {}
         self._timer: Optional[threading.Timer] = None
         self._lock = threading.Lock()
+        # Batch, Squash, WIP-Push und Routen (Mirror, manueller Push) nie gleichzeitig
+        self._batch_lock = self.handle.lock
+        self._push_timer: Optional[threading.Timer] = None
+        self._push_due = False
+        self._push_with_branch = False  # WIP-Modus: nach einem Squash auch `branch` pushen
+        self._last_push = float("-inf")
+        self._retry_sec = 0.0  # aktueller Backoff nach fehlgeschlagenem Batch (0 = letzter Batch ok)
+        self._push_retry_sec = 0.0  # dito für einen fehlgeschlagenen Push (Commit steht bereits)
+        self._closed = False  # nach close(): keine Timer/Batches mehr (Repo-Handle wird geschlossen)
 
         Path(self.root / BACKUP_DIRNAME).mkdir(exist_ok=True)
+        self.backups = backup_index(self.root)
+
+    # ---------- Config ----------
+    def apply_config(self, cfg: ConfigSnapshot):
+        """Neuen Snapshot übernehmen und abgeleiteten Zustand einmal vorberechnen."""
+        self._filters = _Filters.build(cfg)
+        self._debounce_sec = cfg.debounce_ms / 1000.0
+        self._large_limit = threshold_bytes(cfg)
+        self.cfg = cfg
 
     # ---------- interne Helfer ----------
     def _debounced(self, p: Path) -> bool:
         now = time.time()
         last = self._last_event.get(p, 0)
         self._last_event[p] = now
-        return (now - last) * 1000 < int(self.cfg.get("debounce_ms", 600))
+        return now - last < self._debounce_sec
+
+    def _rel(self, p: Path) -> Optional[str]:
+        return _rel_posix(self.root, p)
+
+    def content_digest(self, p: Path, size: Optional[int] = None) -> str:
+        """Voller sha256 für normale Dateien, Stichproben-Digest oberhalb der Größenschwelle."""
+        limit = self._large_limit
+        if limit:
+            if size is None:
+                try:
+                    size = p.stat().st_size
+                except OSError:
+                    return ""
+            if size > limit:
+                return sampled_digest(p, size)
+        return digest(p)
 
     def _digest_changed(self, p: Path) -> bool:
-        d = digest(p) if p.exists() else ""
+        try:
+            st = p.stat()
+        except OSError:
+            return True
+        d = self.content_digest(p, st.st_size)
         if not d:
             return True
-        if self._last_digest.get(p) == d:
-            return False
-        self._last_digest[p] = d
-        return True
+        rel = self._rel(p)
+        if rel is None:
+            return True
+        known = self.index.get(rel)
+        self.index.put(rel, st.st_size, st.st_mtime_ns, d)
+        return not (known and known[2] == d)
+
+    def _index_stat(self, p: Path):
+        """Neue Datei nur per Stat vormerken (Digest folgt bei der nächsten Änderung)."""
+        rel = self._rel(p)
+        if rel is None:
+            return
+        try:
+            st = p.stat()
+        except OSError:
+            return
+        self.index.put(rel, st.st_size, st.st_mtime_ns, "")
+
+    def reconcile(self, changed: List[Path], deleted: List[Path]):
+        """Vom Reconciler gefundene Abweichungen in die normale Batch-Pipeline geben."""
+        for p in changed:
+            self._events.modified(p)
+        for p in deleted:
+            self._events.deleted(p)
+        self.log.add(f"Abgleich: {len(changed)} geändert, {len(deleted)} gelöscht (verpasste Events)")
+        self._schedule_batch()
+
+    # ---------- Journal ----------
+    def _compact_journal(self):
+        if self.journal:
+            self.journal.compact(self._events.records)
+
+    def _on_journal_full(self):
+        # nicht während eines Batches: dessen Events stehen dann nur noch im Journal
+        with self._batch_lock:
+            self._compact_journal()
+
+    def replay_journal(self, records: List[Record]):
+        """Beim Start: Events, die die letzte Sitzung nicht mehr committet hat, erneut einplanen."""
+        if not self.journal:
+            return
+        n = self._events.replay(records) if records else 0
+        self._compact_journal()
+        if n:
+            self.log.add(f"Journal: {n} offene Änderungen aus der letzten Sitzung übernommen")
+            self._schedule_batch()
+
+    def _requeue(self, batch: CoalescedBatch):
+        """Fehlgeschlagenen Batch wieder vormerken und mit wachsendem Abstand erneut einplanen."""
+        for src, dst in batch.dir_moves.items():
+            self._events.dir_moved(src, dst)
+        for d in batch.dir_deletes:
+            self._events.dir_deleted(d)
+        for dst, src in batch.renames.items():
+            self._events.moved(src, dst)  # Quelle bleibt erhalten (git erkennt den Rename)
+        renamed_from = set(batch.renames.values())
+        for p in batch.deleted:
+            if p not in renamed_from:
+                self._events.deleted(p)
+        for p in batch.changed:
+            if p not in batch.renames:
+                self._events.modified(p)
+        self._retry_sec = min(MAX_RETRY_SEC, max(1.0, self.cfg.batch_window_sec, self._retry_sec * 2))
+        self._schedule_batch(self._retry_sec)
 
     def _backup_rotate(self, p: Path):
+        rel = self._rel(p)
+        if rel is None:
+            return
+        limit = self._large_limit
         try:
-            rel = p.relative_to(self.root)
-        except Exception:
+            if limit and p.stat().st_size > limit:
+                return  # große Dateien nie nach .auto_versions kopieren
+            self.backups.add(rel, p, self.cfg.max_backups)
+        except OSError:
             return
-        vdir = self.root / BACKUP_DIRNAME / rel.with_suffix(rel.suffix + ".history")
-        vdir.parent.mkdir(parents=True, exist_ok=True)
-        vdir.mkdir(parents=True, exist_ok=True)
-        ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-        dst = vdir / f"{ts}{p.suffix}"
-        shutil.copy2(p, dst)
-        versions = sorted(vdir.glob(f"*{p.suffix}"))
-        max_n = int(self.cfg.get("max_backups", 10))
-        excess = len(versions) - max_n
-        for i in range(excess):
-            try:
-                versions[i].unlink()
-            except Exception:
-                pass
 
-    def _schedule_batch(self):
+    def _backup_changed(self, changed):
+        if not self.cfg.max_backups or len(changed) > MAX_BATCH_BACKUPS:
+            return
+        for p in changed:
+            if self._is_watched_file(p):
+                self._backup_rotate(p)
+
+    def _schedule_batch(self, delay: Optional[float] = None):
         with self._lock:
+            if self._closed:
+                return  # Events bleiben im Journal und werden beim nächsten Start nachgeholt
             if self._timer:
                 self._timer.cancel()
-            self._timer = threading.Timer(float(self.cfg.get("batch_window_sec", 60)), self._do_batch)
+            self._timer = threading.Timer(self.cfg.batch_window_sec if delay is None else delay, self._do_batch)
             self._timer.daemon = True
             self._timer.start()
 
-    def _do_batch(self):
-        # Editor-Replace (delete+create) glätten
-        both = self._changed & self._deleted
-        if both:
-            self._deleted -= both
-
+    # ---------- große Dateien ----------
+    def _release_pointers(self, batch, limit: int, env: Optional[Dict[str, str]] = None) -> None:
+        """Pointer-Pfade, die dieser Batch anfasst, für git add/rm wieder freigeben."""
+        store = self.large_store
+        rels: List[str] = []
+        keep_pointer = self.cfg.large_file_policy == "store"
+        for p in batch.changed:
+            rel = self._rel(p)
+            if not rel or not store.tracked(rel):
+                continue
+            try:
+                size = p.stat().st_size
+            except OSError:
+                continue
+            # weiterhin groß bei "skip": alten Pointer stehen lassen, sonst holt add -A die Datei
+            if keep_pointer or not limit or size <= limit:
+                rels.append(rel)
+        for p in batch.deleted:
+            rel = self._rel(p)
+            if rel and store.tracked(rel):
+                rels.append(rel)
+        for d in list(batch.dir_moves) + list(batch.dir_deletes):
+            rel = self._rel(d)
+            if rel:
+                rels.extend(store.tracked_under(rel))
+        if rels:
+            unskip_paths(self.repo, rels, env)
+            store.untrack(rels)
+
+    def _stage_large(self, large: List[Path], limit: int, env: Optional[Dict[str, str]] = None) -> int:
+        """Dateien über der Schwelle: als Pointer ablegen oder überspringen. Gibt die Zahl gestageter zurück."""
+        return stage_large_files(
+            self.repo, self.root, large, limit, self.cfg.large_file_policy,
+            self.large_store, self.log, self._large_warned, env,
+        )
+
+    def close(self):
+        """Batch- und Push-Timer abbrechen und einen gerade laufenden Batch abwarten (vor REGISTRY.close)."""
         with self._lock:
-            changed = set(self._changed)
-            deleted = set(self._deleted)
-            self._changed.clear()
-            self._deleted.clear()
+            self._closed = True
+            for t in (self._timer, self._push_timer):
+                if t:
+                    t.cancel()
+            self._timer = self._push_timer = None
+        with self._batch_lock:
+            pass  # läuft noch ein Batch/Push, ist er danach fertig; spätere sehen _closed
+
+    def flush_batch(self):
+        """Offenes Batch-Fenster nicht abwarten, sondern sofort committen (z. B. beim Herunterfahren)."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        self._do_batch()
 
+    @profiled("watch.batch")
+    def _do_batch(self):
+        with self._batch_lock:
+            if self._closed:
+                return  # Timer lief schon, als close() ihn abbrechen wollte
+            if self._run_batch():
+                self._retry_sec = 0.0
+                self._compact_journal()
+
+    def _run_batch(self) -> bool:
+        """
+        False = Batch fehlgeschlagen (Events bleiben vorgemerkt, Journal unverändert).
+        Ein Push-Fehler zählt nicht dazu: der Commit steht, nachgeholt wird nur der Push.
+        """
+        batch = self._events.drain()
+        if batch.empty():
+            return True
+        changed, deleted = batch.changed, batch.deleted
+
+        # Ordner-Operationen einmal zusammengefasst loggen (statt je Datei)
+        for src, dst in batch.dir_moves.items():
+            self.log.add(f"Ordner verschoben: {_display_path(self.root, src)} -> {_display_path(self.root, dst)}")
+        for d in batch.dir_deletes:
+            self.log.add(f"Ordner gelöscht: {_display_path(self.root, d)}")
+        renamed_from = set(batch.renames.values())
+        gone = [p for p in deleted if p not in renamed_from and self._is_watched_file(p)]
+        for p in sorted(gone)[:MAX_BATCH_LOG_LINES]:
+            self.log.add(f"Gelöscht: {_display_path(self.root, p)}")
+        if len(gone) > MAX_BATCH_LOG_LINES:
+            self.log.add(f"… und {len(gone) - MAX_BATCH_LOG_LINES} weitere gelöscht")
+
+        do_push = False
         try:
-            stage_paths(self.repo, self.root, changed, deleted)
+            self._backup_changed(changed)
+            branch = self.cfg.branch or "main"
+            wip = self._wip_branch()
+            # WIP-Modus: in eigenen Index stagen, der Haupt-Index bleibt unberührt
+            env = wip_prepare(self.repo, branch, wip) if wip else None
+
+            limit = self._large_limit
+            self._release_pointers(batch, limit, env)
+            large = stage_paths(
+                self.repo, self.root, changed, deleted, batch.dir_moves, batch.dir_deletes,
+                max_add_size=limit, env=env,
+            )
+            skipped = len(large) - self._stage_large(large, limit, env) if large else 0
+            if skipped and skipped >= len(changed) and not (deleted or batch.dir_moves or batch.dir_deletes):
+                return True  # nur übersprungene große Dateien – nichts zu committen
             # --- Commit/Push nur nach Flags, und ehrlich loggen ---
-            do_commit = bool(self.cfg.get("auto_commit", True))
-            do_push = bool(self.cfg.get("auto_push", True))
+            do_commit = self.cfg.auto_commit
+            do_push = self.cfg.auto_push
 
             if do_commit or do_push:
               proj = self.root.name
-              msg = f"{proj}: {len(changed)} updated, {len(deleted)} removed @ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+              counts = f"{max(0, len(changed) - skipped)} updated, {len(deleted)} removed"
+              moved = len(batch.renames) + len(batch.dir_moves)
+              if moved:
+                counts += f", {moved} renamed"
+              msg = f"{proj}: {counts} @ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
 
               # Diagnosezeile – hilft beim Verifizieren, dass auto_push wirklich False ist
               self.log.add(f"Batch-Flags: auto_commit={do_commit}, auto_push={do_push}")
 
-              commit_and_push(
-                self.repo,
-                self.cfg.get("branch", "main"),
-                f"auto: {msg}",
-                do_commit,
-                do_push
-              )
+              if wip:
+                  sha = wip_commit(self.repo, branch, wip, f"wip: {msg}", env) if do_commit else None
+                  if sha:
+                      self.log.add(f"WIP-Commit ({wip}): {msg}")
+              else:
+                  commit_and_push(self.repo, branch, f"auto: {msg}", do_commit, do_push=False)
+                  self.handle.invalidate()
+                  if do_commit:
+                      self.log.add(f"Commit: {msg}")
+        except Exception as e:
+            self._requeue(batch)
+            self.log.add(f"Fehler Batch: {e!r} – Änderungen bleiben vorgemerkt, neuer Versuch in {self._retry_sec:.0f} s")
+            return False
+
+        # außerhalb des try: ein Push-Fehler darf den (schon committeten) Batch nicht erneut
+        # einplanen – sonst neue Backups je Versuch, die die echte Historie wegrotieren
+        if do_push:
+            self._request_push()
+        return True
 
-              label = "Commit+Push" if do_push else "Commit"
-              self.log.add(f"{label}: {msg}")
+    # ---------- Push / WIP-Modus ----------
+    def _wip_branch(self) -> str:
+        wip = self.cfg.wip_branch
+        return "" if wip == (self.cfg.branch or "main") else wip
+
+    def _request_push(self):
+        """
+        Push nach einem Batch. WIP-Modus: höchstens alle wip_push_interval_sec, dazwischen
+        sammelt ein Flush-Timer. Steht ein fehlgeschlagener Push aus, übernimmt dessen Timer.
+        """
+        interval = self.cfg.wip_push_interval_sec if self._wip_branch() else 0
+        wait = self._last_push + interval - time.monotonic()
+        if wait <= 0 and not self._push_retry_sec:
+            self._try_push()
+        else:
+            self._schedule_push(max(wait, self._push_retry_sec))
+
+    def _schedule_push(self, delay: float):
+        with self._lock:
+            self._push_due = True
+            if self._closed:
+                return
+            if self._push_timer is None or not self._push_timer.is_alive():
+                self._push_timer = threading.Timer(delay, self.flush_push)
+                self._push_timer.daemon = True
+                self._push_timer.start()
+
+    def _push(self):
+        """WIP-Modus: WIP-Branch (+ `branch` nach einem Squash), sonst `branch`. Wirft bei Fehlern."""
+        branch = self.cfg.branch or "main"
+        wip = self._wip_branch()
+        if wip:
+            rec = push_wip(self.repo, wip, branch if self._push_with_branch else None)
+        else:
+            rec = push_branches(self.repo, [branch])
+        self._last_push = time.monotonic()
+        self._push_retry_sec = 0.0
+        with self._lock:
+            self._push_due = self._push_with_branch = False
+        if rec and not rec["skipped"]:
+            self.log.add(f"Push: {' + '.join('origin/' + r for r in rec['refs'])} ({rec['bytes']} B, {rec['duration_ms']:.0f} ms)")
+
+    def _try_push(self) -> bool:
+        """Push ausführen; schlägt er fehl, bleibt er fällig und nur er wird mit Backoff wiederholt."""
+        try:
+            self._push()
+            return True
         except Exception as e:
-            self.log.add(f"Fehler Batch: {e!r}")
+            self._push_retry_sec = min(MAX_RETRY_SEC, max(1.0, self._push_retry_sec * 2))
+            self.log.add(f"Fehler Push: {e!r} – Commit ist lokal gesichert, neuer Push-Versuch in {self._push_retry_sec:.0f} s")
+            self._schedule_push(self._push_retry_sec)
+            return False
+
+    def flush_push(self):
+        """Ausstehenden (rate-limitierten oder fehlgeschlagenen) Push sofort ausführen."""
+        with self._lock:
+            due = self._push_due
+            if self._push_timer:
+                self._push_timer.cancel()
+                self._push_timer = None
+        if not due:
+            return
+        with self._batch_lock:
+            if self._closed:
+                return
+            self._try_push()
+
+    def squash_wip(self) -> Optional[str]:
+        """Offene Events committen, dann den WIP-Stand als einen Commit auf `branch` übernehmen."""
+        wip = self._wip_branch()
+        if not wip:
+            raise RuntimeError("Kein WIP-Branch konfiguriert")
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        self._do_batch()
+        branch = self.cfg.branch or "main"
+        with self._batch_lock:
+            msg = f"{self.root.name}: squash {wip} @ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            sha = squash_wip(self.repo, branch, wip, f"auto: {msg}")
+            self.handle.invalidate()
+            if sha:
+                self.log.add(f"Squash: {wip} -> {branch} ({sha[:7]})")
+            if self.cfg.auto_push and (sha or self._push_due):
+                with self._lock:
+                    if self._push_timer:
+                        self._push_timer.cancel()
+                        self._push_timer = None
+                    self._push_with_branch = True
+                self._try_push()
+        return sha
 
     # ---------- Filter ----------
     def _is_watched_path(self, p: Path) -> bool:
@@ -219,50 +631,25 @@ class WatchHandler(FileSystemEventHandler):
         if ".git" in rel.parts or BACKUP_DIRNAME in rel.parts:
             return False
 
-        exclude_dirs = set(self.cfg.get("exclude_dirs", []))
-        for part in rel.parts:
-            if part in exclude_dirs:
-                return False
-        return True
+        return self._filters.exclude_dirs.isdisjoint(rel.parts)
 
     def _is_watched_file(self, p: Path) -> bool:
         if not self._is_watched_path(p):
             return False
+        f = self._filters
+        name = p.name
 
-        # Endungen / exakte Namen
-        inc_list = [s.strip() for s in self.cfg.get("include_exts", []) if s.strip()]
-        if inc_list:
-          name = p.name
-          suffix = p.suffix.lower()
-
-          # normalisierte Endungen (immer mit Punkt, z. B. ".py")
-          norm_exts = {
-            (e if e.startswith(".") else f".{e}").lower()
-            for e in inc_list
-            if "." in e or e.lower() in {
-              "md", "py", "txt", "yml", "yaml", "ini", "toml", "sql", "js", "ts", "html", "css"
-            }
-          }
-
-          # exakte Dateinamen (z. B. "Dockerfile", "Makefile")
-          exact_names = {e for e in inc_list if "." not in e}
-
-          if name in exact_names:
-            pass  # erlaubt
-          elif suffix in norm_exts or suffix.lstrip(".") in {e.lstrip(".") for e in norm_exts}:
-            pass  # erlaubt
-          else:
+        # Endungen (".py") / exakte Namen ("Dockerfile")
+        if not f.allows_name(p):
             return False
 
         # Regex-Excludes
-        for pat in self.cfg.get("exclude_file_patterns", []):
-            if re.match(pat, name):
-                return False
+        if any(r.match(name) for r in f.exclude_res):
+            return False
 
         # Regex-Includes (wenn gesetzt, muss eins matchen)
-        inc_patterns = self.cfg.get("include_file_patterns", [])
-        if inc_patterns:
-            return any(re.match(pat, name) for pat in inc_patterns)
+        if f.include_res:
+            return any(r.match(name) for r in f.include_res)
 
         # Tilde-Dateien ausblenden (dein Wunsch)
         if name.endswith("~"):
@@ -271,6 +658,7 @@ class WatchHandler(FileSystemEventHandler):
         return True
 
     # ---------- Events ----------
+    @profiled("watch.on_modified")
     def on_modified(self, event):
       if event.is_directory:
           return
@@ -288,41 +676,82 @@ class WatchHandler(FileSystemEventHandler):
       if not self._digest_changed(p):
           return
 
-      self._changed.add(p)
-      if not p.name.endswith("~"):
+      if self._events.modified(p) and not p.name.endswith("~"):
           self.log.add(f"Änderung: {_display_path(self.root, p)}")
       self._schedule_batch()
 
+    @profiled("watch.on_created")
     def on_created(self, event):
         if event.is_directory:
             return
         p = Path(event.src_path)
         if not self._is_watched_file(p):
             return
-        self._changed.add(p)
-        if not p.name.endswith("~"):
+        self._index_stat(p)
+        if self._events.created(p) and not p.name.endswith("~"):
             self.log.add(f"Neu: {_display_path(self.root, p)}")
         self._schedule_batch()
 
+    @profiled("watch.on_deleted")
     def on_deleted(self, event):
+        p = Path(event.src_path)
+        if not self._is_watched_path(p):
+            return
+        rel = self._rel(p)
         if event.is_directory:
+            if rel:
+                self.index.remove_prefix(rel)
+            if self._events.dir_deleted(p):
+                self._schedule_batch()
             return
-        p = Path(event.src_path)
-        if not self._is_watched_path(p) or p.name.endswith("~"):
+        if p.name.endswith("~"):
             return
-        self._deleted.add(p)
-        self.log.add(f"Gelöscht: {_display_path(self.root, p)}")
+        if rel:
+            self.index.remove(rel)
+        self._last_event.pop(p, None)
+        # Netto-Löschungen werden beim Batch geloggt (Atomic-Save erzeugt sonst Rauschen)
+        self._events.deleted(p)
         self._schedule_batch()
 
+    @profiled("watch.on_moved")
     def on_moved(self, event):
         src = Path(event.src_path)
         dest = Path(event.dest_path)
 
+        if event.is_directory:
+            self._on_dir_moved(src, dest)
+            return
+
+        # Quelle nur dann als Rename werten, wenn sie uns bekannt ist – Editor-Temp-Dateien
+        # (".x.py.swp", "x.py.tmp123") sind das nicht, sonst entstünde je Atomic-Save eine
+        # Phantom-Löschung samt Rename
+        src_rel, dest_rel = self._rel(src), self._rel(dest)
+        src_known = self._is_watched_path(src) and (
+            self._is_watched_file(src)
+            or self._events.tracks(src)
+            or (src_rel is not None and self.index.get(src_rel) is not None)
+        )
+        dest_known = dest_rel is not None and self.index.get(dest_rel) is not None
+
+        # Index-Eintrag mitnehmen – Inhalt (und mtime) bleiben gleich
+        if src_rel and dest_rel:
+            self.index.move(src_rel, dest_rel)
+
         # Wenn Ziel gültig ist, behandeln wir es wie Änderung (typisch bei Atomic-Save)
         if self._is_watched_file(dest):
-            self._changed.add(dest)
-            if not dest.name.endswith("~"):
-                self.log.add(f"Verschoben: {_display_path(self.root, src)} -> {_display_path(self.root, dest)}")
+            if src_known:
+                new = self._events.moved(src, dest)
+            elif dest_known:
+                new = self._events.modified(dest)
+            else:
+                new = self._events.created(dest)
+            if new is None:
+                return  # Teil eines bereits erfassten Ordner-Moves
+            if new and not dest.name.endswith("~"):
+                if self._is_watched_file(src):
+                    self.log.add(f"Verschoben: {_display_path(self.root, src)} -> {_display_path(self.root, dest)}")
+                else:
+                    self.log.add(f"Änderung: {_display_path(self.root, dest)}")
             self._schedule_batch()
             return
 
@@ -331,45 +760,265 @@ class WatchHandler(FileSystemEventHandler):
             return
 
         # Standard: Quelle entfernt
-        if self._is_watched_path(src):
-            self._deleted.add(src)
-            self.log.add(f"Gelöscht: {_display_path(self.root, src)}")
+        if src_known:
+            self._events.deleted(src)
 
         self._schedule_batch()
 
+    def _on_dir_moved(self, src: Path, dest: Path):
+        src_ok, dest_ok = self._is_watched_path(src), self._is_watched_path(dest)
+        src_rel, dest_rel = self._rel(src), self._rel(dest)
+        if src_rel and dest_rel and dest_ok:
+            self.index.move_prefix(src_rel, dest_rel)
+        elif src_rel:
+            self.index.remove_prefix(src_rel)
+        if src_ok and dest_ok:
+            if self._events.dir_moved(src, dest):
+                self._schedule_batch()
+        elif src_ok:
+            # aus dem Watch-Scope heraus verschoben (z. B. in einen ausgeschlossenen Ordner)
+            if self._events.dir_deleted(src):
+                self._schedule_batch()
+        elif dest_ok:
+            # in den Scope hinein verschoben: Inhalt wie neue Dateien behandeln
+            found = False
+            for p in dest.rglob("*"):
+                if p.is_file() and self._is_watched_file(p):
+                    self._events.created(p)
+                    found = True
+            if found:
+                self.log.add(f"Ordner hinzugefügt: {_display_path(self.root, dest)}")
+                self._schedule_batch()
+
+
+# Änderungen an diesen Keys greifen erst nach einem Neustart des Watchers
+RESTART_KEYS = (
+    "project_path", "branch", "remote_url", "wip_branch", "watch_budget", "poll_interval_sec", "force_polling",
+    "reconcile_enabled", "journal_enabled", "journal_fsync_ms", "journal_max_kb",
+)
+
 
 class WatchService:
-    def __init__(self, cfg: dict, log: InMemoryLog):
-        self.cfg = cfg
+    def __init__(self, cfg: Union[ConfigStore, ConfigSnapshot, dict], log: InMemoryLog):
+        # ConfigStore = live (Abo auf Änderungen), sonst fester Snapshot
+        self._store = cfg if isinstance(cfg, ConfigStore) else None
+        self._fixed = None if self._store else ConfigSnapshot.coerce(cfg)
         self.log = log
-        self._observer: Optional[Observer] = None
+        self._observer: Optional[ScopedObserver] = None
         self._handler: Optional[WatchHandler] = None
+        self._reconciler: Optional[Reconciler] = None
+        self._index: Optional[FileIndex] = None
+        self._journal: Optional[EventJournal] = None
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        self._started_cfg: Optional[ConfigSnapshot] = None
+
+    @property
+    def cfg(self) -> ConfigSnapshot:
+        return self._store.snapshot() if self._store else self._fixed
+
+    @staticmethod
+    def _exclude_names(cfg: ConfigSnapshot) -> set:
+        return set(cfg.exclude_dirs) | {".git", BACKUP_DIRNAME}
+
+    @staticmethod
+    def _reconcile_budget(cfg: ConfigSnapshot) -> dict:
+        return {
+            "batch_size": cfg.reconcile_batch_size,
+            "interval": cfg.reconcile_interval_sec,
+            "max_duty": cfg.reconcile_max_duty,
+            "max_mb_per_tick": cfg.reconcile_max_mb_per_tick,
+            "pass_pause": cfg.reconcile_pass_pause_sec,
+        }
 
     def start(self):
         if self._observer:
             return
-        root = Path(self.cfg["project_path"]).expanduser()
-        self._handler = WatchHandler(root=root, cfg=self.cfg, log=self.log)
-        self._observer = Observer()
-        self._observer.schedule(self._handler, str(root), recursive=True)
+        cfg = self.cfg
+        self._started_cfg = cfg
+        root = Path(cfg.project_path).expanduser()
+        state = state_dir_for(root)
+        self._index = FileIndex(state / "index.json")
+        pending: List[Record] = []
+        if cfg.journal_enabled:
+            self._journal = EventJournal(
+                state / "journal.jsonl",
+                fsync_interval=cfg.journal_fsync_ms / 1000.0,
+                max_bytes=cfg.journal_max_kb * 1024,
+            )
+            pending = self._journal.replay()
+            self._journal.open()
+        self._handler = WatchHandler(
+            root=root,
+            cfg=cfg,
+            log=self.log,
+            index=self._index,
+            large_store=LargeFileStore(state / "large_files.json"),
+            journal=self._journal,
+        )
+        exclude_names = self._exclude_names(cfg)
+        self._observer = ScopedObserver(
+            root=self._handler.root,
+            exclude_names=exclude_names,
+            log=self.log,
+            budget=cfg.watch_budget,
+            poll_interval=cfg.poll_interval_sec,
+            force_polling=cfg.force_polling,
+        )
+        self._observer.schedule(self._handler)
         self._observer.start()
-        self.log.add("Watcher gestartet")
+        st = self._observer.stats()
+        self.log.add(f"Watcher gestartet ({st['mode']}, {st['watches']} Watches)")
+        self._handler.replay_journal(pending)
+
+        if cfg.reconcile_enabled:
+            h = self._handler
+            self._reconciler = Reconciler(
+                root=h.root,
+                index=self._index,
+                is_watched_file=h._is_watched_file,
+                exclude_names=exclude_names,
+                digest_fn=h.content_digest,
+                on_changes=h.reconcile,
+                log=self.log,
+                **self._reconcile_budget(cfg),
+            )
+            self._reconciler.start()
+
+        if self._store:
+            self._unsubscribe = self._store.subscribe(self._on_config)
+
+    def _on_config(self, cfg: ConfigSnapshot):
+        """Config gespeichert: Filter/Zeiten live übernehmen, Ausschlüsse auch im Observer."""
+        h, obs, rec = self._handler, self._observer, self._reconciler
+        if not h or not obs:
+            return
+        pending = [k for k in RESTART_KEYS if getattr(cfg, k) != getattr(self._started_cfg, k)]
+        # Branch/Remote/WIP & Co. bleiben bis zum Neustart beim Startwert (sonst z. B. Commit auf HEAD, Push auf neuen Branch)
+        cfg = cfg._replace(**{k: getattr(self._started_cfg, k) for k in RESTART_KEYS})
+        h.apply_config(cfg)
+        exclude_names = self._exclude_names(cfg)
+        if exclude_names != obs.exclude_names:
+            obs.set_exclude_names(exclude_names)
+        if rec:
+            # neu eingeschlossene Ordner findet der nächste Abgleich-Durchlauf
+            rec.exclude_names = exclude_names
+            rec.configure(**self._reconcile_budget(cfg))
+        self.log.add("Config übernommen" + (f" – Neustart nötig für: {', '.join(pending)}" if pending else ""))
 
     def stop(self):
         obs = self._observer
         if obs:
+            if self._unsubscribe:
+                self._unsubscribe()
+                self._unsubscribe = None
+            if self._reconciler:
+                self._reconciler.stop()
+                self._reconciler = None
             obs.stop()
-            obs.join(timeout=3)
+            if self._handler:
+                self._handler.flush_push()
+                self._handler.close()
+            if self._index:
+                self._index.save()
+            if self._journal:
+                # offene Events bleiben im Journal und werden beim nächsten Start nachgeholt
+                self._journal.close()
+                self._journal = None
+            if self._handler:
+                # persistente git-Prozesse (cat-file) des Projekts beenden
+                REGISTRY.close(self._handler.root)
             self._observer = None
             self._handler = None
             self.log.add("Watcher gestoppt")
 
+    def squash_wip(self) -> Optional[str]:
+        """WIP-Branch auf `branch` zusammenfassen – mit laufendem Watcher über dessen Handler."""
+        h = self._handler
+        if h:
+            return h.squash_wip()
+        cfg = self.cfg
+        wip = cfg.wip_branch
+        if not wip:
+            raise RuntimeError("Kein WIP-Branch konfiguriert")
+        root = Path(cfg.project_path).expanduser()
+        handle = REGISTRY.get(root)
+        branch = cfg.branch or "main"
+        msg = f"{root.name}: squash {wip} @ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        with handle.lock:
+            sha = squash_wip(handle.repo, branch, wip, f"auto: {msg}")
+            handle.invalidate()
+            if sha:
+                self.log.add(f"Squash: {wip} -> {branch} ({sha[:7]})")
+            if cfg.auto_push and cfg.remote_url:
+                rec = push_wip(handle.repo, wip, branch)
+                if rec and not rec["skipped"]:
+                    self.log.add(f"Push: {' + '.join('origin/' + r for r in rec['refs'])}")
+        return sha
+
+    def mirror_remote(self) -> bool:
+        """
+        Vor dem Start lokalen Stand als Snapshot auf `branch` committen und per Force-with-lease pushen.
+        Im WIP-Modus übersprungen: Haupt-Index und HEAD hängen dort absichtlich hinter der
+        Arbeitskopie, ein Snapshot auf `branch` würde den späteren Squash blockieren.
+        """
+        cfg = self.cfg
+        branch = cfg.branch or "main"
+        if cfg.wip_branch and cfg.wip_branch != branch:
+            self.log.add(f"WIP-Modus ({cfg.wip_branch}) – Spiegeln übersprungen")
+            return False
+        root = Path(cfg.project_path).expanduser()
+        handle = REGISTRY.get(root)
+        h = self._handler
+        # große Dateien wie im Batch: überspringen oder als Pointer (nicht per add -A ins Repo)
+        store = h.large_store if h else LargeFileStore(state_dir_for(root) / "large_files.json")
+        warned = h._large_warned if h else {}
+        limit = threshold_bytes(cfg)
+        repo_root = Path(handle.repo.working_tree_dir)
+        with handle.lock:
+            mirror_force_with_lease(
+                repo=handle.repo, branch=branch, remote="origin", snapshot_msg="mirror_on_start",
+                max_add_size=limit,
+                stage_large=lambda large: stage_large_files(
+                    handle.repo, repo_root, large, limit, cfg.large_file_policy, store, self.log, warned,
+                ),
+            )
+            handle.invalidate()
+        self.log.add(f"Remote gespiegelt: origin/{branch} (mirror_on_start)")
+        return True
+
+    def flush(self):
+        """Offene Events committen, ausstehenden WIP-Push nachholen, Journal und Index sichern."""
+        h = self._handler
+        if not h:
+            return
+        h.flush_batch()
+        h.flush_push()
+        if self._journal:
+            self._journal.flush()
+        if self._index:
+            self._index.save()
+
     def running(self) -> bool:
         return self._observer is not None
 
+    def status(self) -> dict:
+        h = self._handler
+        return {
+            "running": self.running(),
+            "project": str(h.root) if h else "",
+            "pending": h._events.pending() if h else 0,
+            "head": h.handle.head_sha() if h else None,
+            **self.watch_stats(),
+        }
+
+    def watch_stats(self) -> dict:
+        obs = self._observer
+        return obs.stats() if obs else {"mode": "", "watches": 0}
+
     def preview_files(self) -> list[str]:
-        root = Path(self.cfg["project_path"]).expanduser()
+        cfg = self.cfg
+        root = Path(cfg.project_path).expanduser()
         return [
             str(p.relative_to(root))
-            for p in iter_watch_files(root, self.cfg.get("include_exts", []), self.cfg.get("exclude_dirs", []))
+            for p in iter_watch_files(root, list(cfg.include_exts), list(cfg.exclude_dirs))
         ]
\ No newline at end of file
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def git(cwd: Path, *args: str) -> str:
+    return subprocess.check_output(["git", "-C", str(cwd), *args], text=True, stderr=subprocess.STDOUT).strip()
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """Arbeitskopie mit einem Commit auf main und lokalem Bare-Repo als origin."""
+    for k, v in {
+        "GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "test@localhost",
+        "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "test@localhost",
+    }.items():
+        monkeypatch.setenv(k, v)
+    work, remote = tmp_path / "work", tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "-b", "main", str(work))
+    git(tmp_path, "init", "-q", "--bare", str(remote))
+    (work / "a.py").write_text("A = 1\n", encoding="utf-8")
+    git(work, "add", "-A")
+    git(work, "commit", "-q", "-m", "initial")
+    git(work, "remote", "add", "origin", str(remote))
+    git(work, "push", "-q", "origin", "main")
+    yield work, remote
+
+    from services.repo_registry import REGISTRY
+    REGISTRY.close_all()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import importlib
+import json
+
+import pytest
+
+
+@pytest.fixture
+def flask_app(tmp_path, monkeypatch):
+    """app.py mit eigenem HOME (Config ohne Log-Ablage), damit der Import nichts im echten HOME anlegt."""
+    home = tmp_path / "home"
+    (home / ".github_auto_sync").mkdir(parents=True)
+    (home / ".github_auto_sync" / "config.json").write_text(json.dumps({"log_file_enabled": False}), encoding="utf-8")
+    monkeypatch.setenv("HOME", str(home))
+    return importlib.import_module("app")
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("", 20),              # fehlt -> default
+    ("?limit=abc", 20),    # ungültig -> default statt 500
+    ("?limit=7", 7),
+    ("?limit=-5", 1),      # auf [lo, hi] begrenzt
+    ("?limit=999999", 1000),
+])
+def test_int_arg_defaults_and_clamps(flask_app, query, expected):
+    with flask_app.app.test_request_context(f"/api/push-stats{query}"):
+        assert flask_app._int_arg("limit", 20, 1, 1000) == expected
+
+
+def test_route_with_invalid_number_is_not_a_server_error(flask_app):
+    resp = flask_app.app.test_client().get("/api/push-stats?limit=viele")
+    assert resp.status_code == 200 and resp.get_json()["ok"] is True
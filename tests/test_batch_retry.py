@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+
+from watchdog.events import FileMovedEvent
+
+from services import watch_service
+from services.watch_service import InMemoryLog, WatchHandler
+
+from .conftest import git
+
+
+def test_failed_batch_is_retried_and_keeps_renames(git_repo, monkeypatch):
+    work, remote = git_repo
+    cfg = {"project_path": str(work), "remote_url": str(remote), "auto_push": False,
+           "batch_window_sec": 0.05, "max_backups": 0}
+    h = WatchHandler(work, cfg, InMemoryLog())
+
+    calls = []
+    real_stage = watch_service.stage_paths
+
+    def flaky_stage(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("index.lock")
+        return real_stage(*args, **kwargs)
+
+    monkeypatch.setattr(watch_service, "stage_paths", flaky_stage)
+
+    src, dst = h.root / "a.py", h.root / "c.py"
+    src.replace(dst)
+    h.on_moved(FileMovedEvent(str(src), str(dst)))
+    h.flush_batch()  # scheitert, plant selbst einen neuen Versuch ein
+    assert h._events.pending()
+
+    deadline = time.monotonic() + 10
+    while len(calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    with h._batch_lock:  # laufenden Batch abwarten
+        pass
+
+    assert "1 renamed" in git(work, "log", "-1", "--format=%s")
+    assert git(work, "ls-files").splitlines() == ["c.py"]
+    assert h._retry_sec == 0
+
+
+def test_push_failure_retries_only_the_push(git_repo, monkeypatch):
+    work, remote = git_repo
+    git(work, "remote", "set-url", "origin", str(remote) + "-fehlt")
+    cfg = {"project_path": str(work), "remote_url": "", "auto_push": True,
+           "batch_window_sec": 3600, "max_backups": 3}
+    h = WatchHandler(work, cfg, InMemoryLog())
+
+    backups = []
+    real_backup = h._backup_changed
+    monkeypatch.setattr(h, "_backup_changed", lambda changed: (backups.append(set(changed)), real_backup(changed)))
+
+    p = h.root / "a.py"
+    for n in (10, 11, 12):
+        p.write_text(f"A = {n}\n", encoding="utf-8")
+        h._events.modified(p)
+        h.flush_batch()
+
+    # drei Commits, je Änderung genau ein Backup, nichts erneut vorgemerkt
+    assert git(work, "rev-list", "--count", "main") == "4"
+    assert len(backups) == 3
+    assert not h._events.pending() and h._retry_sec == 0
+    assert h._push_due and h._push_retry_sec >= 1
+
+    # Remote wieder da: der nachgeholte Push bringt alle Commits auf einmal
+    git(work, "remote", "set-url", "origin", str(remote))
+    h.flush_push()
+    assert git(remote, "rev-parse", "main") == git(work, "rev-parse", "main")
+    assert not h._push_due and h._push_retry_sec == 0
+    h.close()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from git import Repo
+
+from services.git_service import commit_index, squash_wip, wip_commit, wip_prepare
+
+from .conftest import git
+
+IDENTITY_VARS = ("GIT_AUTHOR_NAME", "GIT_AUTHOR_EMAIL", "GIT_COMMITTER_NAME", "GIT_COMMITTER_EMAIL")
+
+
+def _no_identity(monkeypatch, tmp_path):
+    """Frisches HOME ohne user.name/user.email und ohne GIT_AUTHOR_*/GIT_COMMITTER_*."""
+    for k in IDENTITY_VARS + ("EMAIL",):
+        monkeypatch.delenv(k, raising=False)
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    monkeypatch.delenv("GIT_CONFIG_GLOBAL", raising=False)
+
+
+def test_commits_without_git_identity(git_repo, tmp_path, monkeypatch):
+    work, _ = git_repo
+    _no_identity(monkeypatch, tmp_path)
+    repo = Repo(work)
+
+    (work / "a.py").write_text("A = 2\n", encoding="utf-8")
+    git(work, "add", "a.py")
+    sha = commit_index(repo, "auto: ohne Identität")
+    assert git(work, "rev-parse", "main") == sha
+    assert git(work, "log", "-1", "--format=%an|%ae").split("|")[0]
+
+    # WIP-Commit und Squash laufen über dasselbe commit-tree
+    (work / "a.py").write_text("A = 3\n", encoding="utf-8")
+    env = wip_prepare(repo, "main", "wip")
+    repo.git.add("a.py", env=env)
+    assert wip_commit(repo, "main", "wip", "wip: x", env)
+    squashed = squash_wip(repo, "main", "wip", "auto: squash")
+    assert squashed and git(work, "show", "main:a.py") == "A = 3"
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+
+from models.config import DEFAULT_CONFIG, ConfigStore
+
+
+def test_reload_keeps_snapshot_and_file_on_parse_error(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"project_name": "A", "debounce_ms": 100}), encoding="utf-8")
+    store = ConfigStore(path)
+    seen = []
+    store.subscribe(seen.append)
+
+    path.write_text('{"project_name": "B", "debou', encoding="utf-8")  # halb geschrieben
+    assert store.reload() is False
+    assert path.read_text(encoding="utf-8").startswith('{"project_name": "B"')
+    assert not list(tmp_path.glob("*.corrupt-*"))
+    assert store.snapshot().project_name == "A"
+    assert store.problems and "unlesbar" in store.problems[0]
+    assert seen == []
+
+
+def test_reload_drops_removed_keys_to_defaults(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"debounce_ms": 100, "branch": "dev"}), encoding="utf-8")
+    store = ConfigStore(path)
+    seen = []
+    store.subscribe(seen.append)
+
+    path.write_text(json.dumps({"branch": "dev"}), encoding="utf-8")
+    assert store.reload() is True
+    assert store.snapshot().debounce_ms == DEFAULT_CONFIG["debounce_ms"]
+    assert store.data["debounce_ms"] == DEFAULT_CONFIG["debounce_ms"]
+    assert store.snapshot().branch == "dev"
+    assert len(seen) == 1
+
+
+def test_reload_applies_reconciler_budget_live(git_repo, tmp_path, monkeypatch):
+    from services import watch_service
+    from services.watch_service import InMemoryLog, WatchService
+
+    work, _ = git_repo
+    monkeypatch.setattr(watch_service, "state_dir_for", lambda root: tmp_path / "state")
+    path = tmp_path / "config.json"
+    base = {"project_path": str(work), "auto_push": False, "journal_enabled": False,
+            "reconcile_interval_sec": 2, "reconcile_pass_pause_sec": 300}
+    path.write_text(json.dumps(base), encoding="utf-8")
+    svc = WatchService(ConfigStore(path), InMemoryLog())
+    svc.start()
+    try:
+        path.write_text(json.dumps({**base, "reconcile_interval_sec": 7, "reconcile_pass_pause_sec": 30,
+                                    "reconcile_max_mb_per_tick": 8}), encoding="utf-8")
+        assert svc._store.reload() is True
+        rec = svc._reconciler
+        assert (rec.interval, rec.pass_pause, rec.max_bytes_per_tick) == (7.0, 30.0, 8 * 1024 * 1024)
+    finally:
+        svc.stop()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+from watchdog.events import FileMovedEvent
+
+from services.event_coalescer import EventCoalescer
+from services.git_service import stage_paths
+from services.repo_registry import REGISTRY
+from services.watch_service import InMemoryLog, WatchHandler
+
+from .conftest import git
+
+
+def test_editor_temp_rename_is_a_change_not_a_rename(git_repo):
+    work, remote = git_repo
+    h = WatchHandler(work, {"project_path": str(work), "remote_url": str(remote), "max_backups": 0}, InMemoryLog())
+    target, new = h.root / "a.py", h.root / "b.py"
+    h._index_stat(target)
+
+    # Atomic-Save: Temp-Datei schreiben, dann über das Ziel umbenennen
+    for tmp, dst, text in ((h.root / ".a.py.tmp123", target, "A = 2\n"), (h.root / "b.py.tmp", new, "B = 1\n")):
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(dst)
+        h.on_moved(FileMovedEvent(str(tmp), str(dst)))
+
+    batch = h._events.drain()
+    assert batch.changed == {target, new}
+    assert not batch.deleted
+    assert not batch.renames
+
+
+def test_known_file_rename_keeps_origin(git_repo):
+    work, remote = git_repo
+    h = WatchHandler(work, {"project_path": str(work), "remote_url": str(remote), "max_backups": 0}, InMemoryLog())
+    src, dst = h.root / "a.py", h.root / "c.py"
+    src.replace(dst)
+    h.on_moved(FileMovedEvent(str(src), str(dst)))
+
+    batch = h._events.drain()
+    assert batch.renames == {dst: src}
+    assert batch.deleted == {src}
+
+
+def test_chained_dir_moves_map_back_to_indexed_paths(tmp_path):
+    c = EventCoalescer()
+    a, b, y = tmp_path / "a", tmp_path / "b", tmp_path / "y"
+    c.dir_moved(a, b)
+    c.dir_moved(b / "x", y)
+    assert c.drain().dir_moves == {a: b, a / "x": y}
+
+
+def test_chained_dir_moves_are_staged(git_repo):
+    work, _ = git_repo
+    root = work.resolve()
+    (root / "a" / "x").mkdir(parents=True)
+    (root / "a" / "x" / "f.py").write_text("F = 1\n", encoding="utf-8")
+    (root / "a" / "g.py").write_text("G = 1\n", encoding="utf-8")
+    git(root, "add", "-A")
+    git(root, "commit", "-q", "-m", "dirs")
+
+    c = EventCoalescer()
+    shutil.move(root / "a", root / "b")
+    c.dir_moved(root / "a", root / "b")
+    shutil.move(root / "b" / "x", root / "y")
+    c.dir_moved(root / "b" / "x", root / "y")
+
+    batch = c.drain()
+    repo = REGISTRY.get(root).repo
+    stage_paths(repo, root, batch.changed, batch.deleted, batch.dir_moves, batch.dir_deletes)
+    assert sorted(git(root, "ls-files").splitlines()) == ["a.py", "b/g.py", "y/f.py"]
+    untracked = [l for l in git(root, "status", "--porcelain", "--untracked-files=all").splitlines() if l.startswith("??")]
+    assert not untracked
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import threading
+
+from utils.fs import atomic_write_text
+
+
+def test_atomic_write_from_parallel_threads(tmp_path):
+    target = tmp_path / "index.json"
+    texts = [f"{n}\n" * 2000 for n in range(8)]
+    errors = []
+
+    def writer(text):
+        try:
+            for _ in range(25):
+                atomic_write_text(target, text)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in texts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert target.read_text(encoding="utf-8") in texts
+    assert [p.name for p in tmp_path.iterdir()] == ["index.json"]  # keine Temp-Reste
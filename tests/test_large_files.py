@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from models.config import ConfigSnapshot
+from services.large_files import LargeFileStore, parse_pointer
+from services.watch_service import InMemoryLog, WatchHandler, WatchService
+
+from .conftest import git
+
+BIG = 20 * 1024  # über der Schwelle von 0.01 MB
+
+
+def _cfg(work, remote, policy):
+    return ConfigSnapshot.coerce({
+        "project_path": str(work), "remote_url": str(remote), "branch": "main",
+        "auto_push": False, "batch_window_sec": 3600, "max_backups": 0,
+        "large_file_threshold_mb": 0.01, "large_file_policy": policy,
+    })
+
+
+def test_mirror_skips_large_files(git_repo):
+    work, remote = git_repo
+    (work / "big.bin").write_bytes(b"x" * BIG)
+    (work / "b.py").write_text("B = 1\n", encoding="utf-8")
+    log = InMemoryLog()
+
+    assert WatchService(_cfg(work, remote, "skip"), log).mirror_remote() is True
+    assert git(remote, "ls-tree", "--name-only", "main").splitlines() == ["a.py", "b.py"]
+    assert any("zu groß" in line for line in log.dump())
+
+
+def test_batch_stores_large_file_as_pointer(git_repo, tmp_path):
+    work, remote = git_repo
+    store = LargeFileStore(tmp_path / "large_files.json", root=tmp_path / "lfs")
+    h = WatchHandler(work, _cfg(work, remote, "store"), InMemoryLog(), large_store=store)
+
+    p = h.root / "big.bin"
+    p.write_bytes(b"y" * BIG)
+    h._events.created(p)
+    h.flush_batch()
+
+    oid, size = parse_pointer(git(work, "show", "main:big.bin") + "\n")
+    assert size == BIG and store.object_path(oid).read_bytes() == p.read_bytes()
+    assert store.tracked("big.bin") == oid
+    # skip-worktree: status/add -A holen die echte Datei nicht zurück
+    assert git(work, "ls-files", "-v", "big.bin").startswith("S ")
+    assert git(work, "status", "--porcelain") == ""
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import logging
+
+import pytest
+
+from services.log_sink import LOGGER_NAME, LogSink
+
+N = 2525
+BASE = 1_800_000_000.0
+
+
+@pytest.fixture(scope="module")
+def sink(tmp_path_factory):
+    """Gut 2500 Einträge über mehrere rotierte Dateien; viele teilen sich einen Zeitstempel."""
+    s = LogSink(tmp_path_factory.mktemp("logs"), max_bytes=64 * 1024, keep=100)
+    s.start()
+    logger = logging.getLogger(LOGGER_NAME)
+    stamps = iter(
+        # Gruppen zu 37 gleichen Zeitstempeln, am Ende ein Block größer als eine Datei
+        BASE + (i // 37 if i < 1500 else 1500 // 37 + 1) for i in range(N)
+    )
+
+    def fixed_time(record):
+        record.created = next(stamps)
+        return True
+
+    logger.addFilter(fixed_time)
+    try:
+        for i in range(N):
+            logger.info("eintrag %05d %s", i, "x" * 80)
+        s.flush()
+    finally:
+        logger.removeFilter(fixed_time)
+        s.stop()
+    return s
+
+
+def test_log_rotates_into_several_files(sink):
+    files = sink.files()
+    assert len(files) > 3
+    assert len({f["file"] for f in files}) == len(files)  # gleicher Start-Zeitstempel: eigener Name
+
+
+@pytest.mark.parametrize("limit", [1, 7, 37, 100, 999])
+def test_paging_across_equal_timestamps_is_lossless(sink, limit):
+    seen, before, skip = [], "", 0
+    while True:
+        page = sink.read(before=before, limit=limit, skip=skip)
+        seen += [e["msg"][8:13] for e in page["entries"]]
+        if not page["next_before"]:
+            break
+        before, skip = page["next_before"], page["next_skip"]
+    assert seen == [f"{i:05d}" for i in reversed(range(N))]
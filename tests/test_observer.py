@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import sys
+import threading
+
+import pytest
+from watchdog.events import FileSystemEventHandler
+
+from services import observer_service
+from services.observer_service import ScopedObserver
+from services.watch_service import InMemoryLog
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify nur unter Linux")
+
+
+class _Recorder(FileSystemEventHandler):
+    def __init__(self):
+        self.paths = []
+        self.seen = threading.Event()
+
+    def on_any_event(self, event):
+        self.paths.append(event.src_path)
+        self.seen.set()
+
+
+def _tree(tmp_path):
+    for d in ("src/pkg", "node_modules/dep", "docs"):
+        (tmp_path / d).mkdir(parents=True)
+    return tmp_path
+
+
+def test_inotify_watches_only_included_dirs(tmp_path):
+    root = _tree(tmp_path)
+    obs = ScopedObserver(root, {"node_modules"}, InMemoryLog())
+    obs.schedule(_Recorder())
+    obs.start()
+    try:
+        st = obs.stats()
+        assert st["mode"] == "inotify"
+        assert st["watches"] == 4  # root, src, src/pkg, docs
+    finally:
+        obs.stop()
+
+
+def test_missing_watchdog_internals_fall_back_to_native(tmp_path, monkeypatch):
+    root = _tree(tmp_path)
+    monkeypatch.setattr(observer_service, "INOTIFY_INTERNALS", observer_service.INOTIFY_INTERNALS + ("_gibt_es_nicht",))
+    log = InMemoryLog()
+    rec = _Recorder()
+    obs = ScopedObserver(root, {"node_modules"}, log)
+    obs.schedule(rec)
+    obs.start()
+    try:
+        assert obs.stats()["mode"] == "native"
+        assert any("watchdog-Interna fehlen: _gibt_es_nicht" in line for line in log.dump())
+        (root / "src" / "pkg" / "a.py").write_text("A = 1\n", encoding="utf-8")
+        assert rec.seen.wait(5)
+    finally:
+        obs.stop()
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import pytest
+from git import GitCommandError, Repo
+from git.cmd import Git
+
+from services.git_service import PUSH_STATS, mirror_force_with_lease, push_branches
+
+from .conftest import git
+
+
+@pytest.fixture
+def git_calls(monkeypatch):
+    calls = []
+    real = Git._call_process
+
+    def spy(self, method, *args, **kwargs):
+        calls.append(method)
+        return real(self, method, *args, **kwargs)
+
+    monkeypatch.setattr(Git, "_call_process", spy)
+    return calls
+
+
+def test_push_without_new_commits_skips_network(git_repo, git_calls):
+    work, _ = git_repo
+    skipped = PUSH_STATS.skipped
+    rec = push_branches(Repo(work), ["main"])
+    assert rec["skipped"] and PUSH_STATS.skipped == skipped + 1
+    assert "push" not in git_calls
+
+
+def test_mirror_up_to_date_neither_fetches_nor_pushes(git_repo, git_calls):
+    work, _ = git_repo
+    mirror_force_with_lease(Repo(work), "main")
+    assert "fetch" not in git_calls and "push" not in git_calls
+
+
+def test_mirror_lease_rejects_foreign_push(git_repo, tmp_path):
+    work, remote = git_repo
+    other = tmp_path / "other"
+    git(tmp_path, "clone", "-q", "-b", "main", str(remote), str(other))
+    (other / "f.py").write_text("F = 1\n", encoding="utf-8")
+    git(other, "add", "-A")
+    git(other, "commit", "-q", "-m", "fremd")
+    git(other, "push", "-q", "origin", "main")
+    foreign = git(remote, "rev-parse", "main")
+
+    # lokal neuer Stand, Tracking-Ref noch auf dem alten Remote-Stand
+    (work / "b.py").write_text("B = 1\n", encoding="utf-8")
+    with pytest.raises(GitCommandError):
+        mirror_force_with_lease(Repo(work), "main")
+    assert git(remote, "rev-parse", "main") == foreign
+
+
+def test_mirror_overwrites_when_lease_matches(git_repo):
+    work, remote = git_repo
+    git(work, "commit", "-q", "--amend", "-m", "umgeschrieben")  # nicht fast-forward
+    mirror_force_with_lease(Repo(work), "main")
+    assert git(remote, "rev-parse", "main") == git(work, "rev-parse", "main")
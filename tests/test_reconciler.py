@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import hashlib
+import json
+
+from services.file_index import FileIndex
+from services.reconciler import Reconciler
+from services.watch_service import InMemoryLog
+
+
+def _digest(p):
+    return hashlib.sha256(p.read_bytes()).hexdigest()
+
+
+def _reconciler(root, index, found, **kw):
+    return Reconciler(
+        root=root, index=index, is_watched_file=lambda p: p.suffix == ".py",
+        exclude_names={"node_modules"}, digest_fn=_digest,
+        on_changes=lambda changed, deleted: found.append((sorted(changed), sorted(deleted))),
+        log=InMemoryLog(), **kw,
+    )
+
+
+def _full_pass(rec):
+    while not rec.tick():
+        pass
+
+
+def test_first_pass_builds_baseline_then_reports_changes(tmp_path):
+    root = tmp_path / "proj"
+    (root / "src").mkdir(parents=True)
+    (root / "node_modules").mkdir()
+    for name in ("src/a.py", "src/b.py", "node_modules/x.py", "notes.txt"):
+        (root / name).write_text("1\n", encoding="utf-8")
+    index = FileIndex(tmp_path / "index.json")
+    found = []
+    rec = _reconciler(root, index, found, batch_size=1)
+
+    _full_pass(rec)  # Basis: meldet nichts, nur beobachtete Dateien ohne Ausschlüsse
+    assert found == [] and sorted(index.rels()) == ["src/a.py", "src/b.py"]
+    assert sorted(json.loads((tmp_path / "index.json").read_text())["entries"]) == ["src/a.py", "src/b.py"]
+
+    (root / "src/a.py").write_text("22\n", encoding="utf-8")
+    (root / "src/b.py").unlink()
+    (root / "src/c.py").write_text("3\n", encoding="utf-8")
+    _full_pass(rec)
+    changed = sorted(p for c, _ in found for p in c)
+    deleted = sorted(p for _, d in found for p in d)
+    assert changed == [root / "src/a.py", root / "src/c.py"]
+    assert deleted == [root / "src/b.py"]
+    assert rec.passes == 2
+
+
+def test_same_stat_is_not_rehashed(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "a.py").write_text("1\n", encoding="utf-8")
+    index = FileIndex()
+    found, hashed = [], []
+    rec = _reconciler(root, index, found)
+    rec.digest_fn = lambda p: hashed.append(p) or _digest(p)
+
+    _full_pass(rec)
+    _full_pass(rec)
+    assert hashed == [] and found == []
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from models.config import ConfigSnapshot
+from services.watch_service import InMemoryLog, WatchHandler, WatchService
+
+from .conftest import git
+
+
+def _cfg(work, remote):
+    return ConfigSnapshot.coerce({
+        "project_path": str(work),
+        "remote_url": str(remote),
+        "branch": "main",
+        "wip_branch": "wip",
+        "auto_push": False,
+        "batch_window_sec": 3600,
+        "max_backups": 0,
+    })
+
+
+def test_restart_in_wip_mode_keeps_squash_possible(git_repo):
+    work, remote = git_repo
+    cfg = _cfg(work, remote)
+    log = InMemoryLog()
+
+    # eine Sitzung mit WIP-Commit
+    h = WatchHandler(work, cfg, log)
+    p = h.root / "a.py"
+    p.write_text("A = 2\n", encoding="utf-8")
+    h._events.modified(p)
+    h.flush_batch()
+    main_before = git(work, "rev-parse", "main")
+    assert git(work, "rev-parse", "wip") != main_before
+
+    # Neustart: Spiegeln darf im WIP-Modus keinen Snapshot auf main legen
+    svc = WatchService(cfg, log)
+    assert svc.mirror_remote() is False
+    assert git(work, "rev-parse", "main") == main_before
+
+    sha = svc.squash_wip()
+    assert sha and git(work, "rev-parse", "main") == sha
+    assert git(work, "show", "main:a.py") == "A = 2"
+    # und ein weiterer Squash ist weiterhin möglich (nichts zu übernehmen)
+    assert svc.squash_wip() is None
+
+
+def test_mirror_without_wip_snapshots_worktree(git_repo):
+    work, remote = git_repo
+    cfg = _cfg(work, remote)._replace(wip_branch="")
+    (work / "b.py").write_text("B = 1\n", encoding="utf-8")
+
+    assert WatchService(cfg, InMemoryLog()).mirror_remote() is True
+    assert git(remote, "show", "main:b.py") == "B = 1"
+
+
+def test_squash_keeps_user_staging_and_pointer_bits(git_repo, tmp_path):
+    from services.large_files import LargeFileStore
+
+    work, remote = git_repo
+    cfg = _cfg(work, remote)._replace(large_file_threshold_mb=0.01, large_file_policy="store")
+    store = LargeFileStore(tmp_path / "large_files.json", root=tmp_path / "lfs")
+    h = WatchHandler(work, cfg, InMemoryLog(), large_store=store)
+
+    # vom Benutzer gestaget, nicht Teil des WIP-Stands
+    (work / "notes.txt").write_text("notiz\n", encoding="utf-8")
+    git(work, "add", "notes.txt")
+
+    p, big = h.root / "a.py", h.root / "big.bin"
+    p.write_text("A = 2\n", encoding="utf-8")
+    big.write_bytes(b"z" * 20 * 1024)
+    h._events.modified(p)
+    h._events.created(big)
+    h.flush_batch()
+
+    assert h.squash_wip()
+    assert git(work, "diff", "--cached", "--name-only") == "notes.txt"
+    assert git(work, "ls-files", "-v", "big.bin").startswith("S ")
+    assert git(work, "status", "--porcelain", "--", "a.py", "big.bin") == ""
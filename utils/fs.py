@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """
+    Schreibt über Temp-Datei + fsync + rename – ein Absturz hinterlässt nie eine halbe Datei.
+    Eigene Temp-Datei je Aufruf (mkstemp), damit parallele Schreiber (Abgleich-Thread,
+    "flush" über den Steuer-Socket, stop()) sich nicht gegenseitig die Datei wegnehmen.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with open(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise